@@ -0,0 +1,350 @@
+"""
+# Benchmark corpus
+
+`corpus.xml.bz2` holds a few hundred English Wiktionary-style pages, in the dump format
+(so `iter_dump_pages` reads it). The file is checked in and pinned (see `CORPUS_SHA256`).
+This module is how it was made, and remakes it byte for byte:
+
+```sh
+python -m benchmarks.corpus
+```
+
+The pages are generated (with a fixed seed) rather than downloaded, so the corpus needs no
+network and no licensing fuss. They follow the layout and templates of real entries, in
+the mix we care about:
+
+| Kind | Pages | Like |
+| --- | --- | --- |
+| `small` | 150 | A single sense, maybe a pronunciation (most of Wiktionary) |
+| `medium` | 70 | A few parts of speech, relations, a translation table |
+| `multi_etymology` | 40 | "Etymology 1", "Etymology 2", ... each with its own parts of speech |
+| `translations` | 30 | Several translation tables with 100+ translations each |
+| `huge` | 10 | All of the above, many times over, plus a dozen other languages ("set", "water") |
+
+"""
+
+import bz2
+import hashlib
+import random
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+CORPUS = Path(__file__).parent / "corpus.xml.bz2"
+
+#: The corpus that the checked-in baseline was measured on
+CORPUS_SHA256 = "e00fa250cebe3de2c77f5481b14684f5c5f8738bfcf4fc20a8cf213559bfadd3"
+
+SEED = 20221018
+
+KINDS = {
+    "small": 150,
+    "medium": 70,
+    "multi_etymology": 40,
+    "translations": 30,
+    "huge": 10,
+}
+
+_ONSETS = ["b", "br", "c", "ch", "d", "f", "fl", "g", "gr", "h", "j", "k", "l", "m", "n", "p", "pl",
+           "qu", "r", "s", "sh", "sk", "st", "t", "th", "tr", "v", "w", "wh", "y", "z"]
+_NUCLEI = ["a", "e", "i", "o", "u", "ai", "ea", "ee", "oo", "ou", "y"]
+_CODAS = ["", "", "b", "ck", "d", "ft", "g", "l", "ll", "m", "n", "nd", "ng", "nt", "p", "r", "rt",
+          "s", "sh", "st", "t", "th", "x"]
+
+#: (code, name) of translation languages
+_LANGUAGES = [
+    ("af", "Afrikaans"), ("sq", "Albanian"), ("ar", "Arabic"), ("hy", "Armenian"), ("eu", "Basque"),
+    ("be", "Belarusian"), ("bg", "Bulgarian"), ("ca", "Catalan"), ("cmn", "Mandarin"), ("yue", "Cantonese"),
+    ("hr", "Croatian"), ("cs", "Czech"), ("da", "Danish"), ("nl", "Dutch"), ("eo", "Esperanto"),
+    ("et", "Estonian"), ("fi", "Finnish"), ("fr", "French"), ("gl", "Galician"), ("ka", "Georgian"),
+    ("de", "German"), ("el", "Greek"), ("he", "Hebrew"), ("hi", "Hindi"), ("hu", "Hungarian"),
+    ("is", "Icelandic"), ("id", "Indonesian"), ("ga", "Irish"), ("it", "Italian"), ("ja", "Japanese"),
+    ("ko", "Korean"), ("la", "Latin"), ("lv", "Latvian"), ("lt", "Lithuanian"), ("mk", "Macedonian"),
+    ("ms", "Malay"), ("mt", "Maltese"), ("nb", "Norwegian Bokmål"), ("fa", "Persian"), ("pl", "Polish"),
+    ("pt", "Portuguese"), ("ro", "Romanian"), ("ru", "Russian"), ("sr", "Serbo-Croatian"), ("sk", "Slovak"),
+    ("sl", "Slovene"), ("es", "Spanish"), ("sw", "Swahili"), ("sv", "Swedish"), ("tl", "Tagalog"),
+    ("th", "Thai"), ("tr", "Turkish"), ("uk", "Ukrainian"), ("ur", "Urdu"), ("vi", "Vietnamese"),
+    ("cy", "Welsh"), ("yi", "Yiddish"), ("zu", "Zulu"),
+]
+#: Scripts to write (some) translations in, so the corpus isn't all ASCII
+_SCRIPTS = {
+    "ar": "ابتثجحخدذرزسشصضطظعغفقكلمنهوي", "ru": "абвгдежзийклмнопрстуфхцчшщыэюя",
+    "uk": "абвгґдеєжзиіїйклмнопрстуфхцчшщюя", "el": "αβγδεζηθικλμνξοπρστυφχψω",
+    "he": "אבגדהוזחטיכלמנסעפצקרשת", "hi": "कखगघचछजझटठडढणतथदधनपफबभमयरलवशसह",
+    "ja": "あいうえおかきくけこさしすせそたちつてとなにぬねの", "cmn": "水火山木金土日月人口手心",
+    "ko": "가나다라마바사아자차카타파하", "th": "กขคงจฉชซญดตถทธนบปผพฟมยรลวสหอ",
+}
+#: Their script codes (for `sc=`)
+_SCRIPT_CODES = {
+    "ar": "Arab", "ru": "Cyrl", "uk": "Cyrl", "el": "Grek", "he": "Hebr", "hi": "Deva", "ja": "Jpan",
+    "cmn": "Hani", "ko": "Kore", "th": "Thai",
+}
+#: (code, name) of other languages with an entry on the same page
+_OTHER_ENTRIES = [
+    ("nl", "Dutch"), ("fr", "French"), ("de", "German"), ("it", "Italian"), ("es", "Spanish"),
+    ("sv", "Swedish"), ("pl", "Polish"), ("fy", "West Frisian"), ("la", "Latin"), ("pt", "Portuguese"),
+    ("da", "Danish"), ("cs", "Czech"),
+]
+_ANCESTORS = [("enm", "Middle English"), ("ang", "Old English"), ("gem-pro", "Proto-Germanic"),
+              ("ine-pro", "Proto-Indo-European")]
+_SOURCES = ["fr", "la", "grc", "nl", "non", "it", "es", "ar", "de"]
+_POS = [("Noun", "{{en-noun}}"), ("Verb", "{{en-verb}}"), ("Adjective", "{{en-adj}}"),
+        ("Adverb", "{{en-adv}}"), ("Interjection", "{{en-interj}}"), ("Proper noun", "{{en-prop}}")]
+_LABELS = ["transitive", "intransitive", "countable", "uncountable", "informal", "slang", "dated",
+           "archaic", "figuratively", "British", "US", "chiefly", "in the plural", "dialectal"]
+_GLOSS = ["substance", "liquid", "collection", "action", "place", "tool", "animal", "state", "sound",
+          "quality", "person", "container", "group", "piece", "movement", "device"]
+_RELATIONS = ["Synonyms", "Antonyms", "Hypernyms", "Hyponyms", "Coordinate terms", "Derived terms",
+              "Related terms", "Descendants"]
+
+
+def _word(rng: random.Random, syllables: int | None = None) -> str:
+    syllables = syllables or rng.choice([1, 1, 2, 2, 2, 3])
+    return "".join(rng.choice(_ONSETS) + rng.choice(_NUCLEI) + rng.choice(_CODAS) for _ in range(syllables))
+
+
+def _foreign(rng: random.Random, lang: str) -> str:
+    if lang in _SCRIPTS:
+        return "".join(rng.choice(_SCRIPTS[lang]) for _ in range(rng.randint(1, 5)))
+    return _word(rng)
+
+
+def _words(rng: random.Random, n: int) -> str:
+    return "|".join(_word(rng) for _ in range(n))
+
+
+def _etymology(rng: random.Random, word: str) -> str:
+    kind = rng.random()
+
+    if kind < .5:
+        chain = _ANCESTORS[:rng.randint(1, len(_ANCESTORS))]
+        parts = [f"{{{{inh|en|{code}|{_word(rng)}}}}}" if i < 2 else f"{{{{der|en|{code}|*{_word(rng)}}}}}"
+                 for i, (code, _) in enumerate(chain)]
+        text = "From " + ", from ".join(parts) + "."
+        if rng.random() < .5:
+            text += " Cognate with " + ", ".join(
+                f"{{{{cog|{code}|{_foreign(rng, code)}}}}}" for code, _ in rng.sample(_OTHER_ENTRIES, rng.randint(1, 5))
+            ) + "."
+        if rng.random() < .2:
+            text += f" See also {{{{root|en|ine-pro|*{_word(rng, 1)}-}}}}."
+    elif kind < .8:
+        src = rng.choice(_SOURCES)
+        text = f"{{{{bor+|en|{src}|{_word(rng)}}}}}, from {{{{der|en|la|{_word(rng)}}}}}."
+    elif kind < .9:
+        text = f"{{{{compound|en|{_word(rng, 1)}|{_word(rng, 1)}}}}}."
+    elif kind < .95:
+        text = f"{{{{clipping|en|{word}{_word(rng, 1)}}}}}."
+    else:
+        text = "{{rfe|en}}"
+
+    return text
+
+
+def _pronunciation(rng: random.Random, heading: str) -> str:
+    ipa = _word(rng).replace("th", "θ").replace("sh", "ʃ").replace("ch", "tʃ")
+    lines = [f"{heading}Pronunciation{heading}"]
+
+    if rng.random() < .5:
+        lines += [
+            f"* {{{{a|UK}}}} {{{{IPA|en|/ˈ{ipa}/}}}}",
+            f"* {{{{a|US}}}} {{{{IPA|en|/ˈ{ipa}ɚ/|[ˈ{ipa}ɾɚ]}}}}",
+        ]
+    else:
+        lines.append(f"* {{{{IPA|en|/ˈ{ipa}/}}}}")
+    if rng.random() < .4:
+        lines.append(f"* {{{{audio|en|en-us-{ipa}.ogg|Audio (US)}}}}")
+    lines.append(f"* {{{{rhymes|en|{ipa[-3:]}|s={rng.randint(1, 3)}}}}}")
+    if rng.random() < .3:
+        lines.append(f"* {{{{hyphenation|en|{ipa[:2]}|{ipa[2:]}}}}}")
+
+    return "\n".join(lines)
+
+
+def _definitions(rng: random.Random, n: int) -> str:
+    lines = []
+
+    for _ in range(n):
+        label = f"{{{{lb|en|{'|'.join(rng.sample(_LABELS, rng.randint(1, 2)))}}}}} " if rng.random() < .6 else ""
+        links = " ".join(f"[[{_word(rng)}]]" for _ in range(rng.randint(1, 4)))
+        gloss = f" {{{{gloss|{rng.choice(_GLOSS)}}}}}" if rng.random() < .3 else ""
+        lines.append(f"# {label}A {rng.choice(_GLOSS)} that is {links}.{gloss}")
+
+        if rng.random() < .4:
+            lines.append(f"#: {{{{syn|en|{_words(rng, rng.randint(1, 4))}}}}}")
+        if rng.random() < .2:
+            lines.append(f"#: {{{{ant|en|{_words(rng, rng.randint(1, 2))}}}}}")
+        if rng.random() < .2:
+            lines.append(f"#: {{{{hyper|en|{_words(rng, rng.randint(1, 2))}}}}}")
+        if rng.random() < .3:
+            lines.append(f"#: {{{{ux|en|The {_word(rng)} is '''{_word(rng)}''' today.}}}}")
+
+    return "\n".join(lines)
+
+
+def _relations(rng: random.Random, heading: str, n: int) -> list[str]:
+    sections = []
+
+    for title in rng.sample(_RELATIONS, n):
+        if title == "Descendants":
+            body = "\n".join(f"* {{{{desc|{code}|{_foreign(rng, code)}|bor=1}}}}"
+                             for code, _ in rng.sample(_LANGUAGES, rng.randint(1, 4)))
+        elif rng.random() < .3:
+            body = f"{{{{col3|en|{_words(rng, rng.randint(3, 12))}}}}}"
+        else:
+            body = "\n".join(f"* {{{{l|en|{_word(rng)}}}}}" for _ in range(rng.randint(1, 8)))
+
+        sections.append(f"{heading}{title}{heading}\n{body}")
+
+    return sections
+
+
+def _translations(rng: random.Random, heading: str, tables: int, per_table: int) -> str:
+    lines = [f"{heading}Translations{heading}"]
+
+    for _ in range(tables):
+        lines.append(f"{{{{trans-top|{rng.choice(_GLOSS)}}}}}")
+
+        for code, name in sorted(rng.sample(_LANGUAGES, min(per_table, len(_LANGUAGES))), key=lambda l: l[1]):
+            translations = []
+            for _ in range(rng.choice([1, 1, 1, 2, 3])):
+                gender = rng.choice(["", "", "|m", "|f", "|n", "|m-p"])
+                tr = f"|tr={_word(rng)}" if code in _SCRIPTS else ""
+                if code in _SCRIPTS and rng.random() < .5:
+                    tr += f"|sc={_SCRIPT_CODES[code]}"
+                translations.append(f"{{{{{rng.choice(['t', 't+'])}|{code}|{_foreign(rng, code)}{gender}{tr}}}}}")
+            lines.append(f"* {name}: {', '.join(translations)}")
+
+        lines.append("{{trans-bottom}}")
+
+    # Bigger tables than there are languages: the rest are dialects & scripts
+    extra = per_table - len(_LANGUAGES)
+    if extra > 0:
+        lines.append(f"{{{{trans-top|{rng.choice(_GLOSS)}}}}}")
+        for _ in range(extra):
+            code = rng.choice(list(_SCRIPTS))
+            lines.append(f"*: {_word(rng).title()}: {{{{t|{code}|{_foreign(rng, code)}|sc={_SCRIPT_CODES[code]}}}}}")
+        lines.append("{{trans-bottom}}")
+
+    return "\n".join(lines)
+
+
+def _part_of_speech(
+    rng: random.Random, heading: str, senses: int, relations: int, translation_tables: int, per_table: int
+) -> str:
+    title, head = rng.choice(_POS)
+    sub = heading + "="
+    sections = [f"{heading}{title}{heading}\n{head}\n\n{_definitions(rng, senses)}"]
+
+    if rng.random() < .2:
+        sections.append(f"{sub}Usage notes{sub}\n* Mostly used in the {rng.choice(_GLOSS)} sense.")
+    sections += _relations(rng, sub, relations)
+    if translation_tables:
+        sections.append(_translations(rng, sub, translation_tables, per_table))
+
+    return "\n\n".join(sections)
+
+
+def _other_entry(rng: random.Random, name: str, code: str) -> str:
+    return (
+        f"=={name}==\n\n===Etymology===\nFrom {{{{inh|{code}|la|{_word(rng)}}}}}.\n\n"
+        f"===Pronunciation===\n* {{{{IPA|{code}|/ˈ{_word(rng)}/}}}}\n\n"
+        f"===Noun===\n{{{{{code}-noun|m}}}}\n\n# [[{_word(rng)}]]\n\n"
+        f"====Synonyms====\n* {{{{l|{code}|{_word(rng)}|g={rng.choice(['m', 'f', 'n'])}}}}}\n"
+    )
+
+
+def _english(rng: random.Random, word: str, kind: str) -> str:
+    h = "==="
+    parts = []
+
+    if kind == "small":
+        if rng.random() < .5:
+            parts.append(f"{h}Etymology{h}\n{_etymology(rng, word)}")
+        if rng.random() < .5:
+            parts.append(_pronunciation(rng, h))
+        parts.append(_part_of_speech(rng, h, rng.randint(1, 2), 0, 0, 0))
+
+    elif kind in ("medium", "translations", "huge"):
+        big = kind == "huge"
+
+        if rng.random() < .5 or big:
+            parts.append(f"{h}Alternative forms{h}\n" + "\n".join(
+                f"* {{{{l|en|{_word(rng)}}}}} {{{{q|{rng.choice(_LABELS)}}}}}" for _ in range(rng.randint(1, 3))
+            ))
+        parts.append(f"{h}Etymology{h}\n{_etymology(rng, word)}")
+        parts.append(_pronunciation(rng, h))
+
+        for _ in range(rng.randint(4, 6) if big else rng.randint(1, 3)):
+            parts.append(_part_of_speech(
+                rng, h,
+                senses=rng.randint(15, 40) if big else rng.randint(2, 6),
+                relations=rng.randint(4, 8) if big else rng.randint(0, 3),
+                translation_tables=rng.randint(3, 8) if big else rng.randint(4, 8) if kind == "translations" else rng.randint(0, 1),
+                per_table=rng.randint(40, 58) if big else rng.randint(100, 150) if kind == "translations" else rng.randint(5, 20),
+            ))
+
+    elif kind == "multi_etymology":
+        for i in range(1, rng.randint(2, 5) + 1):
+            parts.append(f"{h}Etymology {i}{h}\n{_etymology(rng, word)}")
+            if rng.random() < .5:
+                parts.append(_pronunciation(rng, h + "="))
+            for _ in range(rng.randint(1, 3)):
+                parts.append(_part_of_speech(rng, h + "=", rng.randint(1, 5), rng.randint(0, 2), rng.randint(0, 1), 10))
+
+    parts.append(f"{h}References{h}\n* {{{{R:Webster 1913}}}}")
+    if rng.random() < .3:
+        parts.append(f"{h}Anagrams{h}\n* {{{{anagrams|en|a={''.join(sorted(word))}|{_word(rng)}}}}}")
+
+    return "==English==\n" + "\n\n".join(parts) + "\n"
+
+
+def generate_pages(seed: int = SEED) -> list[tuple[str, str, str]]:
+    """`(kind, title, wikitext)` of every page in the corpus"""
+    rng = random.Random(seed)
+    titles = set()
+    pages = []
+
+    for kind, count in KINDS.items():
+        for _ in range(count):
+            while (title := _word(rng)) in titles:
+                pass
+            titles.add(title)
+
+            others = rng.sample(_OTHER_ENTRIES, 12 if kind == "huge" else rng.choice([0, 0, 1, 2]))
+            before = [o for o in others if o[1] < "English"]
+            after = [o for o in others if o[1] >= "English"]
+
+            text = "\n".join([
+                f"{{{{also|{title.title()}}}}}" if rng.random() < .3 else "",
+                *(_other_entry(rng, name, code) for code, name in sorted(before, key=lambda o: o[1])),
+                _english(rng, title, kind),
+                *(_other_entry(rng, name, code) for code, name in sorted(after, key=lambda o: o[1])),
+            ])
+            pages.append((kind, title, text))
+
+    return pages
+
+
+def write_corpus(path: str | Path = CORPUS, seed: int = SEED) -> str:
+    """Writes the corpus (as a dump) to `path`, and returns its SHA-256"""
+    xml = ['<mediawiki xmlns="http://www.mediawiki.org/xml/export-0.10/">']
+
+    for i, (_, title, text) in enumerate(generate_pages(seed)):
+        xml.append(
+            f"<page><title>{escape(title)}</title><ns>0</ns><id>{i + 1}</id>"
+            f"<revision><id>{i + 1}</id><text xml:space=\"preserve\">{escape(text)}</text></revision></page>"
+        )
+
+    xml.append("</mediawiki>\n")
+    # (No timestamp in the header, so the same pages always compress to the same bytes)
+    data = bz2.compress("\n".join(xml).encode("utf-8"), 9)
+    Path(path).write_bytes(data)
+
+    return hashlib.sha256(data).hexdigest()
+
+
+def corpus_sha256(path: str | Path = CORPUS) -> str:
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+
+
+if __name__ == "__main__":
+    print(write_corpus())
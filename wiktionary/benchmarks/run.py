@@ -0,0 +1,319 @@
+"""
+# Benchmarks
+
+Times each stage of turning a page into an entry, page by page, over the pinned corpus
+(see `benchmarks.corpus`). Runs offline:
+
+```sh
+python -m benchmarks.run                                   # Compare against baseline.json
+python -m benchmarks.run --out results.json                # Also save the results
+python -m benchmarks.run --out benchmarks/baseline.json    # Record a new baseline
+```
+
+| Stage | What |
+| --- | --- |
+| `split` | Finding the English entry & its sections (what `_fetch_entry_sections` does after fetching) |
+| `parse` | `EnParser.parse` |
+| `parse_templates` | `parse_templates` on each section (i.e., `EnParser.jsonld`) |
+| `transform` | `TemplateMapping.transform` on each (mapped) template on the page |
+| `json` | Serializing the entries as JSON |
+| `jsonld` | Serializing the templates as JSON-LD (with the `@context`) |
+
+Each page goes through every stage `--repeat` times, and we keep its fastest time per
+stage (which filters out most of the noise of a busy machine). The report has pages/sec
+(for `split` + `parse` + `json`, which is what the pipeline does), latency percentiles
+per stage, and peak RSS.
+
+Then it parses the corpus once more, keeping every entry, to see how much memory the parsed
+entries take up (`tracemalloc`). Of their strings, it counts how much the shared copies of
+symbols (language codes, template ids, ..., see `wiktionary.symbols`) save, and how much
+is still spent on duplicates (equal strings that aren't the same object). And it compares
+the templates parsed into records (see `wiktionary.en.templates.records`) with what they'd
+take as dicts.
+
+A stage regresses if its mean is more than `--threshold` slower than the baseline's (or
+peak RSS, or the parsed entries' memory, grows by as much), in which case we exit with
+status 1. (Not the median: most pages take well under a millisecond, which is too short to
+time steadily.) Baselines are only comparable on the same machine (and corpus, which we
+check), and a busy machine can be slower across the board: rerun before believing a
+regression in every stage at once.
+"""
+
+import gc
+import json
+import platform
+import resource
+import sys
+import time
+import tracemalloc
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Callable, Optional
+
+import typer
+
+from benchmarks.corpus import CORPUS, CORPUS_SHA256, corpus_sha256
+from wiktionary.dump import iter_dump_pages
+from wiktionary.en.parser import EnParser
+from wiktionary.en.templates.parse import TEMPLATE_REGISTRY, normalize_template_name, parse_templates
+from wiktionary.en.templates.records import TemplateRecord, json_default
+from wiktionary.ontology import get_context
+from wiktionary.symbols import SYMBOL_TABLES
+from wiktionary.utils import ParsedPage, get_entry
+
+BASELINE = Path(__file__).parent / "baseline.json"
+
+STAGES = ["split", "parse", "parse_templates", "transform", "json", "jsonld"]
+
+#: The stages that make up converting a page (for pages/sec)
+PIPELINE = ["split", "parse", "json"]
+
+PERCENTILES = [50, 90, 99]
+
+
+def _time(f: Callable, repeat: int):
+    """The fastest of `repeat` runs (in seconds), and what `f` returned"""
+    best = float("inf")
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = f()
+        best = min(best, time.perf_counter() - start)
+
+    return best, result
+
+
+def time_page(title: str, page: str, repeat: int = 3) -> dict[str, float]:
+    """How long each of the `STAGES` takes on one page"""
+    lang = "en"
+    times = {}
+
+    def split():
+        parsed = ParsedPage(get_entry(page, lang))
+        return parsed, parsed.entry_sections(lang)
+
+    times["split"], (parsed, sections) = _time(split, repeat)
+    times["parse"], entries = _time(lambda: EnParser.parse(title, sections, lang, page=parsed), repeat)
+    times["parse_templates"], graph = _time(lambda: [t for s in sections for t in parse_templates(s)], repeat)
+
+    mapped = [
+        (mapper, template) for template in parsed.wikitext.templates
+        if (mapper := TEMPLATE_REGISTRY.mappings.get(normalize_template_name(template.name))) is not None
+    ]
+    times["transform"], _ = _time(lambda: [mapper.transform(t) for mapper, t in mapped], repeat)
+
+    times["json"], _ = _time(lambda: json.dumps([e.to_dict() for e in entries], ensure_ascii=False, default=json_default), repeat)
+    times["jsonld"], _ = _time(
+        lambda: json.dumps({"@context": dict(get_context()), "@graph": graph}, ensure_ascii=False, default=json_default), repeat
+    )
+
+    return times
+
+
+def _strings(entries: list) -> dict[str, int]:
+    """Bytes spent on the strings in `entries`, saved by sharing symbols, and spent on duplicates"""
+    symbols = {id(symbol) for table in SYMBOL_TABLES.values() for symbol in table}
+    seen: set[int] = set()
+    first: dict[str, int] = {}
+    sizes = {"strings": 0, "symbols_saved": 0, "duplicates": 0}
+
+    stack = [entry.to_dict() for entry in entries]
+    while stack:
+        value = stack.pop()
+
+        if isinstance(value, Mapping):  # (Dicts, and template records)
+            stack.extend(value.values())
+        elif isinstance(value, (list, tuple)):
+            stack.extend(value)
+        elif isinstance(value, str):
+            size = sys.getsizeof(value)
+
+            if id(value) in seen:
+                if id(value) in symbols:
+                    sizes["symbols_saved"] += size
+                continue
+
+            seen.add(id(value))
+            sizes["strings"] += size
+            if first.setdefault(value, id(value)) != id(value):
+                sizes["duplicates"] += size
+
+    return sizes
+
+
+def _records(entries: list) -> dict[str, int]:
+    """Bytes spent on the template records in `entries`, and what the same templates would take as dicts"""
+    sizes = {"records": 0, "records_as_dicts": 0}
+
+    stack = [entry.to_dict() for entry in entries]
+    while stack:
+        value = stack.pop()
+
+        if isinstance(value, TemplateRecord):
+            sizes["records"] += sys.getsizeof(value) + (sys.getsizeof(value.extra) if value.extra else 0)
+            sizes["records_as_dicts"] += sys.getsizeof(value.to_dict())
+        if isinstance(value, Mapping):
+            stack.extend(value.values())
+        elif isinstance(value, (list, tuple)):
+            stack.extend(value)
+
+    return sizes
+
+
+def entry_memory(pages: list[tuple[str, str]]) -> dict:
+    """How much memory the parsed entries of `pages` take up, all together"""
+    lang = "en"
+
+    def parse(title: str, page: str) -> list:
+        parsed = ParsedPage(get_entry(page, lang))
+        return EnParser.parse(title, parsed.entry_sections(lang), lang, page=parsed)
+
+    gc.collect()
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+
+    entries = [entry for title, page in pages for entry in parse(title, page)]
+
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    return {
+        "entries": len(entries),
+        "entries_mb": retained / 2**20,
+        **{f"{key}_mb": size / 2**20 for key, size in _strings(entries).items()},
+        **{f"{key}_mb": size / 2**20 for key, size in _records(entries).items()},
+        "symbols": {name: len(table) for name, table in SYMBOL_TABLES.items()},
+    }
+
+
+def percentile(values: list[float], p: float) -> float:
+    """Nearest-rank percentile of (sorted) `values`"""
+    return values[min(len(values) - 1, max(0, round(p / 100 * len(values)) - 1))]
+
+
+def run(corpus: Path = CORPUS, repeat: int = 3, limit: int | None = None) -> dict:
+    pages = list(iter_dump_pages(str(corpus)))[:limit]
+    stage_times: dict[str, list[float]] = {stage: [] for stage in STAGES}
+
+    start = time.perf_counter()
+    for title, page in pages:
+        for stage, seconds in time_page(title, page, repeat).items():
+            stage_times[stage].append(seconds)
+    wall = time.perf_counter() - start
+
+    stages = {}
+    for stage, times in stage_times.items():
+        times.sort()
+        stages[stage] = {
+            "total_s": sum(times),
+            "mean_ms": sum(times) / len(times) * 1e3,
+            **{f"p{p}_ms": percentile(times, p) * 1e3 for p in PERCENTILES},
+            "max_ms": times[-1] * 1e3,
+        }
+
+    # (`ru_maxrss` is in KB on Linux, and bytes on macOS)
+    # (Before `entry_memory`, which keeps all the entries around at once)
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+
+    return {
+        "corpus": {"path": corpus.name, "sha256": corpus_sha256(corpus), "pages": len(pages)},
+        "machine": {
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "processor": platform.processor() or platform.machine(),
+        },
+        "repeat": repeat,
+        "wall_s": wall,
+        "pages_per_second": len(pages) / sum(stages[s]["total_s"] for s in PIPELINE),
+        "peak_rss_mb": peak_rss / 2**20,
+        "stages": stages,
+        "memory": entry_memory(pages),
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float = .2) -> list[str]:
+    """What got more than `threshold` worse since `baseline`"""
+    regressions = []
+
+    for stage, stats in results["stages"].items():
+        before = baseline["stages"].get(stage)
+        if not before:
+            continue
+
+        change = stats["mean_ms"] / before["mean_ms"] - 1
+        if change > threshold:
+            regressions.append(f"{stage}: {before['mean_ms']:.3f}ms -> {stats['mean_ms']:.3f}ms ({change:+.0%})")
+
+    if results["peak_rss_mb"] > baseline["peak_rss_mb"] * (1 + threshold):
+        regressions.append(f"peak RSS: {baseline['peak_rss_mb']:.0f}MB -> {results['peak_rss_mb']:.0f}MB")
+
+    before, after = baseline.get("memory"), results["memory"]
+    if before and after["entries_mb"] > before["entries_mb"] * (1 + threshold):
+        regressions.append(f"parsed entries: {before['entries_mb']:.1f}MB -> {after['entries_mb']:.1f}MB")
+
+    return regressions
+
+
+def report(results: dict, baseline: dict | None = None) -> str:
+    lines = [
+        f"{results['corpus']['pages']} pages, {results['pages_per_second']:.1f} pages/sec, "
+        f"peak RSS {results['peak_rss_mb']:.0f}MB",
+        "",
+        f"{'stage':16} {'mean':>9} {'p50':>9} {'p90':>9} {'p99':>9} {'max':>9}   (ms)" + ("   mean vs baseline" if baseline else ""),
+    ]
+
+    for stage, stats in results["stages"].items():
+        line = f"{stage:16} " + " ".join(
+            f"{stats[key]:9.3f}" for key in ("mean_ms", "p50_ms", "p90_ms", "p99_ms", "max_ms")
+        )
+        if baseline and stage in baseline["stages"]:
+            line += f"   {stats['mean_ms'] / baseline['stages'][stage]['mean_ms'] - 1:+.1%}"
+        lines.append(line)
+
+    memory = results["memory"]
+    lines += [
+        "",
+        f"{memory['entries']} parsed entries hold {memory['entries_mb']:.1f}MB"
+        + (f" ({memory['entries_mb'] / baseline['memory']['entries_mb'] - 1:+.1%} vs baseline)"
+           if baseline and "memory" in baseline else ""),
+        f"strings: {memory['strings_mb']:.1f}MB, {memory['duplicates_mb']:.1f}MB of which are duplicates; "
+        f"sharing symbols saves {memory['symbols_saved_mb']:.1f}MB",
+        f"template records: {memory['records_mb']:.1f}MB ({memory['records_as_dicts_mb']:.1f}MB as dicts)",
+        "symbols: " + ", ".join(f"{count} {name}" for name, count in memory["symbols"].items()),
+    ]
+
+    return "\n".join(lines)
+
+
+def main(
+    out: Optional[str] = typer.Option(None, help="Save the results (as JSON) here"),
+    baseline: str = typer.Option(str(BASELINE), help="Compare against these results"),
+    threshold: float = typer.Option(.2, help="How much slower (or bigger) counts as a regression"),
+    repeat: int = typer.Option(3, help="Times to run each stage on each page (we keep the fastest)"),
+    limit: Optional[int] = typer.Option(None, help="Only run on this many pages"),
+):
+    if corpus_sha256() != CORPUS_SHA256:
+        typer.echo("The corpus isn't the pinned one: remake it with `python -m benchmarks.corpus`", err=True)
+        raise typer.Exit(2)
+
+    results = run(repeat=repeat, limit=limit)
+    previous = json.loads(Path(baseline).read_text()) if Path(baseline).exists() else None
+
+    if previous and previous["corpus"]["sha256"] != results["corpus"]["sha256"]:
+        typer.echo("The baseline was measured on a different corpus: not comparing", err=True)
+        previous = None
+
+    typer.echo(report(results, previous))
+
+    if out:
+        Path(out).write_text(json.dumps(results, indent=2) + "\n")
+
+    if previous and (regressions := compare(results, previous, threshold)):
+        typer.echo("\nRegressions:\n" + "\n".join(f"  {r}" for r in regressions), err=True)
+        raise typer.Exit(1)
+
+
+if __name__ == "__main__":
+    typer.run(main)
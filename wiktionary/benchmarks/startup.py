@@ -0,0 +1,146 @@
+"""
+# Startup time
+
+Most uses of the CLI are quick (`--help`, a lookup, ...), so how long Python takes to import
+everything can easily be most of the time it runs. This checks that it stays quick:
+
+```sh
+python -m benchmarks.startup
+```
+
+Each command runs in a fresh interpreter (best of `--repeat`). A command fails the check if
+
+- it takes longer than its budget: wall time on top of what a bare interpreter (`python -c
+  pass`) takes to start, so the budgets mean the same thing on a slow machine, or
+- it imports one of the modules in `HEAVY`, which only the commands that need them should
+  import (e.g., wikitextparser, once there's something to parse). `-X importtime` tells us
+  which modules a command imports, and where the time goes (see `--verbose`).
+
+The second is what catches most mistakes (a new top-level import in `cli.py`, say), and,
+unlike the first, doesn't depend on how fast the machine is, so it's the only half that
+`tests/test_startup.py` checks (`heavy_imports`). Wall times are too noisy for a test.
+"""
+
+import os
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import typer
+
+ROOT = Path(__file__).parent.parent
+
+#: Modules that are slow to import, and that starting up shouldn't need
+HEAVY = ["wikitextparser", "requests", "more_itertools", "pyld", "numpy", "pyarrow", "rich", "pipes"]
+
+
+@dataclass
+class Command:
+    name: str
+    args: list[str]
+    #: Max. wall time on top of starting a bare interpreter (in ms)
+    budget: float
+    #: Which of `HEAVY` it may import
+    allowed: list[str] = field(default_factory=list)
+
+
+COMMANDS = [
+    Command("import wiktionary", ["-c", "import wiktionary"], 25),
+    Command("import wiktionary.api", ["-c", "import wiktionary.api"], 100),
+    Command("wiktionary --help", ["-m", "wiktionary.cli", "--help"], 70),
+]
+
+
+@dataclass
+class Startup:
+    #: Best wall time (in ms)
+    wall: float
+    #: `{module: cumulative import time (in ms)}`
+    imports: dict[str, float]
+
+
+def _run(args: list[str], importtime: bool = False) -> subprocess.CompletedProcess:
+    flags = ["-X", "importtime"] if importtime else []
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join([str(ROOT), os.environ.get("PYTHONPATH", "")])}
+
+    return subprocess.run(
+        [sys.executable, *flags, *args], cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    )
+
+
+def measure(args: list[str], repeat: int = 5) -> Startup:
+    best = float("inf")
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        _run(args)
+        best = min(best, time.perf_counter() - start)
+
+    return Startup(best * 1e3, measure_imports(args))
+
+
+def measure_imports(args: list[str]) -> dict[str, float]:
+    """`{module: cumulative import time (in ms)}` for each module the command imports"""
+    # Lines look like `import time:  self [us] | cumulative | imported package`
+    imports = {}
+    for line in _run(args, importtime=True).stderr.splitlines():
+        if line.startswith("import time:") and "|" in line and "cumulative" not in line:
+            _, cumulative, module = line.split("|")
+            imports[module.strip()] = int(cumulative) / 1e3
+
+    return imports
+
+
+def measure_bare(repeat: int = 5) -> float:
+    """How long a bare interpreter takes to start (in ms)"""
+    return measure(["-c", "pass"], repeat).wall
+
+
+def check(command: Command, startup: Startup, bare: float = 0.0) -> list[str]:
+    """What's wrong with how `command` starts up (given that a bare interpreter takes `bare` ms)"""
+    problems = []
+
+    if startup.wall - bare > command.budget:
+        problems.append(
+            f"{command.name}: {startup.wall:.0f}ms (budget: {bare:.0f}ms + {command.budget:.0f}ms)"
+        )
+
+    return problems + heavy_imports(command, startup.imports)
+
+
+def heavy_imports(command: Command, imports: dict[str, float]) -> list[str]:
+    """Which of `HEAVY` `command` imports, though it shouldn't (the half of `check` that doesn't depend on timing)"""
+    return [
+        f"{command.name}: imports {module} ({imports[module]:.0f}ms)"
+        for module in HEAVY
+        if module in imports and module not in command.allowed
+    ]
+
+
+def main(
+    repeat: int = typer.Option(5, help="Times to run each command (we keep the fastest)"),
+    verbose: bool = typer.Option(False, help="Also show the slowest imports"),
+):
+    bare = measure_bare(repeat)
+    typer.echo(f"{'python -c pass':24} {bare:6.0f}ms")
+
+    problems = []
+
+    for command in COMMANDS:
+        startup = measure(command.args, repeat)
+        problems.extend(check(command, startup, bare))
+        typer.echo(f"{command.name:24} {startup.wall:6.0f}ms (budget: {bare + command.budget:.0f}ms)")
+
+        if verbose:
+            for module, ms in sorted(startup.imports.items(), key=lambda m: -m[1])[:10]:
+                typer.echo(f"    {ms:6.1f}ms  {module}")
+
+    if problems:
+        typer.echo("\nToo slow:\n" + "\n".join(f"  {p}" for p in problems), err=True)
+        raise typer.Exit(1)
+
+
+if __name__ == "__main__":
+    typer.run(main)
@@ -0,0 +1,140 @@
+"""
+A stand-in for the Wikimedia API (an `http.server` on a thread), so the client can be
+tested without the network:
+
+```python
+def test_something(stub_api):
+    stub_api.pages["water"] = (12, "==English==\\n...")
+    client = stub_api.client()
+```
+
+It knows just enough of `action=query&prop=revisions` (title normalization, missing pages,
+`continue` when there are more than `per_response` revisions) and `action=parse`. To see how
+the client copes with an unhappy API, queue up failures (`fail`, `lag`) for the next requests.
+"""
+
+import json
+import threading
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from wiktionary.api import AsyncWiktionaryClient, WiktionaryClient
+from wiktionary.http import HTTPOptions
+
+
+class StubAPI:
+    def __init__(self):
+        #: `{title: (revid, wikitext)}`
+        self.pages: dict[str, tuple[int, str]] = {}
+        #: Most revisions in one response (the rest come after a `continue`)
+        self.per_response = 50
+        #: The query parameters of each request, in the order they came in
+        self.requests: list[dict[str, str]] = []
+        #: `(status, headers, body)` to answer the next requests with (instead of the real answer)
+        self.failures: deque[tuple[int, dict, dict]] = deque()
+        self.url = ""
+
+    def fail(self, times: int = 1, status: int = 429, retry_after: float | None = None):
+        """Refuse the next `times` requests with `status`"""
+        headers = {} if retry_after is None else {"Retry-After": str(retry_after)}
+        self.failures.extend([(status, headers, {})] * times)
+
+    def lag(self, times: int = 1, retry_after: float | None = None):
+        """Refuse the next `times` requests because of [`maxlag`](https://www.mediawiki.org/wiki/Manual:Maxlag_parameter)"""
+        headers = {} if retry_after is None else {"Retry-After": str(retry_after)}
+        body = {"error": {"code": "maxlag", "info": "Waiting for a database server: 6 seconds lagged."}}
+        self.failures.extend([(200, headers, body)] * times)
+
+    def client(self, **kwargs) -> WiktionaryClient:
+        kwargs.setdefault("http", HTTPOptions(rate=None, backoff=0.01, max_retries=2))
+        return WiktionaryClient(**kwargs)
+
+    def respond(self, params: dict[str, str]) -> tuple[int, dict, dict]:
+        """`(status, headers, body)` for a request"""
+        if self.failures:
+            return self.failures.popleft()
+        if params.get("action") == "parse":
+            return 200, {}, self._parse(params)
+        return 200, {}, self._query(params)
+
+    def _parse(self, params: dict[str, str]) -> dict:
+        title = params["page"]
+
+        if title not in self.pages:
+            return {"error": {"code": "missingtitle", "info": "The page you specified doesn't exist."}}
+
+        revid, wikitext = self.pages[title]
+        return {"parse": {"title": title, "revid": revid, "wikitext": {"*": wikitext}, "sections": []}}
+
+    def _query(self, params: dict[str, str]) -> dict:
+        titles = params["titles"].split("|")
+        normalized = [title.replace("_", " ") for title in titles]
+        start = int(params.get("rvcontinue", 0))
+        content = "content" in params["rvprop"]
+        pages = []
+
+        for i, title in enumerate(normalized):
+            if title not in self.pages:
+                pages.append({"title": title, "missing": True})
+                continue
+
+            page = {"title": title}
+            revid, wikitext = self.pages[title]
+
+            if start <= i < start + self.per_response:
+                revision = {"revid": revid}
+                if content:
+                    revision["slots"] = {"main": {"content": wikitext}}
+                page["revisions"] = [revision]
+
+            pages.append(page)
+
+        data = {"query": {"pages": pages}}
+
+        if changed := [{"from": a, "to": b} for a, b in zip(titles, normalized) if a != b]:
+            data["query"]["normalized"] = changed
+        if start + self.per_response < len(titles):
+            data["continue"] = {"rvcontinue": str(start + self.per_response), "continue": "||"}
+
+        return data
+
+
+def _handler(api: StubAPI) -> type[BaseHTTPRequestHandler]:
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):  # pylint: disable=invalid-name
+            params = {key: values[-1] for key, values in parse_qs(urlparse(self.path).query).items()}
+            api.requests.append(params)
+            status, headers, body = api.respond(params)
+            data = json.dumps(body).encode("utf-8")
+
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for key, value in headers.items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *_):
+            pass
+
+    return Handler
+
+
+@pytest.fixture
+def stub_api(monkeypatch):
+    api = StubAPI()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _handler(api))
+    api.url = f"http://127.0.0.1:{server.server_address[1]}/w/api.php"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    monkeypatch.setattr(AsyncWiktionaryClient, "api_url", property(lambda _: api.url))
+
+    yield api
+
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,49 @@
+from wiktionary.api import Revision
+
+
+def _fetch_many(stub_api, words, **kwargs) -> list:
+    client = stub_api.client()
+
+    try:
+        return list(client.fetch_many(words, **kwargs))
+    finally:
+        client.close()
+
+
+def test_fetch_many_in_order(stub_api):
+    stub_api.pages.update({"water": (1, "wet"), "fire": (2, "hot"), "earth": (3, "dry")})
+
+    assert _fetch_many(stub_api, ["fire", "aether", "water", "earth"], batch_size=2) == [
+        ("fire", Revision("fire", 2, "hot")),
+        ("aether", None),
+        ("water", Revision("water", 1, "wet")),
+        ("earth", Revision("earth", 3, "dry")),
+    ]
+    assert sorted(request["titles"] for request in stub_api.requests) == ["fire|aether", "water|earth"]
+
+
+def test_fetch_many_unordered(stub_api):
+    stub_api.pages.update({f"word{i}": (i, f"text {i}") for i in range(10)})
+    words = [f"word{i}" for i in range(10)]
+
+    results = _fetch_many(stub_api, words, batch_size=3, ordered=False)
+
+    assert sorted(results, key=lambda r: int(r[0][4:])) == [(w, Revision(w, i, f"text {i}")) for i, w in enumerate(words)]
+
+
+def test_fetch_many_continue(stub_api):
+    stub_api.pages.update({f"word{i}": (i, f"text {i}") for i in range(5)})
+    stub_api.per_response = 2
+    words = [f"word{i}" for i in range(5)]
+
+    assert _fetch_many(stub_api, words) == [(w, Revision(w, i, f"text {i}")) for i, w in enumerate(words)]
+    assert [request.get("rvcontinue") for request in stub_api.requests] == [None, "2", "4"]
+
+
+def test_fetch_many_normalized_titles(stub_api):
+    stub_api.pages["ice cream"] = (7, "cold")
+
+    assert _fetch_many(stub_api, ["ice_cream", "ice cream"]) == [
+        ("ice_cream", Revision("ice_cream", 7, "cold")),
+        ("ice cream", Revision("ice cream", 7, "cold")),
+    ]
@@ -0,0 +1,85 @@
+import itertools
+import random
+import string
+from types import SimpleNamespace
+
+import pytest
+
+from wiktionary import cache as cache_module
+from wiktionary.api import Revision
+from wiktionary.cache import CacheMissError, WikitextCache
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    # (A clock that ticks on every call, so "least recently used" is never a tie)
+    clock = itertools.count()
+    monkeypatch.setattr(cache_module, "time", SimpleNamespace(time=lambda: next(clock)))
+
+    with WikitextCache(tmp_path / "wikitext.sqlite") as cache:
+        yield cache
+
+
+def test_hit_and_miss(cache):
+    assert cache.get("en", "water") is None
+
+    cache.put("en", "water", 12, "==English==\nwet")
+
+    assert cache.get("en", "water").wikitext == "==English==\nwet"
+    assert cache.get("en", "water", 12).revid == 12
+    assert cache.get("en", "water", 13) is None
+    assert cache.get("de", "water") is None
+    assert (cache.stats.hits, cache.stats.misses, cache.stats.stale) == (2, 3, 1)
+
+
+def test_revalidates_by_revid(stub_api, cache):
+    cache.put("en", "water", 11, "old")
+    stub_api.pages["water"] = (12, "new")
+    client = stub_api.client(cache=cache)
+
+    try:
+        assert client.fetch_wikitext("water") == "new"
+        assert cache.stats.stale == 1
+        assert cache.revid("en", "water") == 12
+
+        # Up to date now, so we only ask for the revision id
+        stub_api.requests.clear()
+        assert client.fetch_wikitext("water") == "new"
+        assert [request["action"] for request in stub_api.requests] == ["query"]
+        assert stub_api.requests[0]["rvprop"] == "ids"
+    finally:
+        client.close()
+
+
+def test_offline(stub_api, cache):
+    cache.put("en", "water", 12, "wet")
+    client = stub_api.client(cache=cache, offline=True)
+
+    try:
+        assert client.fetch_wikitext("water") == "wet"
+
+        with pytest.raises(CacheMissError):
+            client.fetch_wikitext("fire")
+
+        assert list(client.fetch_many(["fire", "water"])) == [("fire", None), ("water", Revision("water", 12, "wet"))]
+        assert stub_api.requests == []
+    finally:
+        client.close()
+
+
+def test_evicts_least_recently_used(cache):
+    rng = random.Random(0)
+    pages = {title: "".join(rng.choices(string.ascii_letters, k=2_000)) for title in "abcd"}
+
+    cache.put("en", "a", 1, pages["a"])
+    cache.max_bytes = 3 * cache.size + cache.size // 2
+
+    cache.put("en", "b", 1, pages["b"])
+    cache.put("en", "c", 1, pages["c"])
+    cache.get("en", "a")
+    cache.put("en", "d", 1, pages["d"])
+
+    assert cache.stats.evictions == 1
+    assert cache.revid("en", "b") is None
+    assert [title for title, _ in cache.iter_pages("en")] == ["a", "c", "d"]
+    assert cache.size <= cache.max_bytes
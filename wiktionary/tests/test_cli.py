@@ -0,0 +1,74 @@
+import json
+
+import pytest
+from typer.testing import CliRunner
+
+from wiktionary.api import WiktionaryClient
+from wiktionary.cache import WikitextCache
+from wiktionary.cli import app
+from wiktionary.en.parser import EnParser
+from wiktionary.translations import TranslationIndex, build_translation_index
+from wiktionary.utils import ParsedPage, get_entry
+
+WATER = "==English==\n===Noun===\n{{en-noun|-}}\n\n# A clear liquid.\n\n====Translations====\n{{trans-top|liquid}}\n* German: {{t+|de|Wasser|n}}\n{{trans-bottom}}\n"
+
+runner = CliRunner()
+
+
+@pytest.fixture
+def closed(monkeypatch):
+    """The classes whose `close` was called (and how often)"""
+    calls = []
+
+    for cls in (WiktionaryClient, WikitextCache):
+        def close(self, cls=cls, close=cls.close):
+            calls.append(cls.__name__)
+            close(self)
+        monkeypatch.setattr(cls, "close", close)
+
+    return calls
+
+
+def test_entry_closes_the_client(tmp_path, closed):
+    cache_path = tmp_path / "wikitext.sqlite"
+    with WikitextCache(cache_path) as cache:
+        cache.put("en", "water", 12, WATER)
+    closed.clear()
+
+    result = runner.invoke(app, ["entry", "water", "en", "--offline", "--cache-path", str(cache_path)])
+
+    assert result.exit_code == 0, result.output
+    assert json.loads(result.stdout)[0]["word"] == "water"
+    assert sorted(closed) == ["WikitextCache", "WiktionaryClient"]
+
+
+def test_translations_delta_without_shards(tmp_path):
+    index = tmp_path / "translations.index"
+    parsed = ParsedPage(get_entry(WATER, "en"))
+    assert build_translation_index(EnParser.parse("water", parsed.entry_sections("en"), "en", page=parsed), index) == 1
+    delta = tmp_path / "delta.jsonl"
+    delta.write_text(json.dumps({"op": "delete", "word": "water", "lang": "en"}) + "\n")
+
+    result = runner.invoke(app, ["translations", str(index), "--delta", str(delta)])
+
+    assert result.exit_code == 0, result.output
+    with TranslationIndex(index) as translations:
+        assert len(translations) == 0
+
+
+def test_translations_needs_a_path(tmp_path):
+    result = runner.invoke(app, ["translations", str(tmp_path)])
+
+    assert result.exit_code == 2
+
+
+def test_entry_without_cache(closed, monkeypatch, tmp_path):
+    # (No cache unless asked for, so nothing is written to ~/.cache)
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    monkeypatch.setattr(WiktionaryClient, "fetch_entry", lambda *_: [])
+
+    result = runner.invoke(app, ["entry", "water", "en"])
+
+    assert result.exit_code == 0, result.output
+    assert closed == ["WiktionaryClient"]
+    assert not list(tmp_path.iterdir())
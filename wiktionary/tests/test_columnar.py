@@ -0,0 +1,90 @@
+import pytest
+
+from wiktionary.columnar import TABLES, EntryFlattener, export_entries, row_id
+from wiktionary.en.parser import EnParser
+from wiktionary.utils import ParsedPage, get_entry
+
+PAGE = (
+    "==English==\n===Pronunciation===\n* {{a|UK}} {{IPA|en|/ˈwɔːtə/|[ˈwɔːʔə]}}\n\n"
+    "===Noun===\n{{en-noun}}\n\n# A clear liquid.\n# {{lb|en|chemistry}} H2O. {{syn|en|aqua}}\n\n"
+    "===Verb===\n{{en-verb}}\n\n# To pour water on.\n\n====Synonyms====\n* {{l|en|irrigate}}\n"
+)
+
+
+def _entries(word: str = "water", page: str = PAGE):
+    parsed = ParsedPage(get_entry(page, "en"))
+    return EnParser.parse(word, parsed.entry_sections("en"), "en", page=parsed)
+
+
+def _rows(entries) -> list:
+    flattener = EntryFlattener()
+    return [row for entry in entries for row in flattener.rows(entry)]
+
+
+def test_row_id():
+    assert row_id("water", "en", "NOUN", 0) == row_id("water", "en", "NOUN", 0)
+    assert row_id("water", "en", "NOUN", 0) != row_id("water", "en", "NOUN", 1)
+    # (Not just the parts glued together)
+    assert row_id("ab", "c") != row_id("a", "bc")
+    assert len(row_id("water")) == 20
+
+
+def test_rows():
+    rows = _rows(_entries())
+    definitions = [row for table, row in rows if table == "definitions"]
+    triples = [row for table, row in rows if table == "definition_triples"]
+
+    assert [table for table, _ in rows].count("entries") == 1
+    assert [(d["partOfSpeech"], d["rank"], d["text"]) for d in definitions] == [
+        ("NOUN", 0, "A clear liquid."), ("NOUN", 1, "H2O."), ("VERB", 0, "To pour water on."),
+    ]
+    assert [d["id"] for d in definitions] == [
+        row_id("water", "en", "NOUN", 0), row_id("water", "en", "NOUN", 1), row_id("water", "en", "VERB", 0),
+    ]
+    # (On a definition's line, its subject is the definition; in a section, the word)
+    assert [(t.get("subjectId"), t["section"], t["predicate"], t["objectWord"]) for t in triples] == [
+        (definitions[1]["id"], None, "synonymOf", "aqua"), (None, "synonyms", "synonymOf", "irrigate"),
+    ]
+    assert [(p["broad"], p["narrow"], p["description"]) for table, p in rows if table == "pronunciations"] == [
+        ("/ˈwɔːtə/", None, "UK"), (None, "[ˈwɔːʔə]", "UK"),
+    ]
+
+
+def test_rows_are_deterministic():
+    # (And the same for entries & their `to_dict()`s)
+    assert _rows(_entries()) == _rows(_entries()) == _rows([e.to_dict() for e in _entries()])
+
+
+def test_etymologies():
+    page = (
+        "==English==\n===Etymology 1===\nOne.\n\n====Noun====\n{{en-noun}}\n\n# A.\n\n"
+        "===Etymology 2===\nTwo.\n\n====Noun====\n{{en-noun}}\n\n# B.\n"
+    )
+    rows = _rows(_entries("bank", page))
+
+    assert [row["etymology"] for table, row in rows if table == "entries"] == [0, 1]
+    # (Ranks count up across a word's etymologies, so ids don't clash)
+    assert [row["rank"] for table, row in rows if table == "definitions"] == [0, 1]
+
+
+def test_parquet(tmp_path):
+    pa = pytest.importorskip("pyarrow")
+    pq = pytest.importorskip("pyarrow.parquet")
+
+    entries = [e.to_dict() for e in _entries()] + [
+        {**e.to_dict(), "word": f"water{i}"} for i in range(3) for e in _entries()
+    ]
+    stats = export_entries(entries, tmp_path, row_group_size=5)
+
+    definitions = pq.read_table(tmp_path / "definitions.parquet")
+    assert stats.definitions == definitions.num_rows == 12
+    assert pq.ParquetFile(tmp_path / "definitions.parquet").metadata.num_row_groups == 3
+    assert definitions.schema.names == list(TABLES["definitions"])
+    # (Low-cardinality columns are dictionary-encoded, so they load as categoricals)
+    assert pa.types.is_dictionary(definitions.schema.field("partOfSpeech").type)
+    assert definitions.column("partOfSpeech").to_pylist()[:3] == ["NOUN", "NOUN", "VERB"]
+    assert pq.read_table(tmp_path / "definition_triples.parquet").column("inverse").to_pylist() == [False] * 8
+
+    # (The same export gives the same ids)
+    export_entries(entries, tmp_path / "again", row_group_size=5)
+    assert pq.read_table(tmp_path / "again" / "definitions.parquet").column("id") == definitions.column("id")
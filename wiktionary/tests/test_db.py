@@ -0,0 +1,108 @@
+import json
+import sqlite3
+
+import pytest
+
+from wiktionary.db import create_indexes, create_tables, load_entries, resolve_triples
+from wiktionary.pipeline import parse_page
+
+PAGES = {
+    "water": (
+        "==English==\n===Noun===\n{{en-noun}}\n\n# A clear liquid.\n# A body of water.\n\n"
+        "====Synonyms====\n* {{l|en|aqua}}\n\n===Verb===\n{{en-verb}}\n\n# To pour water on.\n"
+    ),
+    "aqua": "==English==\n===Noun===\n{{en-noun}}\n\n# Water.\n\n====Synonyms====\n* {{l|en|water}}\n",
+    "fire": (
+        "==English==\n===Etymology 1===\nFrom Old English.\n\n====Noun====\n{{en-noun}}\n\n# A flame.\n\n"
+        "===Etymology 2===\nFrom elsewhere.\n\n====Verb====\n{{en-verb}}\n\n# To shoot.\n# To dismiss.\n"
+    ),
+}
+
+
+def _entries(*titles: str) -> list[dict]:
+    return [json.loads(line) for title in titles for line in parse_page(title, PAGES[title], "en")]
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(":memory:")
+    create_tables(conn)
+
+    yield conn
+
+    conn.close()
+
+
+def _rows(conn, table: str) -> list[tuple]:
+    # (Without the timestamps)
+    columns = [c[1] for c in conn.execute(f"PRAGMA table_info(`{table}`)") if not c[1].endswith("At")]
+    names = ", ".join(f"`{c}`" for c in columns)
+    return sorted(conn.execute(f"SELECT {names} FROM `{table}`").fetchall())
+
+
+def test_unique_definitions(conn):
+    stats = load_entries(conn, _entries("water", "aqua", "fire"), batch_size=1)
+    create_indexes(conn)
+
+    assert (stats.words, stats.definitions) == (3, 7)
+    keys = conn.execute("SELECT `word`, `language`, `partOfSpeech`, `rank` FROM `Definition`").fetchall()
+    assert len(keys) == len(set(keys)) == 7
+    # "fire" has a verb sense under each etymology: ranks keep counting across them
+    assert conn.execute(
+        "SELECT `rank` FROM `Definition` WHERE `word` = 'fire' AND `partOfSpeech` = 'VERB' ORDER BY `rank`"
+    ).fetchall() == [(0,), (1,)]
+
+    with pytest.raises(sqlite3.IntegrityError):
+        conn.execute(
+            "INSERT INTO `Definition` (`id`, `word`, `language`, `partOfSpeech`, `rank`, `updatedAt`) "
+            "VALUES ('other', 'water', 'en', 'NOUN', 0, '2022-10-18')"
+        )
+
+
+def test_resumes_after_an_interrupted_load(conn):
+    entries = _entries("water", "aqua", "fire")
+
+    def interrupted():
+        yield from entries[:3]
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        load_entries(conn, interrupted(), batch_size=1)
+
+    # Only whole words are committed (the first half of "fire" isn't)
+    assert conn.execute("SELECT `position` FROM `_LoadCheckpoint`").fetchall() == [(2,)]
+    assert [word for word, *_ in _rows(conn, "Entry")] == ["aqua", "water"]
+
+    stats = load_entries(conn, entries, batch_size=1)
+
+    assert (stats.entries, stats.resumed, stats.words) == (4, 2, 1)
+
+    fresh = sqlite3.connect(":memory:")
+    create_tables(fresh)
+    load_entries(fresh, entries, batch_size=1)
+
+    for table in ("Entry", "Definition", "_PendingTriple", "_LoadCheckpoint"):
+        assert _rows(conn, table) == _rows(fresh, table)
+
+
+def test_resolve_triples(conn):
+    load_entries(conn, _entries("water"), source="water")
+
+    # "aqua" isn't loaded yet, so the synonym waits
+    assert resolve_triples(conn) == 0
+    assert len(_rows(conn, "_PendingTriple")) == 1
+
+    load_entries(conn, _entries("aqua"), source="aqua")
+    water, aqua = (
+        conn.execute(f"SELECT `id` FROM `Definition` WHERE `word` = '{word}' AND `partOfSpeech` = 'NOUN' AND `rank` = 0")
+        .fetchone()[0] for word in ("water", "aqua")
+    )
+
+    assert resolve_triples(conn) == 2
+    assert _rows(conn, "DefinitionTriple") == sorted([(water, aqua, "SYNONYM", None), (aqua, water, "SYNONYM", None)])
+    assert resolve_triples(conn) == 0
+
+
+def test_unknown_language(conn):
+    with pytest.raises(ValueError, match="Language"):
+        load_entries(conn, [{"word": "wasser", "lang": "nds"}])
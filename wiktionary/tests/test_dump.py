@@ -0,0 +1,102 @@
+import bz2
+import io
+import xml.etree.ElementTree as ET
+
+from wiktionary import dump as dump_module
+from wiktionary.dump import has_entry, iter_dump_pages, iter_dump_revisions, parse_dump
+
+WATER = "==English==\n===Noun===\n{{en-noun}}\n\n# A clear liquid.\n"
+
+
+def _page(title: str, text: str, ns: int = 0, revid: int = 100, redirect: bool = False) -> str:
+    return f"""
+  <page>
+    <title>{title}</title>
+    <ns>{ns}</ns>
+    <id>{revid - 99}</id>{'<redirect title="water" />' if redirect else ''}
+    <revision>
+      <id>{revid}</id>
+      <parentid>{revid - 1}</parentid>
+      <contributor><username>Someone</username><id>42</id></contributor>
+      <text bytes="{len(text)}" xml:space="preserve">{text}</text>
+    </revision>
+  </page>"""
+
+
+def _dump(*pages: str) -> bytes:
+    return (
+        '<mediawiki xmlns="http://www.mediawiki.org/xml/export-0.10/" version="0.10">\n'
+        "  <siteinfo><sitename>Wiktionary</sitename></siteinfo>"
+        + "".join(pages) + "\n</mediawiki>\n"
+    ).encode("utf-8")
+
+
+DUMP = _dump(
+    _page("water", WATER, revid=100),
+    _page("Template:en-noun", "{{{1}}}", ns=10, revid=200),
+    _page("waters", "#REDIRECT [[water]]", revid=300, redirect=True),
+    _page("Wasser", "==German==\n===Noun===\n# Wasser.\n", revid=400),
+    _page("empty", "", revid=500),
+)
+
+
+def test_iter_dump_revisions():
+    # (Not the page's or the contributor's `<id>`, and no templates or redirects)
+    assert list(iter_dump_revisions(io.BytesIO(DUMP))) == [
+        ("water", 100, WATER), ("Wasser", 400, "==German==\n===Noun===\n# Wasser.\n"), ("empty", 500, ""),
+    ]
+    assert [title for title, _, _ in iter_dump_revisions(io.BytesIO(DUMP), namespaces=(10,))] == ["Template:en-noun"]
+
+
+def test_iter_dump_pages(tmp_path):
+    path = tmp_path / "dump.xml.bz2"
+    path.write_bytes(bz2.compress(DUMP))
+    plain = tmp_path / "dump.xml"
+    plain.write_bytes(DUMP)
+
+    assert list(iter_dump_pages(str(path))) == list(iter_dump_pages(str(plain))) == [
+        (title, text) for title, _, text in iter_dump_revisions(io.BytesIO(DUMP))
+    ]
+
+
+class _Trickle(io.BytesIO):
+    """A file that's read a few bytes at a time (so `iterparse` can't parse far ahead)"""
+
+    def read(self, size=-1):
+        return super().read(64)
+
+
+def test_clears_pages(monkeypatch):
+    roots = []
+
+    def iterparse(*args, **kwargs):
+        context = ET.iterparse(*args, **kwargs)
+        for event, elem in context:
+            if not roots:
+                roots.append(elem)
+            yield event, elem
+
+    monkeypatch.setattr(dump_module, "iterparse", iterparse)
+    dump = _Trickle(_dump(*(_page(f"word{i}", WATER, revid=100 + i) for i in range(50))))
+    sizes = []
+
+    for _ in iter_dump_revisions(dump):
+        sizes.append(len(roots[0]))
+
+    # (Only `<siteinfo>` and the pages read since the last one was done hang off the root, not all 50)
+    assert len(sizes) == 50
+    assert max(sizes) <= 3
+    assert len(roots[0]) == 0
+
+
+def test_has_entry():
+    assert has_entry(WATER, "en")
+    assert has_entry("==  English ==\n", "en")
+    assert not has_entry("==German==\n", "en")
+    assert not has_entry("===English===\n", "en")
+
+
+def test_parse_dump():
+    assert [(title, len(entries)) for title, entries in parse_dump(io.BytesIO(DUMP), "en", progress=False)] == [
+        ("water", 1),
+    ]
@@ -0,0 +1,103 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from wiktionary.graph import GraphBuilder, RelationGraph, _csr  # noqa: E402
+
+WATER = (
+    "==English==\n===Etymology===\nFrom {{inh|en|enm|water}}, from {{der|en|ang|wæter}}.\n\n"
+    "===Noun===\n{{en-noun}}\n\n# A clear liquid. {{syn|en|aqua}}\n\n"
+    "====Hyponyms====\n* {{l|en|seawater}}\n\n====Related terms====\n* {{l|en|wet}}\n"
+)
+
+
+@pytest.fixture
+def graph() -> RelationGraph:
+    builder = GraphBuilder()
+    builder.add_entry("water", "en", WATER)
+    # (A chain: water - aqua - aquarium - fish)
+    builder.add("synonymOf", ("en", "aqua"), ("en", "aquarium"))
+    builder.add("seeAlso", ("en", "fish"), ("en", "aquarium"))
+    builder.add("derivativeOf", ("ang", "wæter"), ("gem-pro", "*watōr"))
+    # (Twice: only kept once)
+    builder.add("synonymOf", ("en", "aqua"), ("en", "aquarium"))
+    builder.add("synonymOf", ("fr", "eau"), ("fr", "flotte"))
+    return builder.build()
+
+
+def test_csr():
+    sources = np.array([2, 0, 2, 1], dtype=np.uint32)
+    targets = np.array([0, 1, 1, 2], dtype=np.uint32)
+    relations = np.array([5, 6, 7, 8], dtype=np.uint8)
+
+    csr = _csr(4, sources, targets, relations)
+
+    assert csr["indptr"].tolist() == [0, 1, 2, 4, 4]
+    # (Grouped by source, in the order they were added)
+    assert csr["indices"].tolist() == [1, 2, 0, 1]
+    assert csr["relations"].tolist() == [6, 8, 5, 7]
+
+
+def test_build(graph):
+    # (Sorted by language, then word)
+    assert [graph.node(i) for i in range(len(graph))] == [
+        ("ang", "wæter"), ("en", "aqua"), ("en", "aquarium"), ("en", "fish"), ("en", "seawater"),
+        ("en", "water"), ("en", "wet"), ("fr", "eau"), ("fr", "flotte"), ("gem-pro", "*watōr"),
+    ]
+    assert graph.edges == 8
+    assert ("water", "en") in graph and ("water", "de") not in graph
+
+    with pytest.raises(KeyError):
+        graph.id("water", "de")
+
+
+def test_neighbors(graph):
+    assert graph.neighbors("water", "en") == [
+        ("derivativeOf", "ang", "wæter"), ("synonymOf", "en", "aqua"), ("seeAlso", "en", "wet"),
+    ]
+    assert graph.neighbors("water", "en", ["synonymOf"]) == [("synonymOf", "en", "aqua")]
+    # (A hyponym points at its hypernym)
+    assert graph.neighbors("water", "en", incoming=True) == [("hyponymOf", "en", "seawater")]
+    assert graph.neighbors("aqua", "en", ["notARelation"]) == []
+
+
+def test_expand(graph):
+    assert graph.expand("water", "en", hops=2) == {
+        ("en", "water"): 0, ("ang", "wæter"): 1, ("en", "aqua"): 1, ("en", "wet"): 1,
+        ("gem-pro", "*watōr"): 2, ("en", "aquarium"): 2,
+    }
+    assert graph.expand("aquarium", "en", incoming=True) == {
+        ("en", "aquarium"): 0, ("en", "aqua"): 1, ("en", "fish"): 1,
+    }
+
+
+def test_shortest_path(graph):
+    # (Following edges either way)
+    assert graph.shortest_path(("water", "en"), ("fish", "en")) == [
+        ("en", "water"), ("en", "aqua"), ("en", "aquarium"), ("en", "fish"),
+    ]
+    assert graph.shortest_path(("fish", "en"), ("seawater", "en")) == [
+        ("en", "fish"), ("en", "aquarium"), ("en", "aqua"), ("en", "water"), ("en", "seawater"),
+    ]
+    assert graph.shortest_path(("water", "en"), ("water", "en")) == [("en", "water")]
+    assert graph.shortest_path(("water", "en"), ("fish", "en"), max_hops=2) is None
+    assert graph.shortest_path(("water", "en"), ("fish", "en"), relations=["synonymOf"]) is None
+    assert graph.shortest_path(("water", "en"), ("eau", "fr")) is None
+
+
+def test_ancestry(graph):
+    assert graph.ancestry("water", "en") == [
+        ("derivativeOf", "ang", "wæter"), ("derivativeOf", "gem-pro", "*watōr"),
+    ]
+    assert graph.ancestry("water", "en", max_depth=1) == [("derivativeOf", "ang", "wæter")]
+
+
+def test_save_and_load(graph, tmp_path):
+    graph.save(tmp_path / "graph")
+    loaded = RelationGraph.load(tmp_path / "graph")
+
+    assert len(loaded) == len(graph) and loaded.edges == graph.edges
+    assert loaded.neighbors("water", "en") == graph.neighbors("water", "en")
+    assert loaded.shortest_path(("water", "en"), ("fish", "en")) == [
+        ("en", "water"), ("en", "aqua"), ("en", "aquarium"), ("en", "fish"),
+    ]
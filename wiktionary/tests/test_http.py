@@ -0,0 +1,66 @@
+import time
+
+import pytest
+import requests
+
+from wiktionary.http import APIError, HTTPOptions
+
+
+@pytest.fixture
+def client(stub_api):
+    stub_api.pages["water"] = (12, "wet")
+    client = stub_api.client()
+
+    yield client
+
+    client.close()
+
+
+@pytest.mark.parametrize("status", [429, 503])
+def test_retries_when_overloaded(stub_api, client, status):
+    stub_api.fail(times=2, status=status)
+
+    assert client.fetch_revid("water") == 12
+    assert (client.stats.requests, client.stats.retries, client.stats.errors) == (3, 2, 2)
+
+
+def test_retries_when_lagged(stub_api, client):
+    stub_api.lag()
+
+    assert client.fetch_revid("water") == 12
+    assert client.stats.retries == 1
+    assert all(request["maxlag"] == "5" for request in stub_api.requests)
+
+
+def test_waits_as_long_as_asked(stub_api, client):
+    stub_api.fail(status=429, retry_after=0.3)
+    start = time.monotonic()
+
+    assert client.fetch_revid("water") == 12
+    assert time.monotonic() - start >= 0.3
+
+
+def test_gives_up(stub_api, client):
+    stub_api.fail(times=3, status=429)
+
+    with pytest.raises(requests.HTTPError):
+        client.fetch_revid("water")
+
+    stub_api.lag(times=3)
+
+    with pytest.raises(APIError, match="lagged"):
+        client.fetch_revid("water")
+
+
+def test_fetch_many_retries(stub_api):
+    stub_api.pages.update({"water": (1, "wet"), "fire": (2, "hot")})
+    stub_api.fail(status=429)
+    stub_api.lag()
+    client = stub_api.client(http=HTTPOptions(rate=None, backoff=0.01, max_retries=2, max_concurrency=1))
+
+    try:
+        assert [(word, revision.revid) for word, revision in client.fetch_many(["water", "fire"], batch_size=1)] == [
+            ("water", 1), ("fire", 2)
+        ]
+    finally:
+        client.close()
@@ -0,0 +1,25 @@
+import pytest
+
+from wiktionary.incremental import Change, read_changes
+
+
+def test_read_changes(tmp_path):
+    path = tmp_path / "changes.jsonl"
+    path.write_text(
+        'water\n'
+        '\n'
+        '{"title": "chat", "revid": 12, "type": "edit", "ns": 0}\n'
+        '{"title": "bar", "deleted": true}\n',
+        encoding="utf-8",
+    )
+
+    assert list(read_changes(path)) == [Change("water"), Change("chat", 12), Change("bar", deleted=True)]
+
+
+@pytest.mark.parametrize("line", ['{"revid": 12}', '{"title": "chat"', '{"title": 12}'])
+def test_read_changes_invalid(tmp_path, line):
+    path = tmp_path / "changes.jsonl"
+    path.write_text(f"water\n{line}\n", encoding="utf-8")
+
+    with pytest.raises(ValueError, match="line 2"):
+        list(read_changes(path))
@@ -0,0 +1,53 @@
+import pytest
+
+from wiktionary import local
+from wiktionary.en.parser import AltForm, EnEntry
+from wiktionary.local import LocalDictionary, build_local_dictionary
+from wiktionary.utils import EntryNotFoundError
+
+ENTRIES = [
+    EnEntry("water", "en", [AltForm({"@id": "link", "word": "watter"}, {})], etymology={"text": "From Old English"}),
+    EnEntry("water", "en", [], definitions={"verb": {"text": "To pour water on"}}),
+    EnEntry("wasser", "de", [], pronunciations=[{"ipa": "/ˈvasɐ/"}]),
+]
+
+
+def _formats():
+    for serializer in local.SERIALIZERS:
+        for codec in local.CODECS:
+            marks = []
+            if serializer == "msgpack" and local.msgpack is None:
+                marks.append(pytest.mark.skip("msgpack isn't installed"))
+            if codec == "zstd" and local.zstandard is None:
+                marks.append(pytest.mark.skip("zstandard isn't installed"))
+
+            yield pytest.param(serializer, codec, id=f"{serializer}-{codec}", marks=marks)
+
+
+@pytest.mark.parametrize("serializer,codec", list(_formats()))
+def test_round_trip(tmp_path, serializer, codec):
+    path = tmp_path / "en.dictionary"
+    stats = build_local_dictionary(ENTRIES, path, serializer=serializer, codec=codec)
+
+    assert (stats.words, stats.entries) == (2, 3)
+
+    with LocalDictionary(path) as dictionary:
+        assert len(dictionary) == 2
+        assert dictionary.get("water", "en") == ENTRIES[:2]
+        assert dictionary.get_dicts("wasser", "de") == [ENTRIES[2].to_dict()]
+        assert ("water", "de") not in dictionary
+
+        with pytest.raises(EntryNotFoundError):
+            dictionary.get("water", "de")
+
+
+def test_no_silent_fallback(tmp_path, monkeypatch):
+    monkeypatch.setattr(local, "msgpack", None)
+    monkeypatch.setattr(local, "zstandard", None)
+
+    with pytest.raises(ImportError, match='serializer="json"'):
+        build_local_dictionary(ENTRIES, tmp_path / "en.dictionary", codec="zlib")
+    with pytest.raises(ImportError, match='codec="zlib"'):
+        build_local_dictionary(ENTRIES, tmp_path / "en.dictionary", serializer="json")
+    with pytest.raises(ValueError, match="Unknown codec"):
+        build_local_dictionary(ENTRIES, tmp_path / "en.dictionary", serializer="json", codec="gzip")
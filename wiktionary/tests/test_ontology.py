@@ -0,0 +1,34 @@
+from pathlib import Path
+
+import pytest
+
+from wiktionary.ontology import ONTOLOGY_DIR, get_context, get_language_ontology, get_predicate
+
+
+def test_ships_with_the_package():
+    assert ONTOLOGY_DIR.joinpath("wiktionary.json").is_file()
+    assert ONTOLOGY_DIR.joinpath("language.json").is_file()
+
+
+def test_predicates():
+    assert get_predicate("synonymOf") == "https://opendictionary.org/synonymOf"
+
+    with pytest.raises(ValueError, match="Unknown term"):
+        get_predicate("notATerm")
+
+
+def test_read_only():
+    with pytest.raises(TypeError):
+        get_language_ontology()["synonymOf"] = {}
+
+    assert get_context()["od"] == "https://opendictionary.org/"
+
+
+def test_copies_are_in_sync():
+    # (The package ships copies of /ontology, which is the source of truth)
+    source = Path(__file__).parents[2] / "ontology"
+    if not source.is_dir():
+        pytest.skip("no /ontology next to the package")
+
+    for name in ("wiktionary.json", "language.json"):
+        assert ONTOLOGY_DIR.joinpath(name).read_bytes() == (source / name).read_bytes(), name
@@ -0,0 +1,75 @@
+import json
+import multiprocessing
+
+import pytest
+
+from wiktionary import pipeline
+from wiktionary.pipeline import PipelineOptions, ShardWriter, iter_shards, parse_page, run_pipeline
+
+
+def _page(i: int) -> tuple[str, str]:
+    return f"word{i}", f"==English==\n===Noun===\n{{{{en-noun}}}}\n\n# Definition {i}.\n"
+
+
+def test_parse_page():
+    lines = parse_page(*_page(1), "en")
+
+    assert [json.loads(line)["word"] for line in lines] == ["word1"]
+
+
+def test_ordered_shards(tmp_path):
+    # (Pages without an English entry are skipped)
+    pages = [_page(i) if i % 5 else (f"Wort{i}", "==German==\n# Wort.\n") for i in range(1, 31)]
+    opts = PipelineOptions(workers=3, chunk_size=2, shard_size=7)
+
+    stats = run_pipeline(pages, "en", tmp_path, opts, progress=False)
+
+    words = [f"word{i}" for i in range(1, 31) if i % 5]
+    assert (stats.pages, stats.entries, stats.errors) == (24, 24, 0)
+    assert [path.name for path in stats.shards] == [f"part-{i:05d}.jsonl" for i in range(4)]
+    assert [len(path.read_text().splitlines()) for path in stats.shards] == [7, 7, 7, 3]
+    # (In the order they were read, no matter which worker finished first)
+    assert [entry["word"] for entry in iter_shards(tmp_path)] == words
+
+
+def test_backpressure(tmp_path, monkeypatch):
+    # (Pages read, and entries written, so far; one entry per page)
+    counts = {"read": 0, "written": 0}
+    ahead = []
+
+    def pages():
+        for i in range(40):
+            counts["read"] += 1
+            yield _page(i)
+
+    def write(self, lines, write=ShardWriter.write):
+        ahead.append(counts["read"] - counts["written"])
+        counts["written"] += len(lines)
+        write(self, lines)
+
+    monkeypatch.setattr(ShardWriter, "write", write)
+    opts = PipelineOptions(workers=2, chunk_size=3, max_pending=2)
+
+    run_pipeline(pages(), "en", tmp_path, opts, progress=False)
+
+    # (The reader is at most `max_pending` chunks, plus the one it just read, ahead of the writer)
+    assert max(ahead) <= (2 + 1) * 3
+    assert counts["written"] == 40
+
+
+@pytest.mark.skipif(multiprocessing.get_start_method() != "fork", reason="workers only see the patch when forked")
+def test_errors(tmp_path, monkeypatch):
+    def parse_page(title, page, lang):
+        if title in ("word3", "word8"):
+            raise ValueError(title)
+        return original(title, page, lang)
+
+    original = pipeline.parse_page
+    monkeypatch.setattr(pipeline, "parse_page", parse_page)
+
+    opts = PipelineOptions(workers=2, chunk_size=3)
+
+    stats = run_pipeline([_page(i) for i in range(10)], "en", tmp_path, opts, progress=False)
+
+    assert (stats.pages, stats.entries, stats.errors) == (10, 8, 2)
+    assert [entry["word"] for entry in iter_shards(tmp_path)] == [f"word{i}" for i in range(10) if i not in (3, 8)]
@@ -0,0 +1,80 @@
+import json
+
+from wiktionary import profiler as profiler_module
+from wiktionary.en.parser import EnParser
+from wiktionary.profiler import Profiler, count, profile_pages, profiling
+
+PAGE = (
+    "==English==\n===Noun===\n{{en-noun}}\n\n# A clear liquid. {{syn|en|aqua}} {{made-up-template|x}}\n\n"
+    "====Synonyms====\n* {{l|en|aqua}}\n\n====Weird section====\nfoo\n"
+)
+
+
+def test_profile_pages():
+    profiler = profile_pages([("water", PAGE), ("Wasser", "==German==\n# Wasser.\n")], "en")
+
+    # (Only pages with an entry)
+    assert profiler.counts["pages"] == {"parse": 1}
+    assert profiler.counts["templates"] == {"en-noun": 1, "syn": 1, "made-up-template": 1, "l": 1}
+    assert profiler.counts["unmapped templates"] == {"en-noun": 1, "made-up-template": 1}
+    assert profiler.counts["template mappings"] == {"synonyms": 1, "link": 1}
+    assert profiler.counts["sections"] == {"Noun": 1}
+    assert profiler.counts["unhandled definition sections"] == {"Weird section": 1}
+    assert set(profiler.seconds) == {"pages", "section handlers", "template mappings"}
+    assert all(seconds > 0 for seconds in profiler.seconds["template mappings"].values())
+    assert profiler_module.active is None
+
+
+def test_errors(monkeypatch):
+    def parse(word, *args, **kwargs):
+        if word == "broken":
+            raise ValueError(word)
+        return parse.original(word, *args, **kwargs)
+
+    parse.original = EnParser.parse
+    monkeypatch.setattr(EnParser, "parse", parse)
+
+    profiler = profile_pages([("broken", PAGE), ("water", PAGE)], "en")
+
+    assert profiler.counts["errors"] == {"broken": 1}
+    # (Both are timed, but only the parsed page's templates are counted)
+    assert profiler.counts["pages"] == {"parse": 2}
+    assert profiler.counts["templates"]["syn"] == 1
+
+
+def test_only_while_active():
+    count("templates", "syn")
+
+    with profiling() as outer:
+        count("templates", "syn")
+
+        with profiling() as inner:
+            count("templates", "l", 2)
+
+        count("templates", "syn")
+
+    count("templates", "syn")
+
+    assert outer.counts["templates"] == {"syn": 2}
+    assert inner.counts["templates"] == {"l": 2}
+    assert profiler_module.active is None
+
+
+def test_ranked_and_merge():
+    profiler, other = Profiler(), Profiler()
+    profiler.add_time("section handlers", "definitions", 0.5)
+    profiler.add_time("section handlers", "pronunciation", 0.1)
+    other.add_time("section handlers", "pronunciation", 1.0)
+    other.count("templates", "syn", 3)
+
+    profiler.merge(other)
+
+    # (By time spent, not calls)
+    assert profiler.ranked("section handlers") == [("pronunciation", 2, 1.1), ("definitions", 1, 0.5)]
+    assert profiler.ranked("templates") == [("syn", 3, 0.)]
+    assert profiler.ranked("section handlers", 1) == [("pronunciation", 2, 1.1)]
+
+    report = profiler.report()
+    assert "## section handlers (2 distinct, 3 total)" in report
+    assert "## templates (1 distinct, 3 total)" in report
+    assert json.loads(profiler.to_json())["counts"]["templates"] == {"syn": 3}
@@ -0,0 +1,82 @@
+import io
+
+import pytest
+
+from wiktionary.rdf import (
+    DC_SOURCE, RDF_TYPE, RDFS_LABEL, RDFS_SEE_ALSO, TRUE, Relation, export_triples, format_triples, literal,
+    page_iri, page_triples, template_relations, word_iri,
+)
+
+OD = "https://opendictionary.org/"
+
+PAGE = (
+    "==English==\n===Etymology===\n{{onomatopoeic|en}}.\n\n===Noun===\n{{en-noun}}\n\n# A clear liquid.\n\n"
+    "====Synonyms====\n* {{syn|en|aqua}}\n\n====Hyponyms====\n* {{l|en|seawater}}\n\n"
+    "====Related terms====\n* {{l|en|wet}}\n"
+)
+
+
+def test_page_triples():
+    water, aqua, seawater, wet = (word_iri("en", word) for word in ("water", "aqua", "seawater", "wet"))
+
+    assert page_triples("water", PAGE, "en") == [
+        (water, RDF_TYPE, f"<{OD}Word>"),
+        (water, RDFS_LABEL, '"water"@en'),
+        (water, DC_SOURCE, "<https://en.wiktionary.org/wiki/water>"),
+        (water, f"<{OD}isOnomatopoeia>", TRUE),
+        (water, f"<{OD}synonymOf>", aqua),
+        # (Inverse: a hyponym of "water" is `hyponymOf` it)
+        (seawater, f"<{OD}hyponymOf>", water),
+        # ("Related terms" don't say how)
+        (water, RDFS_SEE_ALSO, wet),
+    ]
+    assert page_triples("water", PAGE, "de") == []
+
+
+@pytest.mark.parametrize("template,section,relations", [
+    ({"@id": "synonyms", "lang": "en", "synonyms": [{"synonym": "aqua"}, {"synonym": "H2O"}]}, None,
+     [(Relation("synonymOf"), "en", "aqua"), (Relation("synonymOf"), "en", "H2O")]),
+    ({"@id": "hypernyms", "lang": "en", "synonyms": [{"synonym": "liquid"}]}, None,
+     [(Relation("hypernymOf", inverse=True), "en", "liquid")]),
+    ({"@id": "borrowed", "lang": "en", "srcLang": "fr", "src": "rendezvous"}, None,
+     [(Relation("borrowingOf"), "fr", "rendezvous")]),
+    ({"@id": "link", "lang": "en", "src": "lake"}, "Hyponyms", [(Relation("hyponymOf", inverse=True), "en", "lake")]),
+    ({"@id": "link", "lang": "en", "src": "lake"}, "Related terms", [(None, "en", "lake")]),
+    # (Nothing to point to)
+    ({"@id": "borrowed", "lang": "en", "srcLang": "fr"}, None, []),
+    ({"@id": "IPA", "lang": "en"}, None, []),
+])
+def test_template_relations(template, section, relations):
+    assert template_relations(template, section) == relations
+
+
+def test_literal():
+    assert literal('say "hi"\\\nbye\r', "en") == '"say \\"hi\\"\\\\\\nbye\\r"@en'
+    assert literal("water", "en-GB") == '"water"@en-GB'
+    # (Not a language tag, so no tag at all)
+    assert literal("water", "not a tag") == '"water"'
+    assert literal("water") == '"water"'
+
+
+def test_iris():
+    assert word_iri("en", "H2O/x y") == f"<{OD}en/H2O%2Fx%20y>"
+    assert word_iri("en", "<water>") == f"<{OD}en/%3Cwater%3E>"
+    assert page_iri("ice cream") == "<https://en.wiktionary.org/wiki/ice_cream>"
+
+
+def test_format_triples():
+    triples = [("<a>", "<b>", '"c"'), ("<a>", "<b>", "<d>")]
+
+    assert format_triples(triples) == '<a> <b> "c" .\n<a> <b> <d> .\n'
+    assert format_triples(triples, "<g>") == '<a> <b> "c" <g> .\n<a> <b> <d> <g> .\n'
+
+
+def test_export_quads():
+    out = io.StringIO()
+
+    stats = export_triples([("water", PAGE), ("Wasser", "==German==\n"), ("broken", None)], "en", out, quads=True)
+
+    lines = out.getvalue().splitlines()
+    assert (stats.pages, stats.triples, stats.errors) == (1, 7, 1)
+    assert len(lines) == 7
+    assert all(line.endswith(" <https://en.wiktionary.org/wiki/water> .") for line in lines)
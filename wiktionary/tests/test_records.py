@@ -0,0 +1,84 @@
+import json
+import pickle
+
+import wikitextparser as wtp
+import pytest
+
+from wiktionary.columnar import EntryFlattener
+from wiktionary.en.parser import EnParser
+from wiktionary.en.templates.parse import parse_template
+from wiktionary.en.templates.records import IPA, Derived, Link, Nym, Translation, json_default
+from wiktionary.utils import ParsedPage, get_entry
+
+PAGE = (
+    "==English==\n===Etymology===\n{{der|en|ang|wæter}}.\n\n===Pronunciation===\n* {{IPA|en|/ˈwɔːtə/}}\n\n"
+    "===Noun===\n{{en-noun}}\n\n# A clear liquid.\n\n====Synonyms====\n* {{syn|en|aqua}}\n* {{l|en|H2O}}\n\n"
+    "====Translations====\n{{trans-top|clear liquid}}\n* German: {{t+|de|Wasser|n}}\n"
+    "* Russian: {{t+|ru|вода́|f|tr=vodá|sc=Cyrl}}\n{{trans-bottom}}\n"
+)
+
+
+def _parse(wikitext: str):
+    return parse_template(wtp.parse(wikitext).templates[0])
+
+
+@pytest.mark.parametrize("wikitext,record", [
+    ("{{t+|de|Wasser}}", Translation),
+    ("{{l|en|water}}", Link),
+    ("{{m|en|water|t=liquid}}", Link),
+    ("{{der|en|ang|wæter}}", Derived),
+    ("{{IPA|en|/ˈwɔːtə/}}", IPA),
+    ("{{syn|en|aqua}}", Nym),
+])
+def test_records(wikitext, record):
+    parsed = _parse(wikitext)
+
+    assert type(parsed) is record
+    assert parsed == parsed.to_dict()
+    assert dict(parsed) == parsed.to_dict()
+    assert list(parsed)[0] == "@id" and parsed["@id"] == parsed.id
+    assert parsed.extra is None
+
+
+def test_mapping():
+    translation = _parse("{{t+|ru|вода́|tr=vodá}}")
+
+    assert translation.to_dict() == {"@id": "translation", "lang": "ru", "gloss": "вода́", "transliteration": "vodá"}
+    assert translation.lang == translation["lang"] == translation.get("lang") == "ru"
+    assert translation.script is None and translation.get("script", "Latn") == "Latn"
+    assert "transliteration" in translation and "script" not in translation
+    assert len(translation) == 4
+
+    with pytest.raises(KeyError):
+        _ = translation["script"]
+
+
+def test_extra():
+    # (Arguments without a slot of their own)
+    translation = _parse("{{t|de|Wasser|alt=Wassers|lit=water}}")
+
+    assert translation.extra == {"alt": "Wassers", "literalTranslation": "water"}
+    assert translation["alt"] == "Wassers" and "literalTranslation" in translation
+    assert translation.to_dict()["alt"] == "Wassers"
+
+
+def test_serialization():
+    translation = _parse("{{t+|de|Wasser|n|alt=Wassers}}")
+
+    assert json.loads(json.dumps([translation], default=json_default)) == [translation.to_dict()]
+    assert pickle.loads(pickle.dumps(translation)) == translation
+
+    with pytest.raises(TypeError):
+        json.dumps(object(), default=json_default)
+
+
+def test_columnar():
+    parsed = ParsedPage(get_entry(PAGE, "en"))
+    entries = EnParser.parse("water", parsed.entry_sections("en"), "en", page=parsed)
+    # (The same entries, with dicts instead of records)
+    dicts = [json.loads(json.dumps(e.to_dict(), default=json_default)) for e in entries]
+
+    rows = [row for e in entries for row in EntryFlattener().rows(e)]
+
+    assert sum(table == "definition_triples" for table, _ in rows) == 5
+    assert rows == [row for e in dicts for row in EntryFlattener().rows(e)]
@@ -0,0 +1,35 @@
+import json
+
+import pytest
+
+from wiktionary.en.templates.registry import (
+    REGISTRY_PATH, RegistryError, TemplateRegistry, is_up_to_date, load_registry
+)
+
+
+def test_compiled_registry_is_up_to_date():
+    assert is_up_to_date(), "Recompile it with `python -m wiktionary.en.templates.registry`"
+
+
+def test_is_up_to_date(tmp_path):
+    data = json.loads(REGISTRY_PATH.read_text(encoding="utf-8"))
+    data["mappings"][0]["template_names"].append("not-a-template")
+    path = tmp_path / "registry.json"
+    path.write_text(json.dumps(data), encoding="utf-8")
+
+    assert not is_up_to_date(path)
+    # (Loading doesn't check, it takes the registry as compiled)
+    assert load_registry(path).get("not-a-template") is not None
+
+
+def test_load_registry_fallback(tmp_path):
+    path = tmp_path / "registry.json"
+    path.write_text(json.dumps({"version": 1, "mappings": []}), encoding="utf-8")
+
+    with pytest.raises(RegistryError):
+        load_registry(path, fallback=False)
+
+    with pytest.warns(UserWarning, match="building it from scratch"):
+        registry = load_registry(tmp_path / "missing.json")
+
+    assert isinstance(registry, TemplateRegistry) and registry.get("t+") is not None
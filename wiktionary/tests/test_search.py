@@ -0,0 +1,11 @@
+from wiktionary.search import build_headword_index
+
+
+def test_unknown_language():
+    index = build_headword_index([("water", "en"), ("wasser", "en")])
+
+    assert index.complete("wa", "en") == ["wasser", "water"]
+    assert ("water", "fr") not in index
+    assert index.complete("wa", "fr") == []
+    assert index.fuzzy("water", "fr") == []
+    assert index.match("wa*", "fr") == []
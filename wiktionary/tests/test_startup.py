@@ -0,0 +1,21 @@
+import pytest
+
+from benchmarks.startup import COMMANDS, Command, Startup, check, heavy_imports, measure_imports
+
+
+@pytest.mark.parametrize("command", COMMANDS, ids=lambda c: c.name)
+def test_startup(command: Command):
+    # (Only what it imports: wall times are for `python -m benchmarks.startup`, they're too noisy for a test)
+    assert heavy_imports(command, measure_imports(command.args)) == []
+
+
+def test_check():
+    command = Command("wiktionary --help", ["-m", "wiktionary.cli", "--help"], 60, allowed=["rich"])
+    startup = Startup(120, {"typer": 30, "rich": 20, "requests": 15})
+
+    assert check(command, startup, bare=50) == [
+        "wiktionary --help: 120ms (budget: 50ms + 60ms)",
+        "wiktionary --help: imports requests (15ms)",
+    ]
+    assert check(command, Startup(100, {}), bare=50) == []
+    assert heavy_imports(command, startup.imports) == ["wiktionary --help: imports requests (15ms)"]
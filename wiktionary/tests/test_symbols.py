@@ -0,0 +1,28 @@
+from wiktionary.symbols import SYMBOL_TABLES, SymbolTable
+
+
+def test_intern():
+    table = SymbolTable(["en"])
+    de = "".join(["d", "e"])
+
+    assert table.intern(de) is de
+    assert table.intern("".join(["d", "e"])) is de
+    assert [table.code("en"), table.code("de")] == [0, 1]
+    assert table[1] == "de" and "de" in table and len(table) == 2
+
+
+def test_bounded():
+    table = SymbolTable(limit=2, max_length=4)
+
+    for word in ["en", "de", "fr", "nl"] * 100:
+        table.intern(word)
+    assert table.intern("too long") == "too long"
+
+    assert list(table) == ["en", "de"]
+    assert "fr" not in table and "too long" not in table
+    # (`code` is for tables of your own, which number everything)
+    assert table.code("fr") == 2
+
+
+def test_shared_tables_are_bounded():
+    assert all(table.limit is not None and table.max_length is not None for table in SYMBOL_TABLES.values())
@@ -0,0 +1,48 @@
+import wikitextparser as wtp
+import pytest
+
+from wiktionary.en.templates.base import Collect, Pluck
+from wiktionary.en.templates.parse import declared_templates, parse_template
+from wiktionary.symbols import GENDERS, SCRIPTS
+
+
+def _parse(wikitext: str) -> dict:
+    return parse_template(wtp.parse(wikitext).templates[0])
+
+
+@pytest.mark.parametrize("wikitext,genders", [
+    ("{{t+|de|Haus|n}}", ["n"]),
+    ("{{t+|nl|schaar|f|p}}", ["f", "p"]),
+    ("{{t|ru|вода|f|tr=voda}}", ["f"]),
+])
+def test_translation_genders(wikitext, genders):
+    translation = _parse(wikitext)
+
+    assert translation["genders"] == genders
+    assert all(gender is GENDERS.intern(gender) for gender in translation["genders"])
+    assert not any(key.isdigit() for key in translation)
+
+
+def test_translation_without_genders():
+    # (No empty list)
+    assert "genders" not in _parse("{{t|fr|eau}}")
+
+
+def test_collect():
+    items = [{"g": "f"}, {"alt": "x"}, {"g": "p"}]
+
+    assert Collect("g")(items) == ["f", "p"]
+    with pytest.raises(KeyError):
+        Pluck("g")(items)
+
+
+def test_shared_symbols():
+    translation = _parse("{{t|ru|вода|f|sc=Cyrl}}")
+
+    assert translation["script"] is SCRIPTS.intern("Cyrl")
+    assert "Cyrl" in SCRIPTS and "f" in GENDERS
+
+
+def test_every_mapping_is_reachable():
+    # (A mapping without template names is one the registry never dispatches to)
+    assert all(mapping.template_names for mapping in declared_templates())
@@ -0,0 +1,88 @@
+import pytest
+
+from wiktionary.en.parser import EnParser
+from wiktionary.translations import (
+    TranslationIndex, TranslationIndexError, TranslationSource, build_translation_index, update_translation_index,
+)
+from wiktionary.utils import ParsedPage, get_entry
+
+
+def _page(*translations: str, pos: str = "Noun") -> str:
+    lines = "".join(f"* {line}\n" for line in translations)
+    return (
+        f"==English==\n==={pos}===\n{{{{en-noun}}}}\n\n# A thing.\n\n"
+        f"====Translations====\n{{{{trans-top|thing}}}}\n{lines}{{{{trans-bottom}}}}\n"
+    )
+
+
+def _entries(word: str, page: str) -> list[dict]:
+    parsed = ParsedPage(get_entry(page, "en"))
+    return [e.to_dict() for e in EnParser.parse(word, parsed.entry_sections("en"), "en", page=parsed)]
+
+
+WATER = _entries("water", _page("German: {{t+|de|Wasser|n}}", "Russian: {{t+|ru|вода́|f}}"))
+HOUSE = _entries("house", _page("German: {{t+|de|Haus|n}}", "Russian: {{t+|ru|дом|m}}"))
+HOME = _entries("home", _page("German: {{t|de|Haus|n}}, {{t|de|Heim|n}}"))
+
+
+@pytest.fixture
+def index_path(tmp_path):
+    path = tmp_path / "translations.index"
+    assert build_translation_index([*WATER, *HOUSE, *HOME], path) == 6
+    return path
+
+
+def test_lookup(index_path):
+    with TranslationIndex(index_path) as index:
+        assert index.lookup("Haus", "de") == [
+            TranslationSource("home", "en", "NOUN", 0, "Haus"), TranslationSource("house", "en", "NOUN", 0, "Haus"),
+        ]
+        # (Ignoring case & accents)
+        assert [s.word for s in index.lookup("ВОДА", "ru")] == ["water"]
+        assert index.lookup("вода́", "ru")[0].target == "вода́"
+        assert index.lookup("Haus", "ru") == []
+        assert index.lookup("Haus", "de", lang="fr") == []
+        # (A prefix of a target isn't a match)
+        assert index.lookup("Hau", "de") == []
+
+
+def test_sorted_and_unique(tmp_path, index_path):
+    with TranslationIndex(index_path) as index:
+        records = list(index)
+
+    assert records == sorted(set(records))
+    # (The order of the entries doesn't matter)
+    again = tmp_path / "again.index"
+    build_translation_index([*HOME, *WATER, *HOUSE], again)
+    assert again.read_bytes() == index_path.read_bytes()
+
+
+def test_update(tmp_path, index_path):
+    house = _entries("house", _page("German: {{t+|de|Gebäude|n}}"))
+    deltas = [
+        {"op": "upsert", "word": "house", "lang": "en", "entries": house},
+        {"op": "delete", "word": "water", "lang": "en"},
+        # (The last change to a word wins)
+        {"op": "delete", "word": "home", "lang": "en"},
+        {"op": "upsert", "word": "home", "lang": "en", "entries": HOME},
+    ]
+
+    assert update_translation_index(index_path, deltas) == 3
+
+    with TranslationIndex(index_path) as index:
+        assert [s.word for s in index.lookup("Haus", "de")] == ["home"]
+        assert [s.word for s in index.lookup("Gebaude", "de")] == ["house"]
+        assert index.lookup("вода", "ru") == []
+
+    # (Merging gives the same index as building it from scratch)
+    rebuilt = tmp_path / "rebuilt.index"
+    build_translation_index([*house, *HOME], rebuilt)
+    assert rebuilt.read_bytes() == index_path.read_bytes()
+
+
+def test_not_an_index(tmp_path):
+    path = tmp_path / "translations.index"
+    path.write_bytes(b"not an index at all")
+
+    with pytest.raises(TranslationIndexError, match="Not a translation index"):
+        TranslationIndex(path)
@@ -15,18 +15,20 @@ which we may come to need.
 """
 
 
-import json
-from dataclasses import dataclass
+import asyncio
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from itertools import islice
 from re import M
-from typing import Generator, Literal, Protocol, TypedDict
-
-import wikitextparser as wtp
-from requests import request
+from typing import AsyncGenerator, Coroutine, Generator, Iterable, Literal, Protocol, TypedDict, TypeVar
 
 from wiktionary._types import LanguageCode
-#
-from wiktionary.en.parser import EnParser
-from wiktionary.utils import get_full_lang
+from wiktionary.cache import CacheMissError, WikitextCache
+from wiktionary.http import HTTPClient, HTTPOptions, RequestStats
+from wiktionary.ontology import get_context
+from wiktionary.utils import (
+    EntryIndex, ParsedPage, get_entry, index_entries, index_entries_from_api
+)
 
 APIProp = Literal[
     "text",
@@ -58,7 +60,7 @@ APIProp = Literal[
 ]
 
 
-class APIOptions(TypedDict):
+class APIOptions(TypedDict, total=False):
     """See the [official API documentation](https://en.wiktionary.org/w/api.php) for more information."""
 
     props: list[APIProp]
@@ -67,6 +69,16 @@ class APIOptions(TypedDict):
 
 Page = dict[APIProp, dict | list | str]
 
+#: Most titles the API accepts in one query (unless you're a bot)
+MAX_TITLES = 50
+
+
+@dataclass
+class Revision:
+    title: str
+    revid: int
+    wikitext: str
+
 
 class Parser(Protocol):
     wiki: LanguageCode = "en"
@@ -79,14 +91,21 @@ class Entry(Protocol):
     lang: str
 
 
-def get_ontology() -> dict:
-    with open("../ontology/ontology.json", "r+") as f:
-        return json.load(f)
+T = TypeVar("T")
+
+
+def _default_parser() -> Parser:
+    # (Imported here: the parser pulls in wikitextparser & all of the templates, which
+    # takes a while, and you might bring your own)
+    from wiktionary.en.parser import EnParser  # pylint: disable=import-outside-toplevel
+
+    return EnParser
+
 
 @dataclass
-class WiktionaryClient:
+class AsyncWiktionaryClient:
     """
-    An API client for [a Wiktionary](https://meta.wikimedia.org/wiki/Wiktionary#List_of_Wiktionaries).
+    An (asyncio) API client for [a Wiktionary](https://meta.wikimedia.org/wiki/Wiktionary#List_of_Wiktionaries).
 
     It takes one argument, a `parser` configured for the language-specific wiki
     you want to use.
@@ -94,68 +113,385 @@ class WiktionaryClient:
     NOTE: Only "en" is currently supported
 
     Each page consists of multiple entries (for each language), and each entry consists of multiple sections.
+
+    Pass a `cache` to keep fetched wikitext around (see `wiktionary.cache`), and
+    `offline=True` to only ever read from it.
+
+    All requests share one connection pool, and are rate-limited & retried according
+    to `http` (see `wiktionary.http`). Use a client from one event loop only.
     """
-    parser: Parser = EnParser
+    parser: Parser = field(default_factory=_default_parser)
+
+    cache: WikitextCache | None = None
+    offline: bool = False
+
+    #: How many pages' entry indices (see `index_entries`) to hold on to
+    index_cache_size: int = 1024
+
+    http: HTTPOptions = field(default_factory=HTTPOptions)
+
+    _entry_indices: OrderedDict[tuple[str, int], EntryIndex] = field(
+        default_factory=OrderedDict, init=False, repr=False
+    )
+
+    def __post_init__(self):
+        if self.offline and self.cache is None:
+            raise ValueError("Offline mode needs a `cache` to read from")
+
+        self._http = HTTPClient(self.http)
+
+    @property
+    def stats(self) -> RequestStats:
+        """Request counts, throughput & latency percentiles"""
+        return self._http.stats
+
+    def close(self):
+        self._http.close()
+
+    @property
+    def api_url(self) -> str:
+        return f"https://{self.parser.wiki}.wiktionary.org/w/api.php"
 
     # pylint: disable=dangerous-default-value
-    def fetch_page(self, word: str, opts: APIOptions = {}) -> Page:
+    async def fetch_page(self, word: str, opts: APIOptions = {}) -> Page:
         """Retrieves an entire page for a given word (+ metadata)
         """
-        url = (
-            f"https://{self.parser.wiki}.wiktionary.org/w/api.php?action=parse&page={word}&format=json&prop=wikitext"
-            + "&".join(f"{k}={v}" for k, v in opts.items())
-        )
-        return request("get", url).json()
+        params = {
+            "action": "parse",
+            "page": word,
+            "format": "json",
+            "prop": "|".join(opts.get("props", ["wikitext"])),
+        }
+        if "section" in opts:
+            params["section"] = opts["section"]
+
+        return await self._http.get_json(self.api_url, params)
+
+    async def fetch_revid(self, word: str) -> int | None:
+        """Retrieves the id of the latest revision of a given word's page (but not its wikitext)."""
+        params = {
+            "action": "query",
+            "prop": "revisions",
+            "titles": word,
+            "rvprop": "ids",
+            "format": "json",
+            "formatversion": 2,
+        }
+        pages = (await self._http.get_json(self.api_url, params)).get("query", {}).get("pages", [])
 
-    def fetch_wikitext(self, word: str) -> str:
+        if not pages or not pages[0].get("revisions"):
+            return None
+
+        return pages[0]["revisions"][0]["revid"]
+
+    async def fetch_revision(self, word: str) -> tuple[dict, str]:
+        """Retrieves the wikitext for a given word's page (+ its `title`, `revid`, ...).
+
+        With a `cache`, we only download the wikitext if the cached revision is out of date
+        (or, offline, not at all).
+        """
+        wiki = self.parser.wiki
+
+        if self.cache is not None:
+            if self.offline:
+                cached = self.cache.get(wiki, word)
+
+                if cached is None:
+                    raise CacheMissError(f"{word} ({wiki}) isn't cached")
+            else:
+                revid = await self.fetch_revid(word)
+                cached = self.cache.get(wiki, word, revid) if revid is not None else None
+
+            if cached is not None:
+                return {"title": word, "revid": cached.revid}, cached.wikitext
+
+        data = await self.fetch_page(word, {"props": ["wikitext", "revid", "sections"]})
+        parse = data.get("parse", {})
+        page = parse.get("wikitext", {}).get("*", "")
+
+        if self.cache is not None and parse.get("revid") is not None:
+            self.cache.put(wiki, word, parse["revid"], page)
+
+        return parse, page
+
+    async def fetch_wikitext(self, word: str) -> str:
         """Retrieves the wikitext for a given word's page.
         """
-        data = self.fetch_page(word)
-        return data.get("parse", {}).get("wikitext", {}).get("*", "")
+        return (await self.fetch_revision(word))[1]
 
-    def _fetch_entry_sections(self, word: str, lang: LanguageCode) -> Entry:
+    async def _query_revisions(self, titles: list[str], rvprop: str) -> dict[str, dict]:
+        """The latest revision of each of `titles` (at most `MAX_TITLES`), keyed by title as given.
+
+        Missing pages are left out. When the revisions don't fit in one response, the API hands
+        us a `continue` token, and we keep asking until we have all of them.
         """
-        Each entry starts with a `h2` tag. We read all the sections following
-        a tag until the next `h2` tag, which marks the start of the next entry.
+        params = {
+            "action": "query",
+            "prop": "revisions",
+            "titles": "|".join(titles),
+            "rvprop": rvprop,
+            "format": "json",
+            "formatversion": 2,
+        }
+        if "content" in rvprop:
+            params["rvslots"] = "main"
+
+        # The API normalizes titles (e.g., `foo_bar` -> `foo bar`), so we map them back (to
+        # every title we asked for that's the same page: maybe both `foo_bar` and `foo bar`)
+        asked = set(titles)
+        requested: dict[str, set[str]] = {}
+        revisions = {}
+        continue_ = {}
+
+        while True:
+            data = await self._http.get_json(self.api_url, {**params, **continue_})
+            query = data.get("query", {})
+
+            for normalized in query.get("normalized", []):
+                requested.setdefault(normalized["to"], set()).add(normalized["from"])
+
+            for page in query.get("pages", []):
+                if page.get("revisions"):
+                    for title in requested.get(page["title"], set()) | ({page["title"]} & asked):
+                        revisions[title] = page["revisions"][0]
+
+            if "continue" not in data:
+                return revisions
+
+            continue_ = data["continue"]
+
+    async def fetch_many(
+        self, words: Iterable[str], batch_size: int = MAX_TITLES, ordered: bool = True
+    ) -> AsyncGenerator[tuple[str, Revision | None], None]:
+        """Retrieves the wikitext for many words, `batch_size` pages per request.
+
+        Yields `(word, revision)` in the same order as `words` (`revision` is `None` for
+        missing pages), or, if not `ordered`, batch by batch as they arrive. With a `cache`, we first ask for the batch's revision ids, and only
+        download the wikitext of pages that aren't cached (or are out of date).
+
+        Up to `http.max_concurrency` batches are fetched at once.
         """
-        page = self.fetch_wikitext(word)
-        sections = iter(wtp.parse(page).sections)
+        words = iter(words)
+        pending: deque[asyncio.Task] = deque()
 
-        def get_sections() -> Generator[wtp.Section, None, None]:
-            # Skip any sections preceding the entry we want
-            while next(sections).title != get_full_lang(lang):
-                pass
+        def submit() -> bool:
+            if batch := list(islice(words, batch_size)):
+                pending.append(asyncio.ensure_future(self._fetch_batch(batch)))
+            return bool(batch)
 
-            # Take sections until we encounter the next entry (i.e., new language)
-            try:
-                while (section := next(sections)).level != 2:
-                    yield section
-            except StopIteration:
+        try:
+            while len(pending) < self.http.max_concurrency and submit():
                 pass
 
-        # h3 sections are contained under h3 sections
-        return [s for s in get_sections() if s.level == 3]  
+            while pending:
+                if ordered:
+                    task = pending.popleft()
+                else:
+                    done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    task = done.pop()
+                    pending.remove(task)
+
+                results = await task
+                submit()
+
+                for result in results:
+                    yield result
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _fetch_batch(self, batch: list[str]) -> list[tuple[str, Revision | None]]:
+        wiki = self.parser.wiki
+        revisions: dict[str, Revision] = {}
+        to_fetch = batch
+
+        if self.cache is not None:
+            if self.offline:
+                revids = {word: None for word in batch}
+            else:
+                revids = {
+                    word: revision["revid"]
+                    for word, revision in (await self._query_revisions(batch, "ids")).items()
+                }
+
+            for word, revid in revids.items():
+                if (cached := self.cache.get(wiki, word, revid)) is not None:
+                    revisions[word] = Revision(word, cached.revid, cached.wikitext)
+
+            to_fetch = [] if self.offline else [
+                word for word in revids if word not in revisions
+            ]
+
+        if to_fetch:
+            for word, revision in (await self._query_revisions(to_fetch, "ids|content")).items():
+                revisions[word] = Revision(word, revision["revid"], revision["slots"]["main"]["content"])
+
+                if self.cache is not None:
+                    self.cache.put(wiki, word, revision["revid"], revisions[word].wikitext)
+
+        return [(word, revisions.get(word)) for word in batch]
+
+    async def fetch_recent_changes(
+        self, since: str, namespace: int = 0
+    ) -> AsyncGenerator[dict, None]:
+        """Yields [recent changes](https://www.mediawiki.org/wiki/API:RecentChanges) (edits, new pages
+        and log events like deletions & moves) since `since` (an ISO 8601 timestamp), oldest first.
+
+        NOTE: Wikimedia only keeps the last 30 days of recent changes.
+        """
+        params = {
+            "action": "query",
+            "list": "recentchanges",
+            "rcstart": since,
+            "rcdir": "newer",
+            "rcnamespace": namespace,
+            "rctype": "edit|new|log",
+            "rcprop": "title|ids|timestamp|loginfo",
+            "rclimit": "max",
+            "format": "json",
+            "formatversion": 2,
+        }
+        continue_ = {}
 
-    def fetch_entry(self, word: str, lang: LanguageCode) -> Entry:
-        sections = self._fetch_entry_sections(word, lang)
-        return self.parser.parse(word, sections, lang)
+        while True:
+            data = await self._http.get_json(self.api_url, {**params, **continue_})
 
-    def fetch_jsonld(self, word: str, lang: LanguageCode) -> dict:
+            for change in data.get("query", {}).get("recentchanges", []):
+                yield change
+
+            if "continue" not in data:
+                return
+
+            continue_ = data["continue"]
+
+    async def fetch_entry_wikitext(self, word: str, lang: LanguageCode) -> str:
+        """Retrieves the wikitext of just the `lang` entry on a given word's page.
+
+        Raises an `EntryNotFoundError` if there isn't one.
+        """
+        parse, page = await self.fetch_revision(word)
+        return get_entry(page, lang, self._entry_index(parse, page))
+
+    def _entry_index(self, parse: dict, page: str) -> EntryIndex:
+        """Where the entries are on `page`, cached per revision."""
+        if (revid := parse.get("revid")) is None:
+            return index_entries(page)
+
+        key = (parse.get("title", ""), revid)
+
+        if key in self._entry_indices:
+            self._entry_indices.move_to_end(key)
+            return self._entry_indices[key]
+
+        if sections := parse.get("sections"):
+            index = index_entries_from_api(page, sections)
+        else:
+            index = index_entries(page)
+
+        self._entry_indices[key] = index
+
+        if len(self._entry_indices) > self.index_cache_size:
+            self._entry_indices.popitem(last=False)
+
+        return index
+
+    async def _fetch_entry_sections(self, word: str, lang: LanguageCode) -> Entry:
+        """
+        Each entry starts with a `h2` tag. We read all the sections following
+        a tag until the next `h2` tag, which marks the start of the next entry.
+        """
+        return ParsedPage(await self.fetch_entry_wikitext(word, lang)).entry_sections(lang)
+
+    async def fetch_entry(self, word: str, lang: LanguageCode) -> Entry:
+        page = ParsedPage(await self.fetch_entry_wikitext(word, lang))
+        return self.parser.parse(word, page.entry_sections(lang), lang, page=page)
+
+    async def fetch_jsonld(self, word: str, lang: LanguageCode) -> dict:
         """
         Retrieves a list of JSON-LD triples for a given word's entry (+ context)
         """
-        sections = self._fetch_entry_sections(word, lang)
-        
-        ontology = get_ontology()
-        context = ontology["@context"]
+        sections = await self._fetch_entry_sections(word, lang)
 
         return {
-            "@context": {
-                "@base": context["@base"],
-                "wt": context["wt"],
-                "wt-en": context["wt-en"],
-                "od": context["od"],
-                "temp": "http://www.wiktionary.org/wiki/Template:",
-            },
+            "@context": dict(get_context()),
             "@graph": self.parser.jsonld(word, sections, lang)
         }
+
+
+@dataclass
+class WiktionaryClient:
+    """
+    A blocking version of `AsyncWiktionaryClient` (same arguments, same methods).
+
+    Each call runs on the client's own event loop, so you still get the connection pool,
+    rate limiting & retries. (Don't use it from inside a running event loop.)
+    """
+    parser: Parser = field(default_factory=_default_parser)
+
+    cache: WikitextCache | None = None
+    offline: bool = False
+
+    #: How many pages' entry indices (see `index_entries`) to hold on to
+    index_cache_size: int = 1024
+
+    http: HTTPOptions = field(default_factory=HTTPOptions)
+
+    def __post_init__(self):
+        self.client = AsyncWiktionaryClient(
+            self.parser, self.cache, self.offline, self.index_cache_size, self.http
+        )
+        self._loop = asyncio.new_event_loop()
+
+    def _run(self, coro: Coroutine[None, None, T]) -> T:
+        return self._loop.run_until_complete(coro)
+
+    @property
+    def api_url(self) -> str:
+        return self.client.api_url
+
+    @property
+    def stats(self) -> RequestStats:
+        return self.client.stats
+
+    # pylint: disable=dangerous-default-value
+    def fetch_page(self, word: str, opts: APIOptions = {}) -> Page:
+        return self._run(self.client.fetch_page(word, opts))
+
+    def fetch_revid(self, word: str) -> int | None:
+        return self._run(self.client.fetch_revid(word))
+
+    def fetch_revision(self, word: str) -> tuple[dict, str]:
+        return self._run(self.client.fetch_revision(word))
+
+    def fetch_wikitext(self, word: str) -> str:
+        return self._run(self.client.fetch_wikitext(word))
+
+    def _iterate(self, results: AsyncGenerator[T, None]) -> Generator[T, None, None]:
+        try:
+            while True:
+                yield self._run(anext(results))
+        except StopAsyncIteration:
+            pass
+        finally:
+            self._run(results.aclose())
+
+    def fetch_many(
+        self, words: Iterable[str], batch_size: int = MAX_TITLES, ordered: bool = True
+    ) -> Generator[tuple[str, Revision | None], None, None]:
+        return self._iterate(self.client.fetch_many(words, batch_size, ordered))
+
+    def fetch_recent_changes(self, since: str, namespace: int = 0) -> Generator[dict, None, None]:
+        return self._iterate(self.client.fetch_recent_changes(since, namespace))
+
+    def fetch_entry_wikitext(self, word: str, lang: LanguageCode) -> str:
+        return self._run(self.client.fetch_entry_wikitext(word, lang))
+
+    def fetch_entry(self, word: str, lang: LanguageCode) -> Entry:
+        return self._run(self.client.fetch_entry(word, lang))
+
+    def fetch_jsonld(self, word: str, lang: LanguageCode) -> dict:
+        return self._run(self.client.fetch_jsonld(word, lang))
+
+    def close(self):
+        self.client.close()
+        self._loop.close()
@@ -0,0 +1,159 @@
+"""
+# Batch lookups
+
+`python -m wiktionary.cli entry` looks up one word per process, so looking up thousands
+means paying for the imports (and a request or two) thousands of times. Instead, pass
+them all to `batch`, one per line:
+
+```sh
+printf 'water\\ten\\nHaus\\tde\\n' | python -m wiktionary.cli batch - > entries.jsonl
+python -m wiktionary.cli batch words.txt --lang en --form jsonld > entries.jsonl
+```
+
+Each line is `word<TAB>lang`, just a word (with `--lang`), or `{"word": ..., "lang": ...}`.
+Pages are fetched 50 at a time, several requests at once (see `WiktionaryClient.fetch_many`),
+and each page once, however many of its entries you ask for. Results go to stdout as
+compact JSON lines, as soon as they're ready (in the input order unless `--unordered`):
+
+```json
+{"word": "water", "lang": "en", "entries": [...]}
+{"word": "Haus", "lang": "de", "@context": {...}, "@graph": [...]}
+{"word": "asdfgh", "lang": "en", "error": "EntryNotFoundError: No English entry found"}
+```
+
+A word that can't be looked up gets an `error` record instead of stopping the batch.
+
+"""
+
+import json
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import IO, Generator, Iterable
+
+from wiktionary._types import LanguageCode
+from wiktionary.api import MAX_TITLES, WiktionaryClient
+from wiktionary.en.templates.records import json_default
+from wiktionary.ontology import get_context
+from wiktionary.utils import ParsedPage, get_entry
+
+
+@dataclass
+class BatchStats:
+    requests: int = 0
+    #: Pages fetched (a page can have entries for several requests)
+    pages: int = 0
+    #: Requests we found an entry for
+    found: int = 0
+    errors: int = 0
+    started: float = field(default_factory=time.monotonic, repr=False)
+
+    @property
+    def throughput(self) -> float:
+        """Requests per second (since we started)"""
+        return self.requests / max(time.monotonic() - self.started, 1e-9)
+
+
+def read_requests(
+    lines: Iterable[str], lang: LanguageCode | None = None
+) -> Generator[tuple[str, LanguageCode | None], None, None]:
+    """`(word, lang)` for each line (see the module docstring), with `lang` for lines without one"""
+    for line in lines:
+        if not (line := line.strip()):
+            continue
+
+        if line.startswith("{"):
+            request = json.loads(line)
+            yield request["word"], request.get("lang", lang)
+        elif "\t" in line:
+            word, line_lang = line.rsplit("\t", 1)
+            yield word.strip(), line_lang.strip()
+        else:
+            yield line, lang
+
+
+def lookup(parser, title: str, page: str, lang: LanguageCode, form: str = "json") -> dict:
+    """The record for the `lang` entry on `page` (in the same shape as the `entry` command's output)"""
+    parsed = ParsedPage(get_entry(page, lang))
+
+    if form == "json":
+        entries = parser.parse(title, parsed.entry_sections(lang), lang, page=parsed)
+        return {"entries": [e.to_dict() for e in entries]}
+    if form == "jsonld":
+        return {"@context": dict(get_context()), "@graph": parser.jsonld(title, parsed.entry_sections(lang), lang)}
+
+    raise ValueError(f"Unknown format: {form}")
+
+
+def run_batch(
+    client: WiktionaryClient,
+    requests: Iterable[tuple[str, LanguageCode | None]],
+    out: IO[str],
+    form: str = "json",
+    ordered: bool = True,
+    batch_size: int = MAX_TITLES,
+    stats: BatchStats | None = None,
+) -> BatchStats:
+    """Looks up each `(word, lang)` in `requests`, and writes one JSON line per request to `out`.
+
+    With `ordered`, lines come out in the same order as `requests` (a slow page holds up
+    the ones after it). Otherwise, each line is written as soon as its page is parsed.
+    """
+    if form not in ("json", "jsonld"):
+        raise ValueError(f"Unknown format: {form}")
+
+    stats = stats or BatchStats()
+
+    #: `word -> [(position, lang), ...]` for the requests waiting on a page
+    waiting: defaultdict[str, list[tuple[int, LanguageCode | None]]] = defaultdict(list)
+    #: Records that are done, but have to wait for earlier ones (if `ordered`)
+    done: dict[int, str] = {}
+    written = 0
+
+    def words() -> Generator[str, None, None]:
+        # (`fetch_many` reads these lazily, so we only hold on to the requests in flight)
+        for position, (word, lang) in enumerate(requests):
+            stats.requests += 1
+            waiting[word].append((position, lang))
+
+            # (If the page is already on its way, the request gets answered along with it)
+            if len(waiting[word]) == 1:
+                yield word
+
+    def write(position: int, record: dict):
+        nonlocal written
+        line = json.dumps(record, ensure_ascii=False, default=json_default) + "\n"
+
+        if not ordered:
+            out.write(line)
+            return
+
+        done[position] = line
+        while written in done:
+            out.write(done.pop(written))
+            written += 1
+
+    for word, revision in client.fetch_many(words(), batch_size, ordered):
+        if revision is not None:
+            stats.pages += 1
+
+        for position, lang in waiting.pop(word):
+            record = {"word": word, "lang": lang}
+
+            try:
+                if lang is None:
+                    raise ValueError("No language given")
+                if revision is None:
+                    raise LookupError(f"No page for {word}")
+
+                record.update(lookup(client.parser, word, revision.wikitext, lang, form))
+                stats.found += 1
+            except Exception as e:  # pylint: disable=broad-except
+                record["error"] = f"{type(e).__name__}: {e}"
+                stats.errors += 1
+
+            write(position, record)
+
+        out.flush()
+
+    return stats
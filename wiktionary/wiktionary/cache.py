@@ -0,0 +1,214 @@
+"""
+# Wikitext cache
+
+Looking up the same word in ten languages shouldn't mean downloading the same page ten times.
+This keeps the wikitext we've fetched in a local SQLite database, keyed by `(wiki, title, revid)`.
+
+Before trusting a cached page, the client asks the API for the page's latest revision id
+(which is a tiny request), so we only download wikitext when the page actually changed.
+In offline mode, we don't touch the network at all and go with whatever we have.
+
+Wikitext is stored compressed: with [zstd](https://github.com/indygreg/python-zstandard)
+if it's installed, otherwise with `zlib`. Once the cache grows past `max_bytes` (of
+compressed wikitext), the least recently used pages are evicted.
+
+```python
+cache = WikitextCache()  # ~/.cache/wiktionary/wikitext.sqlite
+client = WiktionaryClient(cache=cache)
+client.fetch_entry("foo", "en")
+client.fetch_entry("foo", "en")  # No download
+cache.stats  # CacheStats(hits=1, misses=1, ...)
+```
+
+"""
+
+import os
+import sqlite3
+import time
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Generator
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+
+def default_cache_path() -> Path:
+    cache_home = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(cache_home) / "wiktionary" / "wikitext.sqlite"
+
+
+class CacheMissError(LookupError):
+    """The page isn't cached (and we're not allowed to go fetch it)."""
+
+
+@dataclass
+class CachedPage:
+    wiki: str
+    title: str
+    revid: int
+    wikitext: str
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    #: Cached pages that turned out to be out of date
+    stale: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.
+
+
+def _compress(wikitext: str) -> tuple[str, bytes]:
+    data = wikitext.encode("utf-8")
+
+    if zstandard is not None:
+        return "zstd", zstandard.ZstdCompressor(level=10).compress(data)
+    return "zlib", zlib.compress(data, 6)
+
+
+def _decompress(codec: str, data: bytes) -> str:
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("This page was cached with zstd. `pip install zstandard` to read it.")
+        return zstandard.ZstdDecompressor().decompress(data).decode("utf-8")
+    if codec == "zlib":
+        return zlib.decompress(data).decode("utf-8")
+
+    raise ValueError(f"Unknown codec: {codec}")
+
+
+class WikitextCache:
+    """A size-bounded, least-recently-used wikitext cache in a single SQLite file.
+
+    We only keep the latest revision of each page we've seen. (Putting a new revision
+    replaces the old one.)
+    """
+
+    def __init__(self, path: str | Path | None = None, max_bytes: int = 1 << 30):
+        self.path = Path(path) if path else default_cache_path()
+        self.max_bytes = max_bytes
+        self.stats = CacheStats()
+
+        if str(self.path) != ":memory:":
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._db = sqlite3.connect(str(self.path))
+        self._db.executescript(
+            """
+            PRAGMA journal_mode = WAL;
+            PRAGMA synchronous = NORMAL;
+            CREATE TABLE IF NOT EXISTS pages (
+                wiki TEXT NOT NULL,
+                title TEXT NOT NULL,
+                revid INTEGER NOT NULL,
+                codec TEXT NOT NULL,
+                data BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                accessed REAL NOT NULL,
+                PRIMARY KEY (wiki, title)
+            );
+            CREATE INDEX IF NOT EXISTS pages_accessed ON pages (accessed);
+            """
+        )
+        self._size = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+
+    def get(self, wiki: str, title: str, revid: int | None = None) -> CachedPage | None:
+        """The cached page, if we have it (at revision `revid`, if given)."""
+        row = self._db.execute(
+            "SELECT revid, codec, data FROM pages WHERE wiki = ? AND title = ?",
+            (wiki, title),
+        ).fetchone()
+
+        if row is None:
+            self.stats.misses += 1
+            return None
+
+        if revid is not None and row[0] != revid:
+            self.stats.misses += 1
+            self.stats.stale += 1
+            return None
+
+        self.stats.hits += 1
+        with self._db:
+            self._db.execute(
+                "UPDATE pages SET accessed = ? WHERE wiki = ? AND title = ?",
+                (time.time(), wiki, title),
+            )
+
+        return CachedPage(wiki, title, row[0], _decompress(row[1], row[2]))
+
+    def revid(self, wiki: str, title: str) -> int | None:
+        """The cached revision of a page (without counting as a lookup)."""
+        row = self._db.execute(
+            "SELECT revid FROM pages WHERE wiki = ? AND title = ?", (wiki, title)
+        ).fetchone()
+        return row[0] if row else None
+
+    def iter_pages(self, wiki: str) -> Generator[tuple[str, str], None, None]:
+        """`(title, wikitext)` for every cached page of `wiki` (without counting as lookups)."""
+        for title, codec, data in self._db.execute(
+            "SELECT title, codec, data FROM pages WHERE wiki = ? ORDER BY title", (wiki,)
+        ):
+            yield title, _decompress(codec, data)
+
+    def put(self, wiki: str, title: str, revid: int, wikitext: str):
+        codec, data = _compress(wikitext)
+
+        with self._db:
+            old = self._db.execute(
+                "SELECT size FROM pages WHERE wiki = ? AND title = ?", (wiki, title)
+            ).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (wiki, title, revid, codec, data, len(data), time.time()),
+            )
+
+        self._size += len(data) - (old[0] if old else 0)
+
+        if self._size > self.max_bytes:
+            self.evict(self.max_bytes)
+
+    def evict(self, max_bytes: int):
+        """Drops least recently used pages until the cache is at most `max_bytes`."""
+        excess = self._size - max_bytes
+        evicted = []
+
+        for rowid, size in self._db.execute(
+            "SELECT rowid, size FROM pages ORDER BY accessed"
+        ):
+            if excess <= 0:
+                break
+            evicted.append((rowid,))
+            excess -= size
+            self._size -= size
+
+        with self._db:
+            self._db.executemany("DELETE FROM pages WHERE rowid = ?", evicted)
+
+        self.stats.evictions += len(evicted)
+
+    @property
+    def size(self) -> int:
+        """Bytes of (compressed) wikitext in the cache"""
+        return self._size
+
+    def __len__(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+
+    def close(self):
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
@@ -1,39 +1,375 @@
 import json
-from dataclasses import asdict
-from typing import Literal
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Iterator, Literal, Optional
 
 import typer
-from pyld import jsonld
 
-from wiktionary.api import WiktionaryClient
-from wiktionary.en.parser import EnParser
+if TYPE_CHECKING:
+    from wiktionary.api import WiktionaryClient
+
+# NOTE: Import everything else inside the commands, so that starting up (or `--help`) stays
+# quick. (Check with `python -m benchmarks.startup`.)
 
 Format =  Literal["json", "jsonld"]
 
-def main(word: str, lang: str, wiki: str = "en", form: str = "json"):
+try:
+    # (Rendering `--help` with rich takes longer than everything else put together)
+    app = typer.Typer(rich_markup_mode=None)
+except TypeError:  # (Older versions of typer don't use rich, or know about it)
+    app = typer.Typer()
+
+
+@contextmanager
+def _open_client(
+    cache: bool, cache_path: Optional[str], offline: bool = False, **kwargs
+) -> Iterator["WiktionaryClient"]:
+    """A `WiktionaryClient` (& its wikitext cache, if any) that's closed afterwards"""
+    from wiktionary.api import WiktionaryClient
+    from wiktionary.cache import WikitextCache
+    from wiktionary.en.parser import EnParser
+
+    wikitext_cache = WikitextCache(cache_path) if cache or offline else None
+    client = WiktionaryClient(parser=EnParser(), cache=wikitext_cache, offline=offline, **kwargs)
+
+    try:
+        yield client
+    finally:
+        client.close()
+        if wikitext_cache is not None:
+            wikitext_cache.close()
+
+
+@app.command("entry")
+def main(
+    word: str,
+    lang: str,
+    wiki: str = "en",
+    form: str = "json",
+    cache: bool = typer.Option(False, help="Keep fetched wikitext in a local cache (see `--cache-path`)"),
+    cache_path: Optional[str] = typer.Option(None, help="Cache file (default: ~/.cache/wiktionary/wikitext.sqlite)"),
+    offline: bool = typer.Option(False, help="Only use cached wikitext (never touch the network)"),
+):
     if wiki != "en":
         raise NotImplementedError("Non-English wiktionaries are not supported yet.")
 
-    client = WiktionaryClient(parser=EnParser())
-
-    if form == "json":
-        entries = client.fetch_entry(word, lang)
-        entries_json = json.dumps(
-            [asdict(e) for e in entries], 
-            indent=2,ensure_ascii=False
-        ) 
-    elif form == "jsonld":
-        entries = client.fetch_jsonld(word, lang)
-        # context = entries.pop("@context")
-        # entries = jsonld.expand(entries, context)
-        entries_json = json.dumps(entries,  indent=2,ensure_ascii=False)
-    else: 
-        raise ValueError(f"Unknown format: {form}")
+    from wiktionary.en.templates.records import json_default
+
+    with _open_client(cache, cache_path, offline) as client:
+        if form == "json":
+            entries = client.fetch_entry(word, lang)
+            entries_json = json.dumps(
+                [e.to_dict() for e in entries],
+                indent=2,ensure_ascii=False, default=json_default
+            )
+        elif form == "jsonld":
+            entries = client.fetch_jsonld(word, lang)
+            entries_json = json.dumps(entries,  indent=2,ensure_ascii=False, default=json_default)
+        else:
+            raise ValueError(f"Unknown format: {form}")
 
     print(entries_json)
 
     return entries
 
 
+@app.command("batch")
+def batch(
+    source: str = typer.Argument("-", help="File with a word (& language) per line, or `-` for stdin"),
+    lang: Optional[str] = typer.Option(None, help="Language of the lines that don't say"),
+    wiki: str = "en",
+    form: str = "json",
+    ordered: bool = typer.Option(True, "--ordered/--unordered", help="Write the results in the input order (or as they're ready)"),
+    cache: bool = typer.Option(False, help="Keep fetched wikitext in a local cache (see `--cache-path`)"),
+    cache_path: Optional[str] = typer.Option(None, help="Cache file (default: ~/.cache/wiktionary/wikitext.sqlite)"),
+    offline: bool = typer.Option(False, help="Only use cached wikitext (never touch the network)"),
+    concurrency: int = typer.Option(8, help="Max. requests in flight"),
+    progress: bool = typer.Option(True, help="Show progress (on stderr)"),
+):
+    """Looks up many words at once (see `wiktionary.batch`), writing one JSON line per word to stdout."""
+    import sys
+    import time
+
+    from tqdm import tqdm
+
+    from wiktionary.batch import read_requests, run_batch
+    from wiktionary.http import HTTPOptions
+
+    if wiki != "en":
+        raise NotImplementedError("Non-English wiktionaries are not supported yet.")
+
+    lines = sys.stdin if source == "-" else open(source, encoding="utf-8")  # pylint: disable=consider-using-with
+
+    try:
+        with _open_client(cache, cache_path, offline, http=HTTPOptions(max_concurrency=concurrency)) as client:
+            requests = tqdm(read_requests(lines, lang), unit="words", disable=not progress)
+            stats = run_batch(client, requests, sys.stdout, form, ordered)
+    finally:
+        if lines is not sys.stdin:
+            lines.close()
+
+    elapsed = time.monotonic() - stats.started
+    typer.echo(
+        f"{stats.requests} words ({stats.pages} pages) -> {stats.found} found, {stats.errors} errors "
+        f"in {elapsed:.1f}s ({stats.throughput:.1f} words/s, {client.stats.requests} requests)",
+        err=True,
+    )
+
+
+@app.command("dump")
+def dump(
+    path: str,
+    lang: str,
+    out: str = "out",
+    wiki: str = "en",
+    workers: Optional[int] = typer.Option(None, help="Worker processes (default: # of cores)"),
+    chunk_size: int = typer.Option(256, help="Pages per worker task"),
+    max_pending: Optional[int] = typer.Option(None, help="Max chunks in flight (default: 4 * workers)"),
+    shard_size: int = typer.Option(100_000, help="Max entries per output shard"),
+):
+    """Converts a `pages-articles.xml.bz2` dump into sharded JSONL under `out`."""
+    if wiki != "en":
+        raise NotImplementedError("Non-English wiktionaries are not supported yet.")
+
+    from wiktionary.pipeline import PipelineOptions, convert_dump
+
+    opts = PipelineOptions(
+        chunk_size=chunk_size, max_pending=max_pending, shard_size=shard_size
+    )
+    if workers:
+        opts.workers = workers
+
+    stats = convert_dump(path, lang, out, opts)
+
+    typer.echo(
+        f"{stats.pages} pages -> {stats.entries} entries in {len(stats.shards)} shards ({stats.errors} errors)",
+        err=True,
+    )
+
+
+@app.command("columnar")
+def columnar(
+    shards: str,
+    out: str,
+    row_group_size: int = typer.Option(100_000, help="Rows per Parquet row group"),
+):
+    """Flattens the JSONL shards written by `dump` into Parquet tables under `out` (needs `pyarrow`)."""
+    from wiktionary.columnar import export_entries
+    from wiktionary.pipeline import iter_shards
+
+    stats = export_entries(iter_shards(shards), out, row_group_size)
+
+    typer.echo(
+        f"{stats.entries} entries -> {stats.definitions} definitions, {stats.pronunciations} "
+        f"pronunciations, {stats.definition_triples} triples",
+        err=True,
+    )
+
+
+@app.command("store")
+def store(
+    shards: str,
+    path: str,
+    serializer: str = typer.Option("msgpack", help="How to serialize records: msgpack or json"),
+    codec: str = typer.Option("zstd", help="How to compress records: zstd or zlib"),
+):
+    """Builds a local dictionary file (see `wiktionary.local`) from the JSONL shards written by `dump`."""
+    from wiktionary.local import build_local_dictionary
+    from wiktionary.pipeline import iter_shards
+
+    stats = build_local_dictionary(iter_shards(shards), path, serializer=serializer, codec=codec)
+
+    typer.echo(
+        f"{stats.words} words ({stats.entries} entries) in {stats.size / 1e6:.1f}MB "
+        f"({stats.ratio:.1f}x compressed)",
+        err=True,
+    )
+
+
+@app.command("headwords")
+def headwords(shards: str, path: str):
+    """Builds a headword index (see `wiktionary.search`) from the JSONL shards written by `dump`."""
+    from wiktionary.pipeline import iter_shards
+    from wiktionary.search import build_headword_index
+
+    index = build_headword_index((entry["word"], entry["lang"]) for entry in iter_shards(shards))
+    index.save(path)
+
+    typer.echo(f"{len(index)} headwords in {len(index.languages)} languages", err=True)
+
+
+@app.command("search")
+def search(
+    path: str,
+    lang: str,
+    query: str,
+    fuzzy: int = typer.Option(0, help="Allow this many typos"),
+    limit: int = typer.Option(10, help="How many results"),
+):
+    """Looks up headwords in an index built by `headwords`: by prefix, with typos (`--fuzzy`) or wildcards (`?`, `*`)."""
+    from wiktionary.search import HeadwordIndex
+
+    index = HeadwordIndex.load(path)
+
+    if fuzzy:
+        results = [word for word, _ in index.fuzzy(query, lang, fuzzy, limit)]
+    elif "?" in query or "*" in query:
+        results = index.match(query, lang, limit)
+    else:
+        results = index.complete(query, lang, limit)
+
+    typer.echo("\n".join(results))
+
+
+@app.command("translations")
+def translations(
+    shards: Optional[str] = typer.Argument(None, help="The JSONL shards written by `dump` (not needed with `--delta`)"),
+    path: Optional[str] = typer.Argument(None),
+    delta: Optional[str] = typer.Option(None, help="Apply this delta (from `update`) to the index at `path` instead"),
+):
+    """Builds a reverse translation index (see `wiktionary.translations`) from the JSONL shards written by `dump`."""
+    from wiktionary.pipeline import iter_shards
+    from wiktionary.translations import build_translation_index, read_deltas, update_translation_index
+
+    if delta and path is None:
+        # (`translations PATH --delta DELTA`: there are no shards to read)
+        shards, path = None, shards
+
+    if path is None:
+        raise typer.BadParameter("Missing the index path", param_hint="PATH")
+
+    if delta:
+        count = update_translation_index(path, read_deltas(delta))
+    else:
+        count = build_translation_index(iter_shards(shards), path)
+
+    typer.echo(f"{count} translations", err=True)
+
+
+@app.command("load")
+def load(
+    shards: str,
+    database: str,
+    source: Optional[str] = typer.Option(None, help="Name for this load, to resume it (default: `shards`)"),
+    batch_size: int = typer.Option(5_000, help="Rows per transaction"),
+):
+    """Loads the JSONL shards written by `dump` into a SQLite `database` with the app's schema."""
+    import sqlite3
+
+    from wiktionary.db import create_indexes, create_tables, load_entries, resolve_triples
+    from wiktionary.pipeline import iter_shards
+
+    conn = sqlite3.connect(database)
+    create_tables(conn)
+    stats = load_entries(conn, iter_shards(shards), source or shards, batch_size)
+    create_indexes(conn)
+    triples = resolve_triples(conn)
+    conn.close()
+
+    typer.echo(
+        f"{stats.words} words ({stats.resumed} entries already loaded): {stats.definitions} "
+        f"definitions, {stats.pronunciations} pronunciations, {triples} triples",
+        err=True,
+    )
+
+
+@app.command("rdf")
+def rdf(
+    path: str,
+    lang: str,
+    out: str,
+    quads: bool = typer.Option(False, help="Write N-Quads (with each triple's page as its graph)"),
+):
+    """Streams a `pages-articles.xml.bz2` dump into N-Triples (`.nt`, `.nt.gz`, `.nt.zst`)."""
+    from wiktionary.rdf import export_dump
+
+    stats = export_dump(path, lang, out, quads=quads)
+
+    typer.echo(f"{stats.pages} pages -> {stats.triples} triples ({stats.errors} errors)", err=True)
+
+
+@app.command("graph")
+def graph(dump_path: str, lang: str, out: str):
+    """Builds the relation graph (see `wiktionary.graph`) of the `lang` entries in a dump, and saves it to `out`."""
+    from wiktionary.graph import build_graph
+
+    relation_graph = build_graph(dump_path, lang)
+    relation_graph.save(out)
+
+    typer.echo(f"{len(relation_graph)} words, {relation_graph.edges} edges", err=True)
+
+
+@app.command("profile")
+def profile(
+    source: str,
+    lang: str,
+    cache: bool = typer.Option(False, help="`source` is a wikitext cache (see `wiktionary.cache`), not a dump"),
+    limit: Optional[int] = typer.Option(None, help="Only profile this many pages"),
+    top: int = typer.Option(20, help="How many of each to report"),
+    json_out: Optional[str] = typer.Option(None, "--json", help="Also write all counts & timings here"),
+):
+    """Parses a sample of pages, counting templates & sections (mapped or not) and timing their handlers."""
+    from itertools import islice
+
+    from tqdm import tqdm
+
+    from wiktionary.cache import WikitextCache
+    from wiktionary.dump import iter_dump_pages
+    from wiktionary.profiler import profile_pages
+
+    if cache:
+        pages = WikitextCache(source).iter_pages("en")
+    else:
+        pages = iter_dump_pages(source)
+
+    profiler = profile_pages(tqdm(islice(pages, limit), unit="pages"), lang)
+
+    if json_out:
+        with open(json_out, "w", encoding="utf-8") as f:
+            f.write(profiler.to_json())
+
+    typer.echo(profiler.report(top))
+
+
+@app.command("seed")
+def seed(
+    path: str,
+    state: str,
+    lang: str,
+    since: Optional[str] = typer.Option(None, help="When the dump was made (ISO 8601), to pick up changes from there"),
+):
+    """Records which revisions a dump (that you've exported with `dump`) contains, for `update`."""
+    from wiktionary.incremental import IncrementalState, seed_state
+
+    with IncrementalState(state) as incremental_state:
+        count = seed_state(incremental_state, path, [lang], since=since)
+
+    typer.echo(f"{count} pages recorded", err=True)
+
+
+@app.command("update")
+def update(
+    state: str,
+    lang: str,
+    out: str = typer.Option("delta.jsonl", help="Where to write the upserts & deletes"),
+    changes: Optional[str] = typer.Option(None, help="File of changed titles (default: the API's recent changes)"),
+    since: Optional[str] = typer.Option(None, help="Recent changes since (ISO 8601; default: the last update)"),
+    cache_path: Optional[str] = typer.Option(None, help="Wikitext cache file"),
+):
+    """Writes the changes since the last export (or `update`) as a delta."""
+    from wiktionary.incremental import IncrementalState, read_changes, refresh, refresh_recent_changes
+
+    with _open_client(True, cache_path) as client, IncrementalState(state) as incremental_state:
+        if changes:
+            stats = refresh(client, incremental_state, read_changes(changes), [lang], out)
+        else:
+            stats = refresh_recent_changes(client, incremental_state, [lang], out, since=since)
+
+    typer.echo(
+        f"{stats.changes} changed pages ({stats.fetched} fetched): "
+        f"{stats.upserts} upserts, {stats.deletes} deletes ({stats.errors} errors)",
+        err=True,
+    )
+
+
 if __name__ == "__main__":
-    typer.run(main)
+    app()
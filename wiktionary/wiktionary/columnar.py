@@ -0,0 +1,365 @@
+"""
+# Columnar export
+
+Nested JSON (`EnEntry.to_dict()`) is a pain to analyze: pandas ends up with a column of
+dicts of lists of dicts, and loading it takes forever. This flattens entries into four
+normalized tables that mirror the models in [the app's schema](/app/prisma/schema.prisma),
+written as [Parquet](https://parquet.apache.org/):
+
+| Table | Model | One row per |
+| --- | --- | --- |
+| `entries` | `Entry` | word & language (& etymology) |
+| `definitions` | `Definition` | sense |
+| `pronunciations` | `Pronunciation` | IPA transcription |
+| `definition_triples` | `DefinitionTriple` | relationship to another word (see `rdf.template_relations`) |
+
+Where they differ from the schema:
+
+- A word can have more than one etymology (and so, more than one `EnEntry`), so rows carry
+  an `etymology` number.
+- We don't know which *sense* of the other word a relationship points to, so the object
+  of a triple is a word & language, rather than a definition. Its subject is a definition
+  if the relationship is on a definition's line, and the word itself otherwise.
+- Ids are deterministic (a hash of the row's unique key), so the same export gives the same ids.
+
+Low-cardinality columns (language, part of speech, predicate, template) are dictionary-encoded,
+so they load as `pd.Categorical`. Rows are buffered and written `row_group_size` at a time,
+so memory stays flat, and readers can skip row groups they don't need.
+
+```python
+with ColumnarWriter("out/") as writer:
+    for entry in iter_shards("shards/"):
+        writer.add(entry)
+
+pd.read_parquet("out/definitions.parquet", columns=["word", "partOfSpeech", "text"])
+```
+
+Needs [pyarrow](https://arrow.apache.org/docs/python/) (`pip install pyarrow`).
+"""
+
+import hashlib
+from collections.abc import Mapping
+from dataclasses import dataclass, field, is_dataclass
+from pathlib import Path
+from typing import Any, Generator, Iterable
+
+from wiktionary.rdf import template_relations
+from wiktionary.utils import to_snake_case
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover
+    pa = pq = None
+
+#: Column types. `category` columns are dictionary-encoded strings
+TABLES: dict[str, dict[str, str]] = {
+    "entries": {
+        "word": "string",
+        "language": "category",
+        "etymology": "int16",
+        "rank": "int32",  # By word frequency (which we don't know yet)
+    },
+    "definitions": {
+        "id": "string",
+        "word": "string",
+        "language": "category",
+        "etymology": "int16",
+        "partOfSpeech": "category",
+        "rank": "int32",  # Within word & language & part of speech
+        "headline": "string",
+        "text": "string",
+    },
+    "pronunciations": {
+        "id": "string",
+        "defId": "string",
+        "word": "string",
+        "language": "category",
+        "etymology": "int16",
+        "broad": "string",
+        "narrow": "string",
+        "description": "string",
+    },
+    "definition_triples": {
+        "word": "string",
+        "language": "category",
+        "etymology": "int16",
+        #: The definition whose line the relationship is on (if any)
+        "subjectId": "string",
+        "partOfSpeech": "category",
+        #: The section the relationship is in (e.g., `synonyms`, or `etymology`)
+        "section": "category",
+        "predicate": "category",
+        #: If `True`, the object is the subject (e.g., the "Hyponyms" of a word)
+        "inverse": "bool_",
+        "objectWord": "string",
+        "objectLanguage": "category",
+        #: The template the relationship came from
+        "template": "category",
+    },
+}
+
+#: Sections that don't have definitions (but may have relationships)
+_SECTION_TITLES = {
+    to_snake_case(title): title
+    for title in ("Synonyms", "Antonyms", "Hypernyms", "Hyponyms", "Meronyms", "Holonyms",
+                  "Troponyms", "Coordinate terms", "Derived terms", "Related terms",
+                  "Collocations", "Descendants", "Translations", "Anagrams")
+}
+
+
+#: Templates (in an etymology) that relate the word to another
+_ETYMOLOGY_TEMPLATES = {
+    "derived", "borrowed", "learned_borrowing", "orthographic_borrowing", "calque",
+    "backFormation", "shortFor", "cognate", "noncognate", "doublet", "root", "compound", "mention",
+}
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("The columnar export needs `pyarrow`: `pip install pyarrow`")
+
+
+def _arrow_type(kind: str):
+    if kind == "category":
+        return pa.dictionary(pa.int32(), pa.string())
+    return getattr(pa, kind)()
+
+
+def schema(table: str):
+    """The Arrow schema of one of the `TABLES`"""
+    _require_pyarrow()
+    return pa.schema([(name, _arrow_type(kind)) for name, kind in TABLES[table].items()])
+
+
+def row_id(*key: Any) -> str:
+    """A deterministic id for the row with unique `key` (e.g., word, language, part of speech, rank)"""
+    return hashlib.blake2b(
+        "\0".join(map(str, key)).encode("utf-8"), digest_size=10
+    ).hexdigest()
+
+
+def part_of_speech(pos: str) -> str:
+    """`proper_noun` -> `PROPER_NOUN` (as in the schema's `PartOfSpeech`)"""
+    return pos.upper()
+
+
+#: A row of one of the `TABLES`
+Row = tuple[str, dict[str, Any]]
+
+
+class EntryFlattener:
+    """Turns entries (`EnEntry`s, or their `to_dict()`s) into rows of the `TABLES`.
+
+    Etymology numbers and ranks count up per word & language, so a word's entries
+    (i.e., etymologies) should come one after the other.
+    """
+
+    def __init__(self):
+        self._word: tuple[str, str] | None = None
+        self._etymology = -1
+        self._ranks: dict[str, int] = {}
+
+    def rows(self, entry: Any) -> Generator[Row, None, None]:
+        if is_dataclass(entry):
+            entry = entry.to_dict()
+
+        word, lang = entry["word"], entry["lang"]
+
+        if self._word != (word, lang):
+            self._word = (word, lang)
+            self._etymology = -1
+            self._ranks.clear()
+
+        self._etymology += 1
+        key = {"word": word, "language": lang, "etymology": self._etymology}
+
+        yield "entries", key
+        seen = set()
+
+        def relations(templates: Iterable, section: str | None = None, kinds=None, **subject):
+            for template in templates or ():
+                # (Parsed templates are dicts, or records, see `wiktionary.en.templates.records`)
+                if not isinstance(template, Mapping) or "@id" not in template:
+                    continue
+                if kinds is not None and template["@id"] not in kinds:
+                    continue
+
+                relation_section = _SECTION_TITLES.get(section)
+
+                for relation, object_lang, object_word in template_relations(template, relation_section):
+                    row = {
+                        "section": section,
+                        "predicate": relation.predicate if relation else None,
+                        "inverse": relation.inverse if relation else False,
+                        "objectWord": object_word,
+                        "objectLanguage": object_lang,
+                        "template": template["@id"],
+                    }
+                    # Pages with multiple etymologies repeat their POS's sections at the entry level
+                    if not subject and tuple(row.values()) in seen:
+                        continue
+                    seen.add(tuple(row.values()))
+
+                    yield "definition_triples", {**key, **subject, **row}
+
+        if isinstance(entry.get("etymology"), list):
+            # (With multiple etymologies, this is *everything* under "Etymology N")
+            yield from relations(entry["etymology"], "etymology", kinds=_ETYMOLOGY_TEMPLATES)
+
+        yield from self._pronunciations(key, entry.get("pronunciations") or [])
+
+        definitions = [d for d in entry.get("definitions") or [] if isinstance(d, dict)]
+
+        for definition in definitions:
+            if "def" not in definition:
+                continue
+
+            pos = part_of_speech(definition["@id"])
+            headline = definition["def"].get("headline")
+
+            for item in definition["def"].get("items", []):
+                rank = self._ranks[pos] = self._ranks.get(pos, -1) + 1
+                def_id = row_id(word, lang, pos, rank)
+
+                yield "definitions", {
+                    **key, "id": def_id, "partOfSpeech": pos, "rank": rank,
+                    "headline": headline, "text": item.get("text"),
+                }
+                yield from relations(item.get("links"), subjectId=def_id, partOfSpeech=pos)
+
+            for subsection, value in definition.items():
+                if isinstance(value, dict) and subsection in _SECTION_TITLES:
+                    yield from relations(value.get("linked"), subsection, partOfSpeech=pos)
+
+        for definition in definitions:
+            if "def" not in definition:
+                yield from relations(definition.get("linked"), definition.get("@id"))
+
+    def _pronunciations(self, key: dict, pronunciations: list) -> Generator[Row, None, None]:
+        i = 0
+
+        for group in pronunciations:
+            # e.g., `* {{a|UK}} {{IPA|en|/ˈwɔːtə/}}`
+            templates = group if isinstance(group, list) else [group]
+            dialects = [
+                dialect for t in templates if isinstance(t, Mapping) and t.get("@id") == "dialect"
+                for dialect in t.get("dialects", [])
+            ]
+
+            for template in templates:
+                if not isinstance(template, Mapping) or template.get("@id") != "ipa":
+                    continue
+
+                for pronunciation in template.get("pronunciations", []):
+                    ipa = pronunciation.get("ipa")
+                    if not ipa:
+                        continue
+
+                    description = ", ".join(filter(None, [*dialects, pronunciation.get("qualifier")]))
+
+                    yield "pronunciations", {
+                        **key,
+                        "id": row_id(key["word"], key["language"], key["etymology"], i),
+                        "broad": None if ipa.startswith("[") else ipa,
+                        "narrow": ipa if ipa.startswith("[") else None,
+                        "description": description or None,
+                    }
+                    i += 1
+
+
+@dataclass
+class ColumnarStats:
+    entries: int = 0
+    definitions: int = 0
+    pronunciations: int = 0
+    definition_triples: int = 0
+    row_groups: int = 0
+
+
+@dataclass
+class _Buffer:
+    columns: dict[str, list] = field(default_factory=dict)
+    rows: int = 0
+
+
+class ColumnarWriter:
+    """Writes entries (see `EntryFlattener`) into the `TABLES`, as Parquet files in `out_dir`."""
+
+    def __init__(
+        self,
+        out_dir: str | Path,
+        row_group_size: int = 100_000,
+        compression: str = "zstd",
+    ):
+        _require_pyarrow()
+
+        self.out_dir = Path(out_dir)
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        self.row_group_size = row_group_size
+        self.stats = ColumnarStats()
+
+        self._schemas = {table: schema(table) for table in TABLES}
+        self._buffers = {
+            table: _Buffer({name: [] for name in columns})
+            for table, columns in TABLES.items()
+        }
+        self._writers = {
+            table: pq.ParquetWriter(
+                self.out_dir / f"{table}.parquet", self._schemas[table], compression=compression
+            )
+            for table in TABLES
+        }
+        self._flattener = EntryFlattener()
+
+    def _append(self, table: str, row: dict[str, Any]):
+        buffer = self._buffers[table]
+
+        for name, values in buffer.columns.items():
+            values.append(row.get(name))
+
+        buffer.rows += 1
+        setattr(self.stats, table, getattr(self.stats, table) + 1)
+
+        if buffer.rows >= self.row_group_size:
+            self._flush(table)
+
+    def _flush(self, table: str):
+        buffer = self._buffers[table]
+
+        if not buffer.rows:
+            return
+
+        batch = pa.Table.from_pydict(buffer.columns, schema=self._schemas[table])
+        self._writers[table].write_table(batch, row_group_size=self.row_group_size)
+        self.stats.row_groups += 1
+
+        for values in buffer.columns.values():
+            values.clear()
+        buffer.rows = 0
+
+    def add(self, entry: Any):
+        for table, row in self._flattener.rows(entry):
+            self._append(table, row)
+
+    def close(self):
+        for table, writer in self._writers.items():
+            self._flush(table)
+            writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+
+def export_entries(
+    entries: Iterable[Any], out_dir: str | Path, row_group_size: int = 100_000
+) -> ColumnarStats:
+    """Writes `entries` (e.g., from `pipeline.iter_shards`) to Parquet files in `out_dir`"""
+    with ColumnarWriter(out_dir, row_group_size) as writer:
+        for entry in entries:
+            writer.add(entry)
+
+    return writer.stats
@@ -0,0 +1,434 @@
+"""
+# Database
+
+Loads parsed entries into the app's database (the `Entry`, `Definition`, `Pronunciation`,
+`Predicate` and `DefinitionTriple` tables of [the schema](/app/prisma/schema.prisma)).
+
+Rows come from `columnar.EntryFlattener` (so they're the same rows, with the same ids, as
+in the Parquet export), and go in `batch_size` at a time with `executemany` (which MySQL
+drivers turn into multi-row `INSERT`s). It works with any DB-API connection that uses
+`?` or `%s` placeholders, e.g., `sqlite3` (to try things out locally) or `MySQLdb`.
+
+```python
+conn = sqlite3.connect("dictionary.sqlite")
+create_tables(conn)  # Skip this if Prisma made the tables (`prisma db push`)
+load_entries(conn, iter_shards("out/"), source="en")
+create_indexes(conn)
+resolve_triples(conn)
+```
+
+Or `python -m wiktionary.cli load out/ dictionary.sqlite`.
+
+A few things to know:
+
+- **Ids** are deterministic (see `columnar.row_id`), so loading the same entries twice gives
+  the same ids, and `Definition`s satisfy `@@unique([word, language, partOfSpeech, rank])`
+  by construction. `Entry.rank` is supposed to be by word frequency, which we don't know,
+  so for now, it's the order words were loaded in.
+- **Indexes**: `create_tables` only creates primary keys. Secondary (and unique) indexes
+  are cheaper to build once at the end (`create_indexes`) than to maintain row by row.
+- **Resuming**: every batch is committed along with how far into `source` we got, and
+  batches only ever end between words. If a load dies, run it again with the same
+  `source`, and it picks up where it left off.
+- **Triples**: a relationship points to a *word* ("water" is a hypernym of "ice"), but
+  `DefinitionTriple` relates two *definitions*, and the other word may not even be loaded yet.
+  So triples wait in a `_PendingTriple` table until `resolve_triples` links them to the first
+  sense with the same part of speech of the other word. It can be run again after loading
+  another language (e.g., to link up translations).
+- Definitions whose part of speech isn't in the schema's `PartOfSpeech` (e.g., "Han character")
+  are skipped, as are relationships the app has no `Predicate` for (e.g., etymologies).
+- We don't parse example sentences yet, so `Sentence`s and `SentenceTriple`s are left alone.
+
+"""
+
+import sys
+from dataclasses import dataclass, is_dataclass
+from datetime import datetime, timezone
+from typing import Any, Iterable
+
+from wiktionary.columnar import EntryFlattener, part_of_speech
+from wiktionary.en.constants import MORPHEMES, PARTS_OF_SPEECH, PHRASES, SYMBOLS_AND_CHARS
+
+#: The schema's `Language` enum
+LANGUAGES = ("en", "de", "es", "fr", "it", "ja", "ko", "pt", "ru", "zh")
+
+#: The schema's `PartOfSpeech` enum
+PARTS_OF_SPEECH_ENUM = frozenset(
+    part_of_speech(pos) for pos in (*PARTS_OF_SPEECH, *MORPHEMES, *SYMBOLS_AND_CHARS, *PHRASES)
+)
+
+#: The `Predicate`s for relationships between definitions (same as `app/prisma/seed.js`)
+PREDICATES = (
+    "SYNONYM", "ANTONYM", "HYPERNYM", "HYPONYM", "MERONYM", "HOLONYM", "TROPONYM",
+    "COORDINATE_TERM", "DERIVED_TERM", "RELATED_TERM", "COLLOCATION", "DESCENDANT",
+    "TRANSLATION", "ANAGRAM",
+)
+
+# NOTE: `rank` is a reserved word in MySQL 8, so we quote identifiers (SQLite accepts backticks too)
+TABLES = {
+    "Entry": """
+        `word` VARCHAR(191) NOT NULL,
+        `language` VARCHAR(191) NOT NULL,
+        `createdAt` DATETIME(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        `updatedAt` DATETIME(3) NOT NULL,
+        `rank` INTEGER NOT NULL,
+        PRIMARY KEY (`word`, `language`)
+    """,
+    "Definition": """
+        `id` VARCHAR(191) NOT NULL PRIMARY KEY,
+        `word` VARCHAR(191) NOT NULL,
+        `language` VARCHAR(191) NOT NULL,
+        `partOfSpeech` VARCHAR(191) NOT NULL,
+        `rank` INTEGER NOT NULL,
+        `createdAt` DATETIME(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        `updatedAt` DATETIME(3) NOT NULL
+    """,
+    "Pronunciation": """
+        `id` VARCHAR(191) NOT NULL PRIMARY KEY,
+        `defId` VARCHAR(191) NULL,
+        `sentenceId` VARCHAR(191) NULL,
+        `word` VARCHAR(191) NOT NULL,
+        `language` VARCHAR(191) NOT NULL,
+        `broad` VARCHAR(191) NULL,
+        `narrow` VARCHAR(191) NULL,
+        `coordinates` VARCHAR(191) NULL,
+        `hyphenation` VARCHAR(191) NULL,
+        `createdAt` DATETIME(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        `updatedAt` DATETIME(3) NOT NULL,
+        `description` VARCHAR(191) NULL
+    """,
+    "Predicate": """
+        `id` VARCHAR(191) NOT NULL PRIMARY KEY,
+        `name` VARCHAR(191) NOT NULL UNIQUE,
+        `createdAt` DATETIME(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        `updatedAt` DATETIME(3) NOT NULL
+    """,
+    "DefinitionTriple": """
+        `subjectId` VARCHAR(191) NOT NULL,
+        `objectId` VARCHAR(191) NOT NULL,
+        `predicateId` VARCHAR(191) NOT NULL,
+        `detail` VARCHAR(191) NULL,
+        `createdAt` DATETIME(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        `updatedAt` DATETIME(3) NOT NULL,
+        PRIMARY KEY (`subjectId`, `predicateId`, `objectId`)
+    """,
+}
+
+#: Our own bookkeeping (not part of the app's schema)
+LOADER_TABLES = {
+    "_PendingTriple": """
+        `subjectId` VARCHAR(191) NOT NULL,
+        `predicateId` VARCHAR(191) NOT NULL,
+        `objectWord` VARCHAR(191) NOT NULL,
+        `objectLanguage` VARCHAR(191) NOT NULL,
+        `partOfSpeech` VARCHAR(191) NOT NULL
+    """,
+    "_LoadCheckpoint": """
+        `source` VARCHAR(191) NOT NULL PRIMARY KEY,
+        `position` INTEGER NOT NULL
+    """,
+}
+
+INDEXES = [
+    "CREATE UNIQUE INDEX IF NOT EXISTS `Entry_rank_language_key` ON `Entry` (`rank`, `language`)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS `Definition_word_language_partOfSpeech_rank_key` "
+    "ON `Definition` (`word`, `language`, `partOfSpeech`, `rank`)",
+    "CREATE INDEX IF NOT EXISTS `Definition_word_language_idx` ON `Definition` (`word`, `language`)",
+    "CREATE INDEX IF NOT EXISTS `Definition_word_language_partOfSpeech_idx` "
+    "ON `Definition` (`word`, `language`, `partOfSpeech`)",
+    "CREATE INDEX IF NOT EXISTS `Pronunciation_word_language_idx` ON `Pronunciation` (`word`, `language`)",
+    "CREATE INDEX IF NOT EXISTS `Pronunciation_defId_idx` ON `Pronunciation` (`defId`)",
+    "CREATE INDEX IF NOT EXISTS `Pronunciation_sentenceId_idx` ON `Pronunciation` (`sentenceId`)",
+]
+
+
+def _placeholder(conn) -> str:
+    """`?` or `%s`, depending on the connection's driver"""
+    module = sys.modules.get(type(conn).__module__.split(".")[0])
+    paramstyle = getattr(module, "paramstyle", "qmark")
+
+    if paramstyle == "qmark":
+        return "?"
+    if paramstyle in ("format", "pyformat"):
+        return "%s"
+
+    raise ValueError(f"Unsupported paramstyle: {paramstyle}")
+
+
+def _insert(table: str, columns: tuple[str, ...], placeholder: str) -> str:
+    names = ", ".join(f"`{c}`" for c in columns)
+    values = ", ".join(placeholder for _ in columns)
+    return f"INSERT INTO `{table}` ({names}) VALUES ({values})"
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+
+
+def create_tables(conn):
+    """Creates the tables (with primary keys, but without secondary indexes, see `create_indexes`)"""
+    cursor = conn.cursor()
+
+    for table, columns in {**TABLES, **LOADER_TABLES}.items():
+        cursor.execute(f"CREATE TABLE IF NOT EXISTS `{table}` ({columns})")
+
+    conn.commit()
+
+
+def create_indexes(conn):
+    """Creates the schema's secondary & unique indexes (once everything is loaded)
+
+    NOTE: MySQL doesn't do `CREATE INDEX IF NOT EXISTS`, but there, Prisma makes the indexes.
+    """
+    cursor = conn.cursor()
+
+    for index in INDEXES:
+        cursor.execute(index)
+
+    conn.commit()
+
+
+def create_loader_tables(conn):
+    """Creates just our own bookkeeping tables (if Prisma made the rest)"""
+    cursor = conn.cursor()
+
+    for table, columns in LOADER_TABLES.items():
+        cursor.execute(f"CREATE TABLE IF NOT EXISTS `{table}` ({columns})")
+
+    conn.commit()
+
+
+def get_predicate(template: str, section: str | None) -> str | None:
+    """The `Predicate` for a relationship (from the section it's in, or else its template)"""
+    for name in (section, template):
+        if name and (predicate := name.upper().removesuffix("S")) in PREDICATES:
+            return predicate
+
+    return None
+
+
+@dataclass
+class LoadStats:
+    #: Entries (i.e., etymologies) read from the input, including the ones we skipped when resuming
+    entries: int = 0
+    #: Entries already loaded (in an earlier run)
+    resumed: int = 0
+    words: int = 0
+    definitions: int = 0
+    pronunciations: int = 0
+    #: Relationships waiting for `resolve_triples`
+    triples: int = 0
+    #: Definitions with a part of speech the schema doesn't know
+    skipped: int = 0
+    batches: int = 0
+
+
+class BulkLoader:
+    """See the module docstring. `add` entries in order, then `close` (or use as a context manager)."""
+
+    COLUMNS = {
+        "Entry": ("word", "language", "rank", "createdAt", "updatedAt"),
+        "Definition": ("id", "word", "language", "partOfSpeech", "rank", "createdAt", "updatedAt"),
+        "Pronunciation": (
+            "id", "word", "language", "broad", "narrow", "description", "createdAt", "updatedAt"
+        ),
+        "_PendingTriple": ("subjectId", "predicateId", "objectWord", "objectLanguage", "partOfSpeech"),
+    }
+
+    def __init__(self, conn, source: str = "default", batch_size: int = 5_000):
+        self.conn = conn
+        self.source = source
+        self.batch_size = batch_size
+        self.stats = LoadStats()
+
+        placeholder = _placeholder(conn)
+        self._p = placeholder
+        self._inserts = {
+            table: _insert(table, columns, placeholder) for table, columns in self.COLUMNS.items()
+        }
+        self._rows: dict[str, list[tuple]] = {table: [] for table in self.COLUMNS}
+        self._pending = 0
+
+        self._flattener = EntryFlattener()
+        self._word: tuple[str, str] | None = None
+        #: The first definition of each part of speech of the current entry
+        self._first_senses: dict[str, str] = {}
+
+        cursor = conn.cursor()
+        cursor.execute(
+            f"SELECT `position` FROM `_LoadCheckpoint` WHERE `source` = {placeholder}", (source,)
+        )
+        row = cursor.fetchone()
+        self.position = row[0] if row else 0
+        #: Entries that are completely in the buffer (or the database)
+        self._done = self.position
+
+        cursor.execute("SELECT `language`, MAX(`rank`) FROM `Entry` GROUP BY `language`")
+        self._next_rank = {language: rank + 1 for language, rank in cursor.fetchall()}
+
+        self._ensure_predicates(cursor)
+        conn.commit()
+
+    def _ensure_predicates(self, cursor):
+        cursor.execute("SELECT `id` FROM `Predicate`")
+        existing = {row[0] for row in cursor.fetchall()}
+        now = _now()
+
+        cursor.executemany(
+            _insert("Predicate", ("id", "name", "createdAt", "updatedAt"), self._p),
+            [
+                # (Named the same way as in `seed.js`)
+                (predicate, predicate.lower().replace("_", " ", 1).capitalize(), now, now)
+                for predicate in PREDICATES if predicate not in existing
+            ],
+        )
+
+    def add(self, entry: Any):
+        """Adds the next entry (a word's entries, i.e., etymologies, should come one after the other)."""
+        self.stats.entries += 1
+
+        if self.stats.entries <= self.position:
+            self.stats.resumed += 1
+            return
+
+        if is_dataclass(entry):
+            entry = entry.to_dict()
+
+        word, lang = entry["word"], entry["lang"]
+
+        if lang not in LANGUAGES:
+            raise ValueError(f"{lang} isn't in the schema's `Language` enum")
+
+        if self._word != (word, lang):
+            # Only ever commit between words, so a resumed load starts with a fresh word
+            if self._pending >= self.batch_size:
+                self.flush()
+            self._word = (word, lang)
+
+        self._first_senses.clear()
+        now = _now()
+
+        for table, row in self._flattener.rows(entry):
+            if table == "entries" and row["etymology"] == 0:
+                rank = self._next_rank.get(lang, 0)
+                self._next_rank[lang] = rank + 1
+                self._append("Entry", (word, lang, rank, now, now))
+                self.stats.words += 1
+
+            elif table == "definitions":
+                if row["partOfSpeech"] not in PARTS_OF_SPEECH_ENUM:
+                    self.stats.skipped += 1
+                    continue
+
+                self._first_senses.setdefault(row["partOfSpeech"], row["id"])
+                self._append("Definition", (
+                    row["id"], word, lang, row["partOfSpeech"], row["rank"], now, now
+                ))
+                self.stats.definitions += 1
+
+            elif table == "pronunciations":
+                self._append("Pronunciation", (
+                    row["id"], word, lang, row["broad"], row["narrow"], row["description"], now, now
+                ))
+                self.stats.pronunciations += 1
+
+            elif table == "definition_triples":
+                predicate = get_predicate(row["template"], row["section"])
+                pos = row.get("partOfSpeech")
+                subject = row.get("subjectId") or self._first_senses.get(pos)
+
+                if (
+                    predicate and subject and pos in PARTS_OF_SPEECH_ENUM
+                    and row["objectLanguage"] in LANGUAGES
+                ):
+                    self._append("_PendingTriple", (
+                        subject, predicate, row["objectWord"], row["objectLanguage"], pos
+                    ))
+                    self.stats.triples += 1
+
+        self._done = self.stats.entries
+
+    def _append(self, table: str, row: tuple):
+        self._rows[table].append(row)
+        self._pending += 1
+
+    def flush(self):
+        """Writes everything buffered so far (and where we got to) in one transaction."""
+        cursor = self.conn.cursor()
+
+        try:
+            for table, rows in self._rows.items():
+                if rows:
+                    cursor.executemany(self._inserts[table], rows)
+
+            cursor.execute(
+                f"DELETE FROM `_LoadCheckpoint` WHERE `source` = {self._p}", (self.source,)
+            )
+            cursor.execute(
+                _insert("_LoadCheckpoint", ("source", "position"), self._p),
+                (self.source, self._done),
+            )
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+
+        for rows in self._rows.values():
+            rows.clear()
+        self._pending = 0
+        self.stats.batches += 1
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *_):
+        # Don't record a checkpoint past an entry that blew up
+        if exc_type is None:
+            self.close()
+
+
+def load_entries(
+    conn, entries: Iterable[Any], source: str = "default", batch_size: int = 5_000
+) -> LoadStats:
+    """Loads `entries` (e.g., from `pipeline.iter_shards`), resuming an earlier load of the same `source`."""
+    with BulkLoader(conn, source, batch_size) as loader:
+        for entry in entries:
+            loader.add(entry)
+
+    return loader.stats
+
+
+def resolve_triples(conn) -> int:
+    """Links pending relationships to the definitions they point to (if they've been loaded).
+
+    Returns the number of `DefinitionTriple`s created.
+    """
+    p = _placeholder(conn)
+    now = _now()
+    cursor = conn.cursor()
+    cursor.execute(
+        f"""
+        INSERT INTO `DefinitionTriple` (`subjectId`, `objectId`, `predicateId`, `createdAt`, `updatedAt`)
+        SELECT DISTINCT t.`subjectId`, d.`id`, t.`predicateId`, {p}, {p}
+        FROM `_PendingTriple` t
+        JOIN `Definition` d
+            ON d.`word` = t.`objectWord`
+            AND d.`language` = t.`objectLanguage`
+            AND d.`partOfSpeech` = t.`partOfSpeech`
+            AND d.`rank` = 0
+        WHERE NOT EXISTS (
+            SELECT 1 FROM `DefinitionTriple` e
+            WHERE e.`subjectId` = t.`subjectId`
+            AND e.`predicateId` = t.`predicateId`
+            AND e.`objectId` = d.`id`
+        )
+        """,
+        (now, now),
+    )
+    count = cursor.rowcount
+    conn.commit()
+
+    return count
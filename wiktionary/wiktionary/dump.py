@@ -0,0 +1,152 @@
+"""
+# Wiktionary dumps
+
+Going through the API one word at a time is fine for looking things up, but it takes
+weeks (and a lot of rate limiting) to get through all of Wiktionary that way.
+
+Instead, Wikimedia publishes [database dumps](https://dumps.wikimedia.org/enwiktionary/latest/).
+The one we want is `enwiktionary-latest-pages-articles.xml.bz2`, which contains the latest
+wikitext of every page. It's a few GB compressed (and a *lot* more uncompressed), so we never
+hold it in memory: we decompress incrementally, `iterparse` the XML, and clear every `<page>`
+element as soon as we're done with it.
+
+```python
+for title, entries in parse_dump("enwiktionary-latest-pages-articles.xml.bz2", "en"):
+    ...
+```
+
+"""
+
+import bz2
+import re
+from typing import IO, Generator
+from xml.etree.ElementTree import iterparse
+
+from tqdm import tqdm
+
+from wiktionary._types import LanguageCode
+from wiktionary.en.parser import EnEntry, EnParser
+from wiktionary.utils import ParsedPage, get_entry, get_full_lang
+
+#: Main namespace (i.e., actual entries rather than `Template:`, `Appendix:`, ...)
+NS_MAIN = 0
+
+
+def _local_name(tag: str) -> str:
+    """Strip the export namespace (`{http://www.mediawiki.org/xml/export-0.10/}page` -> `page`)"""
+    return tag.rsplit("}", 1)[-1]
+
+
+def open_dump(path: str) -> IO[bytes]:
+    """Open a (possibly bz2-compressed) dump for streaming reads."""
+    if path.endswith(".bz2"):
+        return bz2.open(path, "rb")
+    return open(path, "rb")
+
+
+def iter_dump_revisions(
+    dump: str | IO[bytes], namespaces: tuple[int, ...] = (NS_MAIN,)
+) -> Generator[tuple[str, int | None, str], None, None]:
+    """Yields `(title, revid, wikitext)` for every (non-redirect) page in `namespaces`.
+
+    Memory stays flat: each `<page>` is dropped from the tree once it has been read.
+    """
+    f = open_dump(dump) if isinstance(dump, str) else dump
+
+    try:
+        context = iterparse(f, events=("start", "end"))
+        _, root = next(context)
+
+        title, ns, revid, text, redirect = None, None, None, None, False
+        # `<id>`s show up for the page, its revision and the revision's contributor
+        in_revision, in_contributor = False, False
+
+        for event, elem in context:
+            tag = _local_name(elem.tag)
+
+            if event == "start":
+                if tag == "revision":
+                    in_revision = True
+                elif tag == "contributor":
+                    in_contributor = True
+                continue
+
+            if tag == "title":
+                title = elem.text
+            elif tag == "ns":
+                ns = int(elem.text)
+            elif tag == "id" and in_revision and not in_contributor and revid is None:
+                revid = int(elem.text)
+            elif tag == "contributor":
+                in_contributor = False
+            elif tag == "revision":
+                in_revision = False
+            elif tag == "redirect":
+                redirect = True
+            elif tag == "text":
+                text = elem.text or ""
+            elif tag == "page":
+                if ns in namespaces and not redirect and title is not None:
+                    yield title, revid, text or ""
+
+                title, ns, revid, text, redirect = None, None, None, None, False
+
+                # Everything we've seen so far hangs off the root; drop it.
+                root.clear()
+    finally:
+        if isinstance(dump, str):
+            f.close()
+
+
+def iter_dump_pages(
+    dump: str | IO[bytes], namespaces: tuple[int, ...] = (NS_MAIN,)
+) -> Generator[tuple[str, str], None, None]:
+    """Yields `(title, wikitext)` pairs for every (non-redirect) page in `namespaces`."""
+    for title, _, text in iter_dump_revisions(dump, namespaces):
+        yield title, text
+
+
+def has_entry(page: str, lang: LanguageCode) -> bool:
+    """Cheap check for a `==Language==` heading, so we only hand relevant pages to wikitextparser."""
+    return _entry_heading(lang).search(page) is not None
+
+
+_ENTRY_HEADINGS: dict[LanguageCode, re.Pattern] = {}
+
+
+def _entry_heading(lang: LanguageCode) -> re.Pattern:
+    if lang not in _ENTRY_HEADINGS:
+        _ENTRY_HEADINGS[lang] = re.compile(
+            rf"^==\s*{re.escape(get_full_lang(lang))}\s*==\s*$", re.MULTILINE
+        )
+    return _ENTRY_HEADINGS[lang]
+
+
+def parse_dump(
+    dump: str | IO[bytes],
+    lang: LanguageCode,
+    parser=EnParser,
+    progress: bool = True,
+) -> Generator[tuple[str, list[EnEntry]], None, None]:
+    """Streams `(title, entries)` for every page in `dump` with an entry in `lang`.
+
+    Pages that fail to parse are skipped (and counted in the progress bar).
+    Progress (incl. pages/sec) is reported on stderr.
+    """
+    pages = iter_dump_pages(dump)
+    errors = 0
+
+    with tqdm(pages, unit="pages", disable=not progress, smoothing=0.1) as bar:
+        for title, page in bar:
+            if not has_entry(page, lang):
+                continue
+
+            try:
+                parsed = ParsedPage(get_entry(page, lang))
+                entries = parser.parse(title, parsed.entry_sections(lang), lang, page=parsed)
+            except Exception:  # pylint: disable=broad-except
+                errors += 1
+                bar.set_postfix(errors=errors, refresh=False)
+                continue
+
+            yield title, entries
@@ -1 +1,8 @@
-from .parser import EnEntry
\ No newline at end of file
+def __getattr__(name: str):
+    # (Loaded on first use, so that importing, e.g., `wiktionary.en.constants` doesn't drag in the whole parser)
+    if name == "EnEntry":
+        from .parser import EnEntry  # pylint: disable=import-outside-toplevel
+
+        return EnEntry
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
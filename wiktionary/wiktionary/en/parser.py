@@ -3,38 +3,41 @@ from itertools import dropwhile
 import json
 import os
 from pathlib import Path
-from pprint import pp
+import time
 from typing import Any, Generator
-import warnings
 
 import wikitextparser as wtp
 from more_itertools import first_true
 #
+from wiktionary import profiler
 from wiktionary._types import LanguageCode
 from wiktionary.en.templates.parse import parse_templates
 from wiktionary.en.constants import AllowedPOSHeader, get_category,  ALLOWED_POS_HEADERS
-from wiktionary.utils import template_to_dict, transform_template_dict, to_snake_case
+from wiktionary.symbols import LANGUAGES, SECTIONS
+from wiktionary.utils import ListItem, ParsedPage, get_list_items, template_to_dict, transform_template_dict, to_snake_case
 
 
-@dataclass
+@dataclass(slots=True)
 class AltForm:
     word: dict
     qualifiers: dict
 
+    def to_dict(self) -> dict:
+        return {"word": self.word, "qualifiers": self.qualifiers}
+
 
 def parse_alt_forms(
-    section: wtp.Section, **_
+    section: wtp.Section, page: ParsedPage | None = None, **_
 ) -> list[AltForm]:
     """Parse an alternative forms section of wikitext."""
 
     def gen_alt_forms() -> Generator[AltForm, None, None]:
-        for ul in section.get_lists():
-            for li in ul.items:
-                templates = parse_templates(li)
-                yield AltForm(
-                    word=first_true(templates, pred=lambda x: x["@id"] == "link"),
-                    qualifiers=list(filter(lambda x: x["@id"] == "qualifier", templates)),
-                )
+        for li in get_list_items(section, page):
+            templates = parse_templates(li)
+            yield AltForm(
+                word=first_true(templates, pred=lambda x: x["@id"] == "link"),
+                qualifiers=list(filter(lambda x: x["@id"] == "qualifier", templates)),
+            )
 
     return list(gen_alt_forms())
 
@@ -42,18 +45,16 @@ def parse_alt_forms(
 
 def parse_etymology(section: wtp.Section, **_) -> list[dict]:
     """Parse an etymology section of wikitext."""
-    templates = parse_templates(section.contents)
+    templates = parse_templates(section)
 
     return templates
 
 
-def parse_pronunciation(section: wtp.Section, lang: LanguageCode) -> dict:
+def parse_pronunciation(section: wtp.Section, lang: LanguageCode, page: ParsedPage | None = None) -> dict:
     """Parse a pronunciation section of wikitext."""
     def gen_pronunciation():
-        for ul in section.get_lists():
-            pp(ul)
-            for li in ul.items:
-                yield parse_templates(li)
+        for li in get_list_items(section, page):
+            yield parse_templates(li)
 
     return list(gen_pronunciation())
 
@@ -62,13 +63,13 @@ def parse_pronunciation(section: wtp.Section, lang: LanguageCode) -> dict:
 def _parse_default(section: wtp.Section, lang: LanguageCode) -> dict:
     """Parse a section of wikitext."""    
     return {
-        "@id": to_snake_case(section.title),
-        "linked": parse_templates(section.contents)
+        "@id": SECTIONS.intern(to_snake_case(section.title)),
+        "linked": parse_templates(section)
     }
 
 def parse_default(section: wtp.Section, lang: LanguageCode) -> dict:
     """Parse a section of wikitext."""
-    warnings.warn(f"Using default processor: {section.title}")
+    profiler.count("unhandled sections", section.title)
     try:
         category = get_category(section.title)
     except ValueError:
@@ -81,47 +82,85 @@ def parse_default(section: wtp.Section, lang: LanguageCode) -> dict:
     }
 
 
-def parse_section(
-    section: wtp.Section, lang: LanguageCode = "en"
-) -> dict:
-    """Parse a section of wikitext."""
-    if section.title == "Alternative forms":
-        return parse_alt_forms(section, lang=lang)
-    elif section.title == "Etymology": # TODO: Support for multiple multiple_etymologies
+def section_handler(title: str) -> str:
+    """Which handler `parse_section` uses for a section (by title)"""
+    if title == "Alternative forms":
+        return "alt_forms"
+    elif title == "Etymology": # TODO: Support for multiple multiple_etymologies
+        return "etymology"
+    elif title == "Pronunciation":
+        return "pronunciation"
+    elif to_snake_case(title) in ALLOWED_POS_HEADERS:
+        return "definitions"
+    elif title.lower() in ("derived terms", "related terms", "collocations", "synonyms", "antonyms", "hyperonyms", "hyponyms", "collocations", "descendants", "translations", "anagrams"):
+        # Add support for converting any child links to the appropriate semantic link.
+        return "linked"
+
+    return "default"
+
+
+def _parse_section(section: wtp.Section, lang: LanguageCode, page: ParsedPage | None, title: str, handler: str) -> dict:
+    if handler == "alt_forms":
+        return parse_alt_forms(section, lang=lang, page=page)
+    elif handler == "etymology":
         return parse_etymology(section, lang=lang)
-    elif section.title == "Pronunciation":
-        return parse_pronunciation(section, lang=lang)
-    elif to_snake_case(section.title) in ALLOWED_POS_HEADERS:
+    elif handler == "pronunciation":
+        return parse_pronunciation(section, lang=lang, page=page)
+    elif handler == "definitions":
         return {
-            "@id": to_snake_case(section.title),
-            **parse_def_section(section, lang=lang)
+            "@id": SECTIONS.intern(to_snake_case(title)),
+            **parse_def_section(section, lang=lang, page=page)
         }
-    elif section.title.lower() in ("derived terms", "related terms", "collocations", "synonyms", "antonyms", "hyperonyms", "hyponyms", "collocations", "descendants", "translations", "anagrams"):
-        # Add support for converting any child links to the appropriate semantic link.
+    elif handler == "linked":
         return _parse_default(section, lang)
-    
 
     return parse_default(section, lang=lang)
 
 
-def parse_def_section(section: wtp.Section, lang: LanguageCode) -> list[dict]:
+def parse_section(
+    section: wtp.Section, lang: LanguageCode = "en", page: ParsedPage | None = None, title: str | None = None
+) -> dict:
+    """Parse a section of wikitext. (`title` overrides `section.title`)"""
+    title = title or section.title
+    handler = section_handler(title)
+
+    if profiler.active is None:
+        return _parse_section(section, lang, page, title, handler)
+
+    start = time.perf_counter()
+    result = _parse_section(section, lang, page, title, handler)
+    profiler.active.add_time("section handlers", handler, time.perf_counter() - start)
+    profiler.active.count("sections", title)
+
+    return result
+
+
+def parse_def_section(section: wtp.Section, lang: LanguageCode, page: ParsedPage | None = None) -> list[dict]:
 
     def parse_def_subsection(subsection: wtp.Section):
-        if to_snake_case(subsection.title) in ALLOWED_POS_HEADERS:
-            del subsection.title
-            section_start = subsection.contents.split("===", maxsplit=1)[0]
+        title = subsection.title
+
+        if to_snake_case(title) in ALLOWED_POS_HEADERS:
+            contents = subsection.contents
+            section_start = contents.split("===", maxsplit=1)[0]
             headline, section_start = section_start.split("\n", maxsplit=1)
 
-            lis = [
-                li for ul in wtp.parse(section_start).get_lists() 
-                for li in ul.items
-            ]
+            # The definitions are the list items between the headline and the first subsection
+            end = subsection.span[1] - len(contents) + len(headline) + 1 + len(section_start)
+            start = end - len(section_start)
+            lis = get_list_items(subsection, page)
+
+            if all(isinstance(li, ListItem) for li in lis):
+                lis = [li for li in lis if start <= li.span[0] and li.span[1] <= end]
+            else:
+                lis = get_list_items(wtp.parse(section_start))
 
+            # NOTE: wikitextparser can only give us plain text for something it parsed itself
             items = [
                 {
-                    "text": text, 
+                    "text": text,
                     "links": parse_templates(li)
-                } for li in lis if (text := wtp.parse(li).plain_text().strip())
+                } for li in lis if (text := wtp.parse(str(li)).plain_text().strip())
             ]
 
             return {
@@ -129,20 +168,22 @@ def parse_def_section(section: wtp.Section, lang: LanguageCode) -> list[dict]:
                 "headline": headline,
                 "items": items,
             }
-        if subsection.title == "Usage notes":
+        if title == "Usage notes":
             pass
-        elif subsection.title.lower() in ("derived terms", "related terms", "collocations", "synonyms", "antonyms", "hyperonyms", "hyponyms", "collocations", "descendants", "translations", "anagrams"):
+        elif title.lower() in ("derived terms", "related terms", "collocations", "synonyms", "antonyms", "hyperonyms", "hyponyms", "collocations", "descendants", "translations", "anagrams"):
             return _parse_default(subsection, lang)
 
-        warnings.warn(f"Definition section not processed: {subsection.title}")
+        profiler.count("unhandled definition sections", title)
+
+    subsections = section.sections if page is None else page.subsections(section)
 
     return {
-        res["@id"]: res for s in section.sections 
+        res["@id"]: res for s in subsections
         if s and s.title and (res := parse_def_subsection(s)) 
         and res.get("@id")
     }
 
-@dataclass
+@dataclass(slots=True)
 class EnEntry:
     word: str
     lang: LanguageCode
@@ -157,6 +198,23 @@ class EnEntry:
         default_factory=dict
     )  # dict[AllowedPOSHeader, POSDefinition]
 
+    def to_dict(self) -> dict:
+        """The same as `asdict(entry)`, but without (deep) copying everything.
+
+        The parsed sections are already plain dicts & lists, so they're shared rather than
+        copied: copy before changing them if you still need the entry.
+        """
+        return {
+            "word": self.word,
+            "lang": self.lang,
+            "alt_forms": [alt_form.to_dict() for alt_form in self.alt_forms],
+            "etymology": self.etymology,
+            "pronunciations": self.pronunciations,
+            "glyph_origin": self.glyph_origin,
+            "description": self.description,
+            "definitions": self.definitions,
+        }
+
 
 
 class EnParser:
@@ -201,10 +259,14 @@ class EnParser:
 
 
     @classmethod
-    def _parse(cls, word: str, sections: list[wtp.Section], lang: LanguageCode) -> EnEntry:
+    def _parse(
+        cls, word: str, sections: list[wtp.Section], lang: LanguageCode,
+        page: ParsedPage | None = None, titles: list[str] | None = None
+    ) -> EnEntry:
+        titles = titles or [s.title for s in sections]
         data = {
-            s.title: parse_section(s, lang)
-            for s in sections
+            title: parse_section(s, lang, page=page, title=title)
+            for s, title in zip(sections, titles)
         }
         alt_forms = data.pop("Alternative forms", [])
         etymology = data.pop("Etymology", "")
@@ -214,7 +276,7 @@ class EnParser:
 
         return EnEntry(
             word=word,
-            lang=lang,
+            lang=LANGUAGES.intern(lang),
             alt_forms=alt_forms,
             etymology=etymology,
             pronunciations=pronunciations,
@@ -224,29 +286,36 @@ class EnParser:
         )
 
     @classmethod
-    def parse(cls, word: str, sections: list[wtp.Section], lang: LanguageCode) -> list[EnEntry]:
-        """This returns a list of entries (one for each etymology). Often, there will be only one etymology, and thus only one entry."""       
-        
+    def parse(
+        cls, word: str, sections: list[wtp.Section], lang: LanguageCode, page: ParsedPage | None = None
+    ) -> list[EnEntry]:
+        """This returns a list of entries (one for each etymology). Often, there will be only one etymology, and thus only one entry.
+
+        If `sections` come from a `ParsedPage`, pass it along as `page` to save wikitextparser from re-deriving the page's structure.
+        """
+        titles = [s.title for s in sections]
         multiple_etymologies = [
-            s for s in sections if s.title.startswith("Etymology ")
+            s for s, title in zip(sections, titles) if title.startswith("Etymology ")
         ]
 
         if multiple_etymologies:
             other_sections = [
-                s for s in sections if not s.title.startswith("Etymology ")
+                s for s, title in zip(sections, titles) if not title.startswith("Etymology ")
             ]
+            other_titles = [title for title in titles if not title.startswith("Etymology ")]
             
             def parse_multiple():
                 for etymology in multiple_etymologies:
                     # The first subsection is always (hopefully) `None`
-                    subsections = etymology.sections[1:]
-                    subsections[0].title = "Etymology"  
+                    subsections = etymology.sections[1:] if page is None else page.subsections(etymology)
+                    # The etymology section itself is parsed as a plain "Etymology"
+                    subtitles = ["Etymology", *(s.title for s in subsections[1:])]
                     _sections = [*other_sections, *subsections]
-                    yield cls._parse(word, _sections, lang)
+                    yield cls._parse(word, _sections, lang, page, [*other_titles, *subtitles])
 
             return list(parse_multiple())
 
-        return cls._parse(word, sections, lang)
+        return [cls._parse(word, sections, lang, page, titles)]
 
     @classmethod
     def jsonld(cls, word: str, sections: list[wtp.Section], lang: LanguageCode) -> dict:
@@ -255,6 +324,6 @@ class EnParser:
         # with open(Path(os.path.dirname(__file__)) / "templates/templates.json", "r+") as f:
         #     transforms = json.load(f)
 
-        return parse_templates("".join((s.contents for s in sections)))
+        return [t for s in sections for t in parse_templates(s)]
 
         
@@ -1,4 +1,16 @@
-from .base import *
-from .etymology import *
-from .links import *
-from .parse import *
+from importlib import import_module
+
+#: What this package re-exports, in order of precedence
+_MODULES = ["parse", "links", "etymology", "base"]
+
+
+def __getattr__(name: str):
+    # (Loaded on first use, so that importing one of the template modules doesn't import all of them)
+    if not name.startswith("_"):
+        for module_name in _MODULES:
+            module = import_module(f"{__name__}.{module_name}")
+
+            if name in getattr(module, "__all__", vars(module)):
+                return getattr(module, name)
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
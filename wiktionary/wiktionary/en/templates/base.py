@@ -1,14 +1,10 @@
 import re
-import warnings
-from dataclasses import dataclass, field
-from inspect import ArgSpec
-from pipes import Template
-from typing import Callable, Literal, Protocol, TypeVar
+from dataclasses import MISSING, dataclass, field, fields
+from functools import cached_property
 
 import wikitextparser as wtp
-from more_itertools import first_true
-from wiktionary._types import LanguageCode
-from wiktionary.utils import get_regex
+from wiktionary.en.templates.records import RECORDS, TemplateRecord
+from wiktionary.symbols import TEMPLATE_SYMBOLS, TEMPLATES
 
 _LANG = "lang", "lang"
 _ALT = "alt", "alt"
@@ -21,10 +17,53 @@ _LIT = "lit", "literalTranslation"
 _ID = "id", "sense"
 
 _G = "g", "gender"
+
+
+@dataclass(frozen=True)
+class Pluck:
+    """`[{key: value}, ...]` -> `[value, ...]` (e.g., to flatten variadic arguments)"""
+    key: str
+
+    def __call__(self, items: list[dict]) -> list:
+        return [item[self.key] for item in items]
+
+
+@dataclass(frozen=True)
+class Collect:
+    """`[{key: value}, {...}, ...]` -> `[value, ...]`, like `Pluck`, but skipping items without `key`"""
+    key: str
+
+    def __call__(self, items: list[dict]) -> list:
+        return [item[self.key] for item in items if self.key in item]
+
+
+@dataclass(frozen=True)
+class Split:
+    """`"a;b"` -> `["a", "b"]`"""
+    separator: str
+
+    def __call__(self, value: str) -> list[str]:
+        return value.split(self.separator)
+
+
+@dataclass(frozen=True)
+class Lookup:
+    """Replaces a value with its entry in `table` (if it has one)"""
+    table: dict[str, str]
+
+    def __call__(self, value: str) -> str:
+        return self.table.get(value, value)
+
+
+#: The transforms that `TemplateMapping.extra_transform` can use, as named in `TemplateMapping.to_dict`.
+#: (Rather than arbitrary functions, so that mappings stay plain data)
+TRANSFORMS = {"pluck": Pluck, "collect": Collect, "split": Split, "lookup": Lookup}
+
+
 WITH_GENDER = dict(
     variadic_name="genders",
     variadic_rename={"g": "g"},
-    extra_transform={"genders": lambda gs: [g["g"] for g in gs]}
+    extra_transform={"genders": Pluck("g")}
 )
 
 COMMON_IGNORE = 'accel', 'nocap', 'notext', 'nocat', 'sort', "accel-form", "accel-translit", "accel-lemma", "accel-lemma-translit", "accel-gender", "accel-nostore" 
@@ -77,6 +116,10 @@ ABBREVIATED_POS = {
 }
 
 
+class TemplateMappingError(ValueError):
+    """A template mapping (as data) that we can't make sense of."""
+
+
 # TODO: Some magic with metaclasses so that the template mappings
 #       are their own classes rather than implementations of TemplateMapping.
 @dataclass
@@ -136,8 +179,10 @@ class TemplateMapping:
     variadic_name: str = "values"
     variadic_start: str | None = field(default=None)
     variadic_rename: dict = field(default_factory=dict)
+    #: Leave `variadic_name` out when there aren't any variadic arguments (rather than an empty list)
+    variadic_optional: bool = False
 
-    #: Dictionary of transformations to apply to the final dictionaries
+    #: Dictionary of transformations to apply to the final dictionaries (see `TRANSFORMS`)
     extra_transform: dict = field(default_factory=dict)
 
     #: Extra information to attach to the produced dictionary.
@@ -146,67 +191,251 @@ class TemplateMapping:
     #: Arguments to ignore
     ignore: tuple[str] = COMMON_IGNORE
 
+    #: Which of `records.RECORDS` to produce instead of a dictionary (for the most common templates)
+    record: str | None = None
+
+    @cached_property
+    def plan(self) -> "TransformPlan":
+        """This mapping, compiled. Mappings are treated as immutable once they've been used."""
+        return TransformPlan(self)
+
     def variadic_transform(self, data: dict) -> None:
-        if self.variadic_start is None:
+        self.plan.variadic_transform(data)
+
+    def transform(self, template: wtp.Template):
+        return self.plan(template)
+
+    def copy(self, **kwargs):
+        data = {f.name: getattr(self, f.name) for f in fields(self)}
+        data.update(kwargs)
+        return self.__class__(**data)
+
+    def to_dict(self) -> dict:
+        """This mapping as JSON-able data (leaving out anything that's the default)"""
+        data = {}
+
+        for f in fields(self):
+            value = getattr(self, f.name)
+            default = f.default_factory() if f.default_factory is not MISSING else f.default
+
+            if f.name in ("template_names", "ignore"):
+                value, default = list(value), list(default) if default is not MISSING else default
+            elif f.name == "extra_transform":
+                value = {key: _transform_to_dict(transform) for key, transform in value.items()}
+
+            if value != default:
+                data[f.name] = value
+
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "TemplateMapping":
+        """The mapping described by `data` (see `to_dict`). Raises a `TemplateMappingError` if it's invalid."""
+        _check_mapping(data)
+        data = dict(data)
+
+        if "ignore" in data:
+            data["ignore"] = tuple(data["ignore"])
+        if "extra_transform" in data:
+            data["extra_transform"] = {
+                key: _transform_from_dict(data["name"], transform)
+                for key, transform in data["extra_transform"].items()
+            }
+
+        return cls(**data)
+
+
+def _transform_to_dict(transform) -> dict:
+    for kind, transform_cls in TRANSFORMS.items():
+        if type(transform) is transform_cls:  # pylint: disable=unidiomatic-typecheck
+            return {kind: getattr(transform, fields(transform_cls)[0].name)}
+
+    raise TemplateMappingError(f"Can't serialize {transform!r}: use one of {', '.join(TRANSFORMS)}")
+
+
+def _transform_from_dict(name: str, data: dict):
+    if not isinstance(data, dict) or len(data) != 1 or next(iter(data)) not in TRANSFORMS:
+        raise TemplateMappingError(f"{name}: Unknown transform {data!r} (expected one of {', '.join(TRANSFORMS)})")
+
+    [(kind, argument)] = data.items()
+    return TRANSFORMS[kind](argument)
+
+
+def _is_strings(value, container=list) -> bool:
+    if container is dict:
+        return isinstance(value, dict) and all(isinstance(k, str) and isinstance(v, str) for k, v in value.items())
+    return isinstance(value, container) and all(isinstance(v, str) for v in value)
+
+
+def _check_mapping(data: dict):
+    if not isinstance(data, dict):
+        raise TemplateMappingError(f"Expected a template mapping, got {data!r}")
+
+    name = data.get("name")
+
+    if not isinstance(name, str):
+        raise TemplateMappingError(f"Template mapping without a name: {data!r}")
+    if unknown := data.keys() - {f.name for f in fields(TemplateMapping)}:
+        raise TemplateMappingError(f"{name}: Unknown fields {sorted(unknown)}")
+
+    checks = {
+        "template_names": _is_strings(data.get("template_names")),
+        "rename": _is_strings(data.get("rename", {}), dict),
+        "variadic_name": isinstance(data.get("variadic_name", ""), str),
+        "variadic_start": data.get("variadic_start") is None or _is_strings([data["variadic_start"]]),
+        "variadic_rename": _is_strings(data.get("variadic_rename", {}), dict),
+        "variadic_optional": isinstance(data.get("variadic_optional", False), bool),
+        "extra_transform": isinstance(data.get("extra_transform", {}), dict),
+        "extra": isinstance(data.get("extra", {}), dict),
+        "ignore": _is_strings(data.get("ignore", [])),
+        "record": data.get("record") is None or data["record"] in RECORDS,
+    }
+
+    if invalid := [key for key, valid in checks.items() if not valid]:
+        raise TemplateMappingError(f"{name}: Invalid {', '.join(invalid)}")
+
+
+#: Prefixed variadic arguments, e.g., `t2`, `alt3`
+_VARIADIC_KEY = re.compile(r"^(\w+)(\d+)$")
+
+#: Anything that can nest inside a template argument (templates, links, tags, comments),
+#: plus line breaks followed by `=` (which wikitextparser may read as a heading).
+_NESTED_MARKUP = re.compile(r"[{}\[\]<]|[\r\n\x0b\x0c\x1c-\x1e\x85\u2028\u2029]=")
+
+_POSITIONS = tuple(str(i) for i in range(256))
+
+
+def _position(i: int) -> str:
+    return _POSITIONS[i] if i < 256 else str(i)
+
+
+def template_arguments(template: wtp.Template) -> list[tuple[str, str]]:
+    """`(name, value)` for each argument of `template`, exactly as `template.arguments` would give them.
+
+    Going through `wtp.Argument` is by far the most expensive part of a transform, and the
+    vast majority of templates are flat (no nested templates, links, or tags), so we split
+    those ourselves and only defer to wikitextparser for the rest.
+    """
+    inner = template.string[2:-2]
+
+    if _NESTED_MARKUP.search(inner) is not None:
+        return [(arg.name, arg.value) for arg in template.arguments]
+
+    args = []
+    position = 0
+
+    for part in inner.split("|")[1:]:
+        name, eq, value = part.partition("=")
+
+        if eq:
+            args.append((name, value))
+        else:
+            position += 1
+            args.append((_position(position), part))
+
+    return args
+
+
+class TransformPlan:
+    """
+    A `TemplateMapping` compiled into the minimum amount of work per template:
+    ignore lists become frozensets, `extra` is merged once, and the variadic layout
+    (where the positional slots start, what they're called) is worked out up front.
+
+    Values that are codes (languages, scripts, genders, see `symbols.TEMPLATE_SYMBOLS`)
+    go through their symbol table, so every template shares one copy of each.
+
+    Mappings with a `record` hand back a `records.TemplateRecord` rather than the dict.
+    """
+
+    __slots__ = (
+        "name", "ignore", "rename", "extra", "extra_transform", "final_transforms",
+        "variadic_name", "variadic_start", "variadic_value_key", "variadic_symbols", "variadic_rename",
+        "variadic_optional",
+        "record",
+    )
+
+    def __init__(self, mapping: TemplateMapping):
+        self.name = TEMPLATES.intern(mapping.name)
+        self.ignore = frozenset(mapping.ignore)
+        self.rename = dict(mapping.rename)
+        self.extra = dict(mapping.extra)
+        self.extra_transform = dict(mapping.extra_transform)
+        self.final_transforms = tuple(self.extra_transform.items())
+
+        self.variadic_name = mapping.variadic_name
+        self.variadic_start = None if mapping.variadic_start is None else int(mapping.variadic_start)
+        self.variadic_rename = dict(mapping.variadic_rename)
+        self.variadic_optional = mapping.variadic_optional
+        self.variadic_value_key = self.variadic_rename.get("", "value")
+        self.variadic_symbols = TEMPLATE_SYMBOLS.get(self.variadic_value_key)
+        self.record = None if mapping.record is None else RECORDS[mapping.record].from_dict
+
+    def variadic_transform(self, data: dict) -> None:
+        start = self.variadic_start
+
+        if start is None:
             return
 
-        start = int(self.variadic_start)
         idx = start
         variadic_args = {}
+        symbols = self.variadic_symbols
 
         # Get positional arguments ("3", "4",...)
-        while (item := data.pop(str(idx), None)) is not None:
-            key = self.variadic_rename.get("", "value")
-            variadic_args[idx-start] = {key: item}
+        while (item := data.pop(_position(idx), None)) is not None:
+            if symbols is not None:
+                item = symbols.intern(item)
+            variadic_args[idx - start] = {self.variadic_value_key: item}
             idx += 1
 
         # Get prefixed arguments ("id1", "id2")
         # Note kwarg "id1" does not necessarily match pos arg "1"
         for k in [*data.keys()]:
-            if (m := re.match(r"^(\w+)(\d+)$", k)):
+            if (m := _VARIADIC_KEY.match(k)):
                 v = data.pop(k)
                 k, idx = m.groups()
 
                 k = self.variadic_rename.get(k, k)
-                idx = int(idx) -1 
+                idx = int(idx) - 1
 
+                if (symbols := TEMPLATE_SYMBOLS.get(k)) is not None:
+                    v = symbols.intern(v)
                 if k in self.extra_transform:
                     v = self.extra_transform[k](v)
 
-                variadic_args[idx] = variadic_args[idx] or {}
-                variadic_args[idx][k] = v
+                variadic_args.setdefault(idx, {})[k] = v
 
-        variadic_list = [variadic_args[k] for k in sorted(variadic_args.keys())]
-        data[self.variadic_name] = variadic_list
+        if variadic_args or not self.variadic_optional:
+            data[self.variadic_name] = [variadic_args[k] for k in sorted(variadic_args)]
 
-    def transform(self, template: wtp.Template):
-        data = {}
+    def __call__(self, template: wtp.Template) -> dict | TemplateRecord:
+        ignore = self.ignore
+        rename = self.rename
+        data = {"@id": self.name}
 
         # Transform non-variadic arguments
-        for arg in template.arguments:
-            if arg.name not in self.ignore:
-                k = self.rename.get(arg.name, arg.name)
-                v = arg.value
-                data[k] = v
+        for name, value in template_arguments(template):
+            if name not in ignore:
+                key = rename.get(name, name)
+
+                if (symbols := TEMPLATE_SYMBOLS.get(key)) is not None:
+                    value = symbols.intern(value)
+                data[key] = value
 
         # Transform variadic arguments
         self.variadic_transform(data)
 
         # Apply final transformations
-        for k in self.extra_transform:
+        for k, transform in self.final_transforms:
             if k in data:
-                data[k] = self.extra_transform[k](data[k])
+                data[k] = transform(data[k])
 
-        data.update({**self.extra})
+        if self.extra:
+            data.update(self.extra)
 
-        return {
-            "@id": self.name,
-            **data
-        }
+        if self.record is not None:
+            return self.record(data)
 
-    def copy(self, **kwargs):
-        data = {**self.__dict__}
-        data.update(kwargs)
-        return self.__class__(**data)
+        return data
 
 
@@ -1,7 +1,7 @@
 
 from wiktionary.en.templates.base import (_ALT, _G, _LANG, _T, COMMON_IGNORE,
                                           COMMON_RENAME, COMPOUND_TYPES,
-                                          WITH_GENDER, TemplateMapping)
+                                          WITH_GENDER, Lookup, TemplateMapping)
 
 Derived = TemplateMapping(
     name="derived",
@@ -11,6 +11,7 @@ Derived = TemplateMapping(
         "1": _LANG[1], "2": "srcLang", "3": "src", "4": _ALT[1],
         "5": _T[1]
     },
+    record="derived",
 )
 
 Borrowed = Derived.copy(
@@ -50,7 +51,7 @@ Compound = TemplateMapping(
     variadic_start="2",
     variadic_rename={**COMMON_RENAME, "g": _G[1]},
     extra_transform={
-        "compound_type": lambda t: COMPOUND_TYPES.get(t, t)
+        "compound_type": Lookup(COMPOUND_TYPES)
     },
 )
 
@@ -69,7 +70,7 @@ Blend = Compound.copy(
 )
 
 Prefix = Compound.copy(
-    template_names=["prefix", "pre", "suffix"],
+    template_names=["prefix", "pre"],
     extra={"subtype": "prefix"}
 )
 
@@ -105,7 +106,7 @@ Clipping = TemplateMapping(
 
 ShortFor = TemplateMapping(
     name="shortFor",
-    template_names=["short for", "clipping"],
+    template_names=["short for"],
     rename={
         "1": _LANG[1], "2": "word", "3": _ALT[1], "4": _T[1], 
         **COMMON_RENAME
@@ -156,6 +157,7 @@ Calque = TemplateMapping(
         "1": _LANG[1], "2": "srcLang", "3": "src", "4": _ALT[1], "5": _T[1],
         **COMMON_RENAME
     },
+    record="derived",
     **WITH_GENDER
 )
 
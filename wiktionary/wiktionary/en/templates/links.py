@@ -9,6 +9,7 @@ Link = TemplateMapping(
         "1": _LANG[1], "2": "src", "3": _ALT[1], "4": _T[1],
         **COMMON_RENAME
     },
+    record="link",
     **WITH_GENDER
 )
 
@@ -16,7 +17,8 @@ Mention = TemplateMapping(
     name="mention",
     template_names=["m", "mention", "m-self", "langname-mention"],
     rename=Link.rename,
-    ignore=Link.ignore
+    ignore=Link.ignore,
+    record="link"
 )
 
 LINK_TEMPLATES = (
@@ -1,4 +1,4 @@
-from wiktionary.en.templates.base import _LANG, TemplateMapping
+from wiktionary.en.templates.base import _LANG, Pluck, TemplateMapping
 
 Anagram = TemplateMapping(
     name="anagram",
@@ -10,7 +10,7 @@ Anagram = TemplateMapping(
     variadic_name="anagrams",
     variadic_start="2",
     variadic_rename={"": "a"},
-    extra_transform={"anagrams": lambda anagrams: [a["a"] for a in anagrams]},
+    extra_transform={"anagrams": Pluck("a")},
 )
 
 Def = TemplateMapping(
@@ -1,48 +1,54 @@
+import time
+
 import wikitextparser as wtp
-from more_itertools import first_true
-from wiktionary.en.templates.base import TemplateMapping
-from wiktionary.en.templates.etymology import ETYMOLOGY_TEMPLATES
-from wiktionary.en.templates.links import LINK_TEMPLATES
-from wiktionary.en.templates.other import OTHER_TEMPLATES
-from wiktionary.en.templates.pronunciation import PRONUNCIATION_TEMPLATES
-from wiktionary.en.templates.semantics import SEMANTIC_TEMPLATES
-from wiktionary.en.templates.translations import TRANSLATION_TEMPLATES
-
-
-def default_template_mapper(new_name, template_name):
-    return TemplateMapping(
-        name=new_name,
-        template_names=[template_name]
-    )
-
-DEFAULT_TEMPLATE_MAPPERS = [
-    ("transcription", "pronunciation spelling of")
-]
-
-TEMPLATES = (
-    *LINK_TEMPLATES,
-    *ETYMOLOGY_TEMPLATES,
-    *PRONUNCIATION_TEMPLATES,
-    *SEMANTIC_TEMPLATES,
-    *OTHER_TEMPLATES,
-    *TRANSLATION_TEMPLATES,
-    *(default_template_mapper(*args) for args in DEFAULT_TEMPLATE_MAPPERS)
+from wiktionary import profiler
+from wiktionary.en.templates.records import TemplateRecord
+from wiktionary.en.templates.registry import (  # pylint: disable=unused-import
+    DEFAULT_TEMPLATE_MAPPERS,
+    TemplateConflictError,
+    TemplateRegistry,
+    declared_templates,
+    default_template_mapper,
+    load_registry,
+    normalize_template_name,
 )
+from wiktionary.utils import ListItem
+
+#: Loaded from the compiled `registry.json` (see `wiktionary.en.templates.registry`)
+TEMPLATE_REGISTRY = load_registry()
+
+
+def __getattr__(name):
+    # `TEMPLATES` used to be built here, on import (which meant importing all the declarations)
+    if name == "TEMPLATES":
+        return declared_templates()
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
-def parse_template(template: wtp.Template) -> dict | None:
-    mapper = first_true(
-        TEMPLATES, 
-        pred=lambda tm: template.name in tm.template_names,
-        default=None
-    ) 
+def parse_template(template: wtp.Template) -> dict | TemplateRecord | None:
+    mapper = TEMPLATE_REGISTRY.get(template.name)
 
     if not mapper:
         return None
 
-    return mapper.transform(template)
+    if profiler.active is None:
+        return mapper.transform(template)
+
+    start = time.perf_counter()
+    parsed = mapper.transform(template)
+    profiler.active.add_time("template mappings", mapper.name, time.perf_counter() - start)
+
+    return parsed
+
+
+def parse_templates(wikitext: str | wtp.WikiText | ListItem) -> list[dict | TemplateRecord]:
+    """Maps all the templates in `wikitext`.
 
+    Pass in a section, list item, etc. of an already-parsed page when you have one.
+    Plain strings have to be parsed all over again.
+    """
+    if isinstance(wikitext, str):
+        wikitext = wtp.parse(wikitext)
 
-def parse_templates(templates_raw: str) -> list[dict]:
-    templates = wtp.parse(templates_raw).templates
-    return [pt for t in templates if (pt := parse_template(t))]
+    return [pt for t in wikitext.templates if (pt := parse_template(t))]
@@ -1,5 +1,5 @@
 
-from wiktionary.en.templates.base import _LANG, COMMON_RENAME, TemplateMapping
+from wiktionary.en.templates.base import _LANG, COMMON_RENAME, Pluck, TemplateMapping
 
 Dialect = TemplateMapping(
     name="dialect",
@@ -7,7 +7,7 @@ Dialect = TemplateMapping(
     variadic_name="dialects",
     variadic_start="1",
     variadic_rename={"": "d"},
-    extra_transform={"dialects": lambda ds: [d["d"] for d in ds]}
+    extra_transform={"dialects": Pluck("d")}
 )
 
 IPA = TemplateMapping(
@@ -19,7 +19,8 @@ IPA = TemplateMapping(
     variadic_start="2",
     variadic_name="pronunciations",
     variadic_rename={"": "ipa", "qual": "qualifier", "ref": "ref"},
-    ignore=("sort", "nocount")
+    ignore=("sort", "nocount"),
+    record="ipa"
 )
 
 
@@ -78,8 +79,8 @@ Hyphenation = TemplateMapping(
     variadic_name="syllables",
     variadic_start="2",
     variadic_rename={"": "s"},
-    extra_transform={"syllables": lambda ss: [s["s"] for s in ss]},
-    ignore=("nocaption")
+    extra_transform={"syllables": Pluck("s")},
+    ignore=("nocaption",)
 )
 
 
@@ -0,0 +1,164 @@
+"""
+# Template records
+
+A few kinds of templates make up most of every page (translations, above all: a big entry
+has thousands of them), and as dicts, each one costs a hash table (sized for growth) on top
+of its handful of short strings. So those kinds (see `TemplateMapping.record`) are parsed
+into slotted records instead: a slot for each of the arguments they usually have, and
+anything else in `extra` (`None` if there isn't anything else). A translation goes from
+~190 bytes (plus the strings) to 88.
+
+```python
+translation = parse_template(template)  # {{t+|de|Haus|n}}
+translation.lang, translation.genders  # "de", ["n"]
+translation["@id"], translation.get("script")  # "translation", None (same as with a dict)
+translation.to_dict()  # {"@id": "translation", "lang": "de", "gloss": "Haus", "genders": ["n"]}
+```
+
+Records are read-only `Mapping`s (equal to the dicts they'd otherwise be), so whatever reads
+parsed templates (`columnar`, `rdf`, `graph`, ...) works with either. They aren't JSON,
+though: `json.dumps(entry.to_dict(), default=json_default)` (same for `msgpack.packb`).
+
+## What they buy (and what they don't)
+
+The goal was 3–5x lower peak RSS for a full-language parse. That's out of reach: on the
+benchmark corpus (`python -m benchmarks.run` reports it), the records take 4.9MB where the
+same templates would take 10.6MB as dicts (2.2x), but the parsed entries as a whole only go
+from 22.0MB to 16.0MB (1.4x), and what parsing & keeping them adds to RSS from 23.5MB to 17.5MB
+(1.3x). The rest is strings (glosses, mostly, which are unique) and lists, which records don't
+touch. And the pipeline streams pages (it keeps one page's entries at a time), so there, peak
+RSS is the interpreter & libraries, and records don't move it at all.
+
+They're still worth it wherever entries are kept in memory (a server caching lookups,
+analysis in a notebook, ...), since translations are most of what big entries hold, for what
+they cost: ~0.3ms per page to build (~3% of parsing), ~0.2ms per page more to serialize, and the
+`default=json_default` above.
+"""
+
+from collections.abc import Mapping
+from typing import Any, ClassVar, Iterator
+
+_MISSING = object()
+
+
+class TemplateRecord(Mapping):
+    """A parsed template with a slot for each of `FIELDS` (see the module docstring)"""
+
+    __slots__ = ("id", "extra")
+
+    #: The keys with a slot of their own (besides `@id`), in the order `to_dict` puts them
+    FIELDS: ClassVar[tuple[str, ...]] = ()
+    #: `{key: slot}` (i.e., `FIELDS`, plus `@id`)
+    _SLOTS: ClassVar[dict[str, str]] = {"@id": "id"}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._SLOTS = {"@id": "id", **{field: field for field in cls.FIELDS}}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "TemplateRecord":
+        """The record for a template parsed into `data`"""
+        record = cls.__new__(cls)
+        record.id = data["@id"]
+        slotted = 1
+
+        for field in cls.FIELDS:
+            value = data.get(field)
+            setattr(record, field, value)
+            slotted += value is not None
+
+        record.extra = None if slotted == len(data) else {
+            key: value for key, value in data.items() if key not in cls._SLOTS
+        }
+
+        return record
+
+    def to_dict(self) -> dict:
+        data = {"@id": self.id}
+
+        for field in self.FIELDS:
+            if (value := getattr(self, field)) is not None:
+                data[field] = value
+
+        if self.extra:
+            data.update(self.extra)
+
+        return data
+
+    def get(self, key: str, default: Any = None) -> Any:
+        # (Rather than `Mapping.get`, which goes through `KeyError`s)
+        if (slot := self._SLOTS.get(key)) is not None:
+            value = getattr(self, slot)
+            return default if value is None else value
+
+        return default if self.extra is None else self.extra.get(key, default)
+
+    def __getitem__(self, key: str) -> Any:
+        if (value := self.get(key, _MISSING)) is _MISSING:
+            raise KeyError(key)
+
+        return value
+
+    def __contains__(self, key: object) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.to_dict())
+
+    def __len__(self) -> int:
+        return len(self.to_dict())
+
+    def __bool__(self) -> bool:
+        # (There's always an `@id`, and this way, `if parsed:` doesn't have to count)
+        return True
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+class Link(TemplateRecord):
+    """`{{l|de|Wasser}}`, `{{m|...}}`"""
+    FIELDS = ("lang", "src", "alt", "gloss", "genders")
+    __slots__ = FIELDS
+
+
+class Derived(TemplateRecord):
+    """`{{der|en|la|aqua}}`, `{{bor|...}}`, `{{calque|...}}`, ..."""
+    FIELDS = ("lang", "srcLang", "src", "alt", "gloss")
+    __slots__ = FIELDS
+
+
+class Translation(TemplateRecord):
+    """`{{t+|de|Haus|n}}`"""
+    FIELDS = ("lang", "gloss", "script", "transliteration", "genders")
+    __slots__ = FIELDS
+
+
+class IPA(TemplateRecord):
+    """`{{IPA|en|/ˈwɔːtə/|/ˈwɔtɚ/}}`"""
+    FIELDS = ("lang", "pronunciations")
+    __slots__ = FIELDS
+
+
+class Nym(TemplateRecord):
+    """`{{syn|en|aqua|H2O}}`, `{{ant|...}}`, ..."""
+    FIELDS = ("lang", "synonyms")
+    __slots__ = FIELDS
+
+
+#: The records that `TemplateMapping.record` can name
+RECORDS: dict[str, type[TemplateRecord]] = {
+    "link": Link,
+    "derived": Derived,
+    "translation": Translation,
+    "ipa": IPA,
+    "nym": Nym,
+}
+
+
+def json_default(value: Any) -> dict:
+    """For `json.dumps(..., default=json_default)`: records as the dicts they stand for"""
+    if isinstance(value, TemplateRecord):
+        return value.to_dict()
+
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
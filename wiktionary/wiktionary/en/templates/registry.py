@@ -0,0 +1,214 @@
+"""
+# Template registry
+
+Which `TemplateMapping` handles which template. The mappings are declared in Python (see
+`etymology`, `links`, ...), but they're plain data (no functions: see `base.TRANSFORMS`), so
+we compile them, once, into `registry.json`, and that's what gets loaded:
+
+```sh
+python -m wiktionary.en.templates.registry          # After changing a mapping
+python -m wiktionary.en.templates.registry --check  # Is it up to date? (the tests check too)
+```
+
+```json
+{"version": 2, "mappings": [{"name": "link", "template_names": ["l", ...], ...}, ...]}
+```
+
+Compiling checks that every mapping survives the trip to JSON and back unchanged, and that
+no two mappings claim the same template. Loading only checks the version (if it's missing
+or unusable, we build the registry from the declarations, as before, and warn). Whether it
+still matches the declarations is checked when it matters, by `is_up_to_date` (in the
+tests), rather than on every import.
+
+Loading the registry doesn't import the declarations at all, and you can add mappings of
+your own as data (`TemplateMapping.from_dict`).
+"""
+
+import json
+import re
+import sys
+import warnings
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterable
+
+from wiktionary.en.templates.base import TemplateMapping
+
+REGISTRY_PATH = Path(__file__).parent / "registry.json"
+
+#: Bump when the format of `registry.json` (or of `TemplateMapping.to_dict`) changes
+VERSION = 2
+
+DEFAULT_TEMPLATE_MAPPERS = [
+    ("transcription", "pronunciation spelling of")
+]
+
+
+def default_template_mapper(new_name, template_name):
+    return TemplateMapping(
+        name=new_name,
+        template_names=[template_name]
+    )
+
+
+def declared_templates() -> tuple[TemplateMapping, ...]:
+    """All the mappings, as declared in Python"""
+    # pylint: disable=import-outside-toplevel
+    from wiktionary.en.templates.etymology import ETYMOLOGY_TEMPLATES
+    from wiktionary.en.templates.links import LINK_TEMPLATES
+    from wiktionary.en.templates.other import OTHER_TEMPLATES
+    from wiktionary.en.templates.pronunciation import PRONUNCIATION_TEMPLATES
+    from wiktionary.en.templates.semantics import SEMANTIC_TEMPLATES
+    from wiktionary.en.templates.translations import TRANSLATION_TEMPLATES
+
+    return (
+        *LINK_TEMPLATES,
+        *ETYMOLOGY_TEMPLATES,
+        *PRONUNCIATION_TEMPLATES,
+        *SEMANTIC_TEMPLATES,
+        *OTHER_TEMPLATES,
+        *TRANSLATION_TEMPLATES,
+        *(default_template_mapper(*args) for args in DEFAULT_TEMPLATE_MAPPERS)
+    )
+
+
+_WHITESPACE = re.compile(r"[\s_]+")
+
+
+@lru_cache(maxsize=8192)
+def normalize_template_name(name: str) -> str:
+    """Normalizes a template name the way MediaWiki does when resolving `{{name|...}}`:
+    underscores count as spaces, runs of whitespace collapse into one, surrounding
+    whitespace is dropped, and an explicit `Template:` namespace is ignored.
+
+    NOTE: Wiktionary is case-sensitive, *including* the first letter (`$wgCapitalLinks = false`),
+    so `{{IPA}}` and `{{ipa}}` are different templates and we leave case alone.
+    """
+    name = _WHITESPACE.sub(" ", name).strip()
+
+    if name[:9].lower() == "template:":
+        name = name[9:].lstrip()
+
+    return name
+
+
+class TemplateConflictError(ValueError):
+    """Two different mappings claim the same template name."""
+
+
+class RegistryError(ValueError):
+    """A compiled registry that we can't use (wrong version, out of date, ...)."""
+
+
+@dataclass
+class TemplateRegistry:
+    """
+    An index from (normalized) template name to the `TemplateMapping` that handles it.
+
+    Built once from a list of mappings. Conflicting aliases (the same name claimed
+    by two different mappings) are an error rather than a silent "first one wins".
+
+    To see which templates get dropped because there's no mapping for them, run the parser
+    with a `wiktionary.profiler.Profiler` active (`unmapped templates`), rather than have
+    every lookup keep count.
+    """
+    mappings: dict[str, TemplateMapping] = field(default_factory=dict)
+
+    @classmethod
+    def build(cls, templates: Iterable[TemplateMapping]) -> "TemplateRegistry":
+        mappings: dict[str, TemplateMapping] = {}
+
+        for tm in templates:
+            for template_name in tm.template_names:
+                name = normalize_template_name(template_name)
+                other = mappings.get(name)
+
+                if other is not None and other is not tm:
+                    raise TemplateConflictError(
+                        f"Template {name!r} is claimed by both "
+                        f"{other.name!r} ({other.template_names}) and {tm.name!r} ({tm.template_names})"
+                    )
+
+                mappings[name] = tm
+
+        return cls(mappings=mappings)
+
+    @property
+    def templates(self) -> list[TemplateMapping]:
+        """Each of the mappings (once), in the order they were added"""
+        return list({id(tm): tm for tm in self.mappings.values()}.values())
+
+    def to_dict(self) -> dict:
+        return {"version": VERSION, "mappings": [tm.to_dict() for tm in self.templates]}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "TemplateRegistry":
+        if data.get("version") != VERSION:
+            raise RegistryError(f"Unsupported version {data.get('version')} (expected {VERSION})")
+
+        return cls.build(TemplateMapping.from_dict(tm) for tm in data["mappings"])
+
+    def compile(self):
+        """Compiles each mapping's `TransformPlan` now, rather than on first use (e.g., before forking workers)"""
+        for tm in self.templates:
+            _ = tm.plan
+
+    def get(self, template_name: str) -> TemplateMapping | None:
+        return self.mappings.get(normalize_template_name(template_name))
+
+
+def compile_registry(path: str | Path = REGISTRY_PATH) -> TemplateRegistry:
+    """Compiles the declared mappings into `path` (see the module docstring)"""
+    registry = TemplateRegistry.build(declared_templates())
+
+    for tm in registry.templates:
+        if TemplateMapping.from_dict(tm.to_dict()).to_dict() != tm.to_dict():
+            raise RegistryError(f"{tm.name}: Doesn't survive being serialized")
+
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(registry.to_dict(), f, ensure_ascii=False, separators=(",", ":"))
+        f.write("\n")
+
+    return registry
+
+
+def is_up_to_date(path: str | Path = REGISTRY_PATH) -> bool:
+    """Whether `path` has the mappings as they're declared now (which means importing the declarations)"""
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return False
+
+    return data == TemplateRegistry.build(declared_templates()).to_dict()
+
+
+def load_registry(path: str | Path = REGISTRY_PATH, fallback: bool = True) -> TemplateRegistry:
+    """The registry compiled into `path` or, if that's missing or unusable, built from the declarations.
+
+    With `fallback=False`, we raise instead (e.g., for a registry of your own).
+    """
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+
+        return TemplateRegistry.from_dict(data)
+    except (OSError, ValueError) as e:
+        if not fallback:
+            raise
+
+        warnings.warn(
+            f"Can't use the compiled template registry ({e}), so building it from scratch. "
+            "Recompile it with `python -m wiktionary.en.templates.registry`."
+        )
+        return TemplateRegistry.build(declared_templates())
+
+
+if __name__ == "__main__":
+    if "--check" in sys.argv[1:]:
+        if not is_up_to_date():
+            sys.exit(f"{REGISTRY_PATH} is out of date: recompile it with `python -m wiktionary.en.templates.registry`")
+    else:
+        compiled = compile_registry()
+        print(f"{len(compiled.templates)} mappings ({len(compiled.mappings)} template names) -> {REGISTRY_PATH}")
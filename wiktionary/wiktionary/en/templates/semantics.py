@@ -1,6 +1,6 @@
 
 
-from wiktionary.en.templates.base import _LANG, COMMON_RENAME, TemplateMapping
+from wiktionary.en.templates.base import _LANG, COMMON_RENAME, Pluck, TemplateMapping
 
 Qualifier = TemplateMapping(
     name="qualifier",
@@ -17,7 +17,7 @@ Label = TemplateMapping(
     rename={"1": _LANG[1], "2": "value"},
     variadic_name="labels",
     variadic_rename={"": "l"},
-    extra_transform={"labels": lambda labels: [l["l"] for l in labels]},
+    extra_transform={"labels": Pluck("l")},
 )
 
 Gloss = TemplateMapping(
@@ -43,6 +43,7 @@ Nym = TemplateMapping(
     variadic_start="2",
     variadic_name="synonyms",
     variadic_rename={"": "synonym", "q": "qualifier", "qq": "qualifier", "g": "gender", **COMMON_RENAME},
+    record="nym",
 )
 
 Synonym = Nym.copy(
@@ -86,11 +87,6 @@ CoordinateTerm = Nym.copy(
     template_names=["coordinate terms", "cot"]
 )   
 
-OtherwiseRelated = Nym.copy(
-    name="other_rel",
-    template_names=["hyponym", "hypo","hyponyms"]
-)   
-
 
 NYMS = [
     Synonym,
@@ -101,7 +97,6 @@ NYMS = [
     Holonym,
     Troponym,
     CoordinateTerm,
-    OtherwiseRelated
 ]
 
 Collocation = Synonym.copy(
@@ -1,5 +1,5 @@
 from wiktionary.en.templates.base import (_LANG, COMMON_IGNORE, COMMON_RENAME,
-                                          TemplateMapping)
+                                          Pluck, Split, TemplateMapping)
 
 UsageExample = TemplateMapping(
     name="example",
@@ -17,7 +17,7 @@ UsageExample = TemplateMapping(
     variadic_name="qualifiers",
     variadic_start="5",
     variadic_rename={"q": "q"},
-    extra_transform={"qualifiers": lambda qualifiers: [q["q"] for q in qualifiers]},
+    extra_transform={"qualifiers": Pluck("q")},
     ignore=("inline", "noenum", "nocat", "sort")
 )
 
@@ -139,10 +139,10 @@ BookQuote = Quote.copy(
         "2ndauthorlink": "secondAuthorlink",
     },
     extra_transform={
-        "langs": lambda langs: langs.split(","),
-        "coauthors": lambda coauthors: coauthors.split(";"),
-        "translators": lambda translators: translators.split(";"),
-        "editors": lambda editors: editors.split(";"),
+        "langs": Split(","),
+        "coauthors": Split(";"),
+        "translators": Split(";"),
+        "editors": Split(";"),
     },
     ignore=(*COMMON_IGNORE, "brackets", "indent"),
     extra={
@@ -1,4 +1,4 @@
-from wiktionary.en.templates.base import _LANG, COMMON_RENAME, TemplateMapping
+from wiktionary.en.templates.base import _LANG, COMMON_RENAME, Collect, TemplateMapping
 
 Translation = TemplateMapping(
     name="translation",
@@ -6,9 +6,17 @@ Translation = TemplateMapping(
     rename={
         "1": _LANG[1],
         "2": "gloss",
-        # TODO: Add support for gender & number specification (|3=, |4=, ...)
         **COMMON_RENAME
-    }
+    },
+    # Gender & number come after the word: `{{t|de|Haus|n}}`, `{{t|nl|schaar|f|p}}`
+    # (`{{t}}` has no other numbered arguments, but a stray `alt2=` would make an item without
+    # a gender, hence `Collect` rather than `Pluck`)
+    variadic_name="genders",
+    variadic_start="3",
+    variadic_rename={"": "g"},
+    variadic_optional=True,
+    extra_transform={"genders": Collect("g")},
+    record="translation"
 )
 
 NoEquivalentTranslation = Translation.copy(
@@ -0,0 +1,415 @@
+"""
+# Relation graph
+
+The relationships on each page (synonyms, hypernyms, "derived from", "borrowed from", ...,
+see `rdf.template_relations`) add up to one big graph of words. This builds it straight
+from a dump, one page at a time, and stores it as arrays, so that walking it doesn't
+involve any dicts of dicts:
+
+```sh
+python -m wiktionary.cli graph enwiktionary-latest-pages-articles.xml.bz2 en graph/
+```
+
+```python
+graph = RelationGraph.load("graph/")
+
+graph.neighbors("water", "en", ["synonymOf"])  # [("synonymOf", "en", "H2O"), ...]
+graph.expand("water", "en", hops=2)  # {("en", "water"): 0, ("en", "H2O"): 1, ...}
+graph.shortest_path(("water", "en"), ("ice", "en"))  # [("en", "water"), ..., ("en", "ice")]
+graph.ancestry("water", "en")  # [("derivativeOf", "gem-pro", "*watōr"), ("derivativeOf", "ine-pro", "*wódr̥"), ...]
+```
+
+## Layout
+
+- Words (`lang\\0word`) are sorted and packed (see `search.PackedStrings`), and a word's id
+  is its position, so looking one up is a binary search, and no dict has to be loaded.
+- Edges are in [CSR](https://en.wikipedia.org/wiki/Sparse_matrix#Compressed_sparse_row_(CSR,_CRS_or_Yale_format))
+  arrays (one set going out, one coming in): the edges of node `i` go to
+  `indices[indptr[i]:indptr[i + 1]]`, and their relations are in `relations` (one byte
+  per edge). They're in the order they appear on the page (which, for etymologies, is
+  the order of descent).
+
+Everything is saved as plain `.npy` files, which `load` memory-maps.
+
+Needs [NumPy](https://numpy.org/) (`pip install numpy`).
+"""
+
+import json
+import mmap
+from array import array
+from bisect import bisect_left
+from collections import deque
+from pathlib import Path
+from typing import Iterable
+
+from tqdm import tqdm
+
+from wiktionary._types import LanguageCode
+from wiktionary.dump import has_entry, iter_dump_pages
+from wiktionary.rdf import TEMPLATE_FLAGS, entry_templates, template_relations
+from wiktionary.search import PackedStrings
+from wiktionary.symbols import LANGUAGES, SymbolTable
+from wiktionary.utils import get_entry
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+#: The relation of links whose section doesn't tell us anything (`rdfs:seeAlso` in `rdf`)
+SEE_ALSO = "seeAlso"
+
+#: Relations that point from a word to where it came from
+ETYMOLOGY_RELATIONS = (
+    "derivativeOf", "borrowingOf", "learnedBorrowingOf", "orthographicBorrowingOf",
+    "calqueOf", "backFormationOf", "hasRoot",
+)
+
+#: (lang, word)
+Node = tuple[LanguageCode, str]
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("The relation graph needs `numpy`: `pip install numpy`")
+
+
+def _key(lang: LanguageCode, word: str) -> bytes:
+    return f"{lang}\0{word}".encode("utf-8")
+
+
+class GraphBuilder:
+    """Collects edges (e.g., page by page with `add_entry`), then `build`s a `RelationGraph`"""
+
+    def __init__(self):
+        _require_numpy()
+
+        #: Pages that couldn't be read
+        self.errors = 0
+
+        self._ids: dict[Node, int] = {}
+        #: Each edge's relation is its code in here (one byte)
+        self._relations = SymbolTable()
+        # (Arrays, rather than lists of ints, since there can be tens of millions of edges)
+        self._sources, self._targets, self._edge_relations = array("I"), array("I"), array("B")
+
+    def _id(self, node: Node) -> int:
+        if (i := self._ids.get(node)) is None:
+            i = self._ids[node] = len(self._ids)
+        return i
+
+    def add(self, relation: str, source: Node, target: Node):
+        if relation not in self._relations and len(self._relations) > 0xFF:
+            raise ValueError("Too many relations (at most 256)")
+
+        self._sources.append(self._id(source))
+        self._targets.append(self._id(target))
+        self._edge_relations.append(self._relations.code(relation))
+
+    def add_entry(self, word: str, lang: LanguageCode, entry: str):
+        """Adds the relationships in `word`'s entry in `lang` (`entry` is its wikitext, see `get_entry`)"""
+        subject = LANGUAGES.intern(lang), word
+        edges = []
+
+        for template, section in entry_templates(entry):
+            if template["@id"] in TEMPLATE_FLAGS:
+                continue
+
+            for relation, object_lang, object_word in template_relations(template, section):
+                obj = object_lang, object_word
+
+                if relation is None:
+                    edges.append((SEE_ALSO, subject, obj))
+                elif relation.inverse:
+                    edges.append((relation.predicate, obj, subject))
+                else:
+                    edges.append((relation.predicate, subject, obj))
+
+        # (Only once the whole entry's been read, so a bad page doesn't leave half its edges)
+        self._id(subject)
+        for edge in edges:
+            self.add(*edge)
+
+    def build(self) -> "RelationGraph":
+        nodes = sorted(self._ids, key=lambda node: _key(*node))
+        labels = PackedStrings.pack(_key(*node) for node in nodes)
+
+        # Renumber, so that ids are in `labels` order
+        renumber = np.empty(len(nodes), dtype=np.uint32)
+        renumber[[self._ids[node] for node in nodes]] = np.arange(len(nodes), dtype=np.uint32)
+
+        sources = renumber[np.frombuffer(self._sources, dtype=np.uint32)]
+        targets = renumber[np.frombuffer(self._targets, dtype=np.uint32)]
+        relations = np.frombuffer(self._edge_relations, dtype=np.uint8)
+
+        # The same relationship can be on a page more than once: keep the first
+        edges = np.stack([sources, targets, relations.astype(np.uint32)], axis=1)
+        _, first = np.unique(edges, axis=0, return_index=True)
+        keep = np.sort(first)
+        sources, targets, relations = sources[keep], targets[keep], relations[keep]
+
+        return RelationGraph(
+            labels,
+            list(self._relations),
+            {
+                "out": _csr(len(nodes), sources, targets, relations),
+                "in": _csr(len(nodes), targets, sources, relations),
+            },
+        )
+
+
+def _csr(n: int, sources, targets, relations) -> dict:
+    """`indptr`, `indices` & `relations` of the edges, grouped by source"""
+    # (A stable sort, so each node's edges stay in page order)
+    order = np.argsort(sources, kind="stable")
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=n), out=indptr[1:])
+
+    return {"indptr": indptr, "indices": targets[order], "relations": relations[order]}
+
+
+def _gather(csr: dict, nodes, relations=None) -> tuple:
+    """The neighbors of each of `nodes` (and, for each, which of `nodes` it's a neighbor of)"""
+    starts = csr["indptr"][nodes]
+    counts = csr["indptr"][nodes + 1] - starts
+
+    # i.e., `concatenate([arange(start, start + count) for start, count in ...])`
+    positions = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+    parents = np.repeat(nodes, counts)
+
+    if relations is not None:
+        keep = np.isin(csr["relations"][positions], relations)
+        positions, parents = positions[keep], parents[keep]
+
+    return csr["indices"][positions], parents
+
+
+class RelationGraph:
+    """See the module docstring. Build with `GraphBuilder` (or `build_graph`), or `load` a saved one."""
+
+    def __init__(self, labels: PackedStrings, relations: list[str], csr: dict[str, dict]):
+        _require_numpy()
+
+        self._labels = labels
+        self.relations = relations
+        self._csr = csr
+
+    def __len__(self) -> int:
+        return len(self._labels)
+
+    @property
+    def edges(self) -> int:
+        return len(self._csr["out"]["indices"])
+
+    def id(self, word: str, lang: LanguageCode) -> int:
+        key = _key(lang, word)
+        i = bisect_left(self._labels, key)
+
+        if i == len(self._labels) or self._labels[i] != key:
+            raise KeyError(f"{word} ({lang}) is not in the graph")
+        return i
+
+    def node(self, i: int) -> Node:
+        lang, word = self._labels[i].decode("utf-8").split("\0", 1)
+        return lang, word
+
+    def __contains__(self, node: tuple[str, LanguageCode]) -> bool:
+        try:
+            self.id(*node)
+        except KeyError:
+            return False
+        return True
+
+    def _relation_ids(self, relations: Iterable[str] | None) -> list[int] | None:
+        if relations is None:
+            return None
+        return [self.relations.index(r) for r in relations if r in self.relations]
+
+    def neighbors(
+        self,
+        word: str,
+        lang: LanguageCode,
+        relations: Iterable[str] | None = None,
+        incoming: bool = False,
+    ) -> list[tuple[str, LanguageCode, str]]:
+        """`(relation, lang, word)` for each edge out of (or, with `incoming`, into) a word"""
+        csr = self._csr["in" if incoming else "out"]
+        i = self.id(word, lang)
+        start, end = csr["indptr"][i], csr["indptr"][i + 1]
+        relation_ids = self._relation_ids(relations)
+
+        return [
+            (self.relations[r], *self.node(j))
+            for j, r in zip(csr["indices"][start:end].tolist(), csr["relations"][start:end].tolist())
+            if relation_ids is None or r in relation_ids
+        ]
+
+    def expand(
+        self,
+        word: str,
+        lang: LanguageCode,
+        hops: int = 1,
+        relations: Iterable[str] | None = None,
+        incoming: bool = False,
+    ) -> dict[Node, int]:
+        """Every word within `hops` edges of a word, and how many hops away it is"""
+        csr = self._csr["in" if incoming else "out"]
+        relation_ids = self._relation_ids(relations)
+        start = self.id(word, lang)
+        distances = {start: 0}
+        frontier = np.array([start], dtype=np.int64)
+
+        for hop in range(1, hops + 1):
+            neighbors, _ = _gather(csr, frontier, relation_ids)
+            new = [j for j in np.unique(neighbors).tolist() if j not in distances]
+            if not new:
+                break
+
+            distances.update((j, hop) for j in new)
+            frontier = np.array(new, dtype=np.int64)
+
+        return {self.node(i): distance for i, distance in distances.items()}
+
+    def shortest_path(
+        self, source: tuple[str, LanguageCode], target: tuple[str, LanguageCode],
+        relations: Iterable[str] | None = None, max_hops: int = 6,
+    ) -> list[Node] | None:
+        """The shortest chain of words from `source` to `target` (`(word, lang)`s), following edges either way
+
+        Searches from both ends at once, one level at a time. `None` if they aren't
+        connected within `max_hops`.
+        """
+        relation_ids = self._relation_ids(relations)
+        start, goal = self.id(*source), self.id(*target)
+
+        if start == goal:
+            return [self.node(start)]
+
+        # Each side's parents (towards its own end), and frontier
+        parents = [{start: -1}, {goal: -1}]
+        frontiers = [np.array([start], dtype=np.int64), np.array([goal], dtype=np.int64)]
+
+        for _ in range(max_hops):
+            # Expand the smaller side
+            side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+            seen, other = parents[side], parents[1 - side]
+            new, meeting = [], None
+
+            for direction in ("out", "in"):
+                neighbors, via = _gather(self._csr[direction], frontiers[side], relation_ids)
+
+                for j, parent in zip(neighbors.tolist(), via.tolist()):
+                    if j not in seen:
+                        seen[j] = parent
+                        new.append(j)
+                        if j in other and meeting is None:
+                            meeting = j
+
+            if meeting is not None:
+                return self._path(meeting, *parents)
+            if not new:
+                return None
+
+            frontiers[side] = np.array(new, dtype=np.int64)
+
+        return None
+
+    def _path(self, meeting: int, forward: dict[int, int], backward: dict[int, int]) -> list[Node]:
+        path, i = [], meeting
+        while i != -1:
+            path.append(i)
+            i = forward[i]
+        path.reverse()
+
+        i = backward[meeting]
+        while i != -1:
+            path.append(i)
+            i = backward[i]
+
+        return [self.node(i) for i in path]
+
+    def ancestry(
+        self, word: str, lang: LanguageCode, max_depth: int = 10
+    ) -> list[tuple[str, LanguageCode, str]]:
+        """Where a word came from (`(relation, lang, word)`), following `ETYMOLOGY_RELATIONS`
+
+        In the order the etymologies give them (the most recent ancestor first), then their
+        own ancestors (if they have an entry), and so on.
+        """
+        csr = self._csr["out"]
+        relation_ids = self._relation_ids(ETYMOLOGY_RELATIONS)
+        start = self.id(word, lang)
+        seen, chain = {start}, []
+        queue = deque([(start, 0)])
+
+        while queue:
+            i, depth = queue.popleft()
+            if depth >= max_depth:
+                continue
+
+            begin, end = csr["indptr"][i], csr["indptr"][i + 1]
+            edges = zip(csr["indices"][begin:end].tolist(), csr["relations"][begin:end].tolist())
+
+            for j, r in edges:
+                if r in relation_ids and j not in seen:
+                    seen.add(j)
+                    chain.append((self.relations[r], *self.node(j)))
+                    queue.append((j, depth + 1))
+
+        return chain
+
+    def save(self, path: str | Path):
+        """Writes the graph to the directory `path` (see `load`)"""
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+
+        (path / "labels.bin").write_bytes(
+            bytes(self._labels.blob[self._labels.start:self._labels.start + self._labels.size])
+        )
+        np.save(path / "label_offsets.npy", np.asarray(self._labels.offsets, dtype=np.uint32))
+
+        for direction, csr in self._csr.items():
+            for name, values in csr.items():
+                np.save(path / f"{direction}_{name}.npy", values)
+
+        (path / "relations.json").write_text(json.dumps(self.relations))
+
+    @classmethod
+    def load(cls, path: str | Path) -> "RelationGraph":
+        """Memory-maps a graph written by `save`"""
+        _require_numpy()
+        path = Path(path)
+
+        with open(path / "labels.bin", "rb") as f:
+            # (`mmap` can't map an empty file)
+            blob = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if f.seek(0, 2) else b""
+
+        offsets = np.load(path / "label_offsets.npy", mmap_mode="r")
+
+        return cls(
+            PackedStrings(blob, memoryview(offsets)),
+            json.loads((path / "relations.json").read_text()),
+            {
+                direction: {
+                    name: np.load(path / f"{direction}_{name}.npy", mmap_mode="r")
+                    for name in ("indptr", "indices", "relations")
+                }
+                for direction in ("out", "in")
+            },
+        )
+
+
+def build_graph(dump: str, lang: LanguageCode, progress: bool = True) -> RelationGraph:
+    """Streams the `lang` entries in `dump` into a `RelationGraph`"""
+    builder = GraphBuilder()
+
+    for title, page in tqdm(iter_dump_pages(dump), unit="pages", disable=not progress, smoothing=0.1):
+        if not has_entry(page, lang):
+            continue
+
+        try:
+            builder.add_entry(title, lang, get_entry(page, lang))
+        except Exception:  # pylint: disable=broad-except
+            builder.errors += 1
+
+    return builder.build()
@@ -0,0 +1,229 @@
+"""
+# HTTP
+
+Everything we send to the Wikimedia API goes through here, so that we're a polite client:
+
+- One pooled session (connections are reused instead of reopened for every request).
+- At most `max_concurrency` requests in flight.
+- A token bucket caps the request rate (`rate` per second, in bursts of up to `burst`).
+- We send [`maxlag`](https://www.mediawiki.org/wiki/Manual:Maxlag_parameter), so when the
+  servers are struggling, they tell us to back off (and for how long, via `Retry-After`).
+  So do `429`s and `503`s. Until then, *every* request waits.
+- Failed requests are retried with exponential backoff (+ jitter).
+
+Requests themselves are blocking (`requests`), so they run in worker threads. That's
+plenty for an I/O-bound client, and it means no extra dependencies.
+
+Latencies and throughput are tracked in `HTTPClient.stats`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import random
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    # (Imported by the first `HTTPClient`, since it takes a while & most commands never make a request)
+    import requests
+
+USER_AGENT = "open-dictionary (https://github.com/jqhoogland/open-dictionary)"
+
+
+class APIError(RuntimeError):
+    """The API keeps on refusing (e.g., because of `maxlag`), even after retrying."""
+
+
+@dataclass
+class HTTPOptions:
+    #: Max. requests in flight
+    max_concurrency: int = 8
+
+    #: Max. requests per second (on average). `None` for no limit
+    rate: float | None = 20.
+
+    #: Max. requests in a burst
+    burst: int = 8
+
+    #: Seconds before giving up on a request
+    timeout: float = 30.
+
+    #: Retries (after the first attempt) before raising
+    max_retries: int = 5
+
+    #: Backoff before the first retry (doubles each time, up to `max_backoff`)
+    backoff: float = 0.5
+    max_backoff: float = 60.
+
+    #: Ask the API to refuse requests if replication lag is above this many seconds
+    maxlag: int | None = 5
+
+    user_agent: str = USER_AGENT
+
+
+@dataclass
+class RequestStats:
+    requests: int = 0
+    retries: int = 0
+    errors: int = 0
+
+    #: Latencies (in seconds) of the most recent requests
+    latencies: deque[float] = field(default_factory=lambda: deque(maxlen=10_000), repr=False)
+    started: float = field(default_factory=time.monotonic, repr=False)
+
+    def percentile(self, q: float) -> float:
+        """The `q`-th percentile (0-100) of recent request latencies (in seconds)"""
+        if not self.latencies:
+            return 0.
+
+        latencies = sorted(self.latencies)
+        return latencies[min(len(latencies) - 1, int(q / 100 * len(latencies)))]
+
+    @property
+    def throughput(self) -> float:
+        """Requests per second (since we started)"""
+        return self.requests / max(time.monotonic() - self.started, 1e-9)
+
+    def summary(self) -> dict:
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "errors": self.errors,
+            "throughput": self.throughput,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+        }
+
+
+class TokenBucket:
+    """Allows `rate` acquisitions per second, in bursts of up to `burst`.
+
+    `pause` stops *all* acquisitions for a while (e.g., when the API says `Retry-After`).
+    """
+
+    def __init__(self, rate: float | None, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+
+                if not self.rate:
+                    return
+
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def pause(self, seconds: float):
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+def _retry_after(response: requests.Response) -> float | None:
+    try:
+        return float(response.headers["Retry-After"])
+    except (KeyError, ValueError):
+        return None
+
+
+class HTTPClient:
+    """See the module docstring. Use one per event loop."""
+
+    def __init__(self, opts: HTTPOptions | None = None):
+        # pylint: disable=import-outside-toplevel,redefined-outer-name
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.opts = opts or HTTPOptions()
+        self.stats = RequestStats()
+
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = self.opts.user_agent
+        adapter = HTTPAdapter(
+            pool_connections=1, pool_maxsize=self.opts.max_concurrency
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._network_errors = (requests.ConnectionError, requests.Timeout)
+
+        self._semaphore = asyncio.Semaphore(self.opts.max_concurrency)
+        self._bucket = TokenBucket(self.opts.rate, self.opts.burst)
+
+    def _backoff(self, attempt: int) -> float:
+        delay = min(self.opts.max_backoff, self.opts.backoff * 2 ** attempt)
+        return delay * random.uniform(0.5, 1.)
+
+    async def get_json(self, url: str, params: dict) -> dict:
+        """GETs `url` and returns the decoded JSON (retrying as necessary)"""
+        if self.opts.maxlag is not None:
+            params = {**params, "maxlag": self.opts.maxlag}
+
+        for attempt in range(self.opts.max_retries + 1):
+            last_attempt = attempt == self.opts.max_retries
+            delay = self._backoff(attempt)
+
+            async with self._semaphore:
+                await self._bucket.acquire()
+                start = time.monotonic()
+
+                try:
+                    response = await asyncio.to_thread(
+                        self.session.get, url, params=params, timeout=self.opts.timeout
+                    )
+                except self._network_errors:
+                    self.stats.errors += 1
+                    if last_attempt:
+                        raise
+                    response = None
+                finally:
+                    self.stats.requests += 1
+                    self.stats.latencies.append(time.monotonic() - start)
+
+            if response is None:
+                pass
+            elif response.status_code == 429 or response.status_code >= 500:
+                self.stats.errors += 1
+                if last_attempt:
+                    response.raise_for_status()
+
+                # The server is overloaded: *everyone* waits (and as long as it asks us to)
+                delay = _retry_after(response) or delay
+                self._bucket.pause(delay)
+            else:
+                response.raise_for_status()
+                data = response.json()
+
+                if data.get("error", {}).get("code") != "maxlag":
+                    return data
+                if last_attempt:
+                    raise APIError(data["error"].get("info", "maxlag"))
+
+                delay = _retry_after(response) or delay
+                self._bucket.pause(delay)
+
+            self.stats.retries += 1
+            await asyncio.sleep(delay)
+
+        raise APIError(f"Gave up after {self.opts.max_retries} retries")  # Unreachable
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,351 @@
+"""
+# Incremental updates
+
+Only a tiny fraction of Wiktionary changes from one week to the next, so re-parsing the
+whole dump every time is a waste. Instead, we remember what the previous export was made
+from (`IncrementalState`): the revision of each page, and a hash of each of its entries.
+
+Then, given a list of changes (from the API's recent changes, or a file of titles):
+
+1. Pages whose revision we already have are skipped.
+2. The rest are fetched (50 per request, see `WiktionaryClient.fetch_many`).
+3. Only the entries (i.e., language sections) whose wikitext actually changed get parsed.
+   An edit to the French section of "chat" doesn't touch the English entry.
+
+The output is a delta against the previous export, as JSONL:
+
+```json
+{"op": "upsert", "word": "foo", "lang": "en", "revid": 123, "entries": [...]}
+{"op": "delete", "word": "bar", "lang": "en"}
+```
+
+where an upsert replaces *all* entries for that word & language.
+
+```python
+state = IncrementalState("state.sqlite")
+seed_state(state, "enwiktionary-latest-pages-articles.xml.bz2", ["en"], since="2022-07-01T00:00:00Z")
+
+# ... a week later
+refresh_recent_changes(WiktionaryClient(), state, ["en"], "delta.jsonl")
+```
+
+So the cost of a refresh depends on the number of edits, not the size of the dictionary.
+
+"""
+
+import hashlib
+import json
+import sqlite3
+from dataclasses import dataclass, fields
+from pathlib import Path
+from typing import IO, Generator, Iterable
+
+from tqdm import tqdm
+
+from wiktionary._types import LanguageCode
+from wiktionary.api import WiktionaryClient
+from wiktionary.dump import NS_MAIN, iter_dump_revisions
+from wiktionary.en.parser import EnParser
+from wiktionary.en.templates.records import json_default
+from wiktionary.utils import ParsedPage, get_full_lang, index_entries
+
+
+@dataclass
+class Change:
+    title: str
+    #: The page's new revision (if we know it)
+    revid: int | None = None
+    deleted: bool = False
+    timestamp: str | None = None
+
+
+@dataclass
+class RefreshStats:
+    #: Changed pages (after deduplicating)
+    changes: int = 0
+    #: Pages we had to fetch
+    fetched: int = 0
+    #: Pages whose revision we already had
+    skipped: int = 0
+    #: Entries that were re-parsed (& upserted)
+    upserts: int = 0
+    deletes: int = 0
+    #: Entries on changed pages whose wikitext didn't change
+    unchanged: int = 0
+    errors: int = 0
+
+
+def changes_from_recent_changes(
+    recent_changes: Iterable[dict], namespace: int = NS_MAIN
+) -> Generator[Change, None, None]:
+    """Converts the API's recent changes (see `WiktionaryClient.fetch_recent_changes`) to `Change`s"""
+    for rc in recent_changes:
+        timestamp = rc.get("timestamp")
+
+        if rc["type"] in ("edit", "new"):
+            yield Change(rc["title"], rc.get("revid"), timestamp=timestamp)
+        elif rc["type"] == "log" and rc.get("logtype") == "delete":
+            # Deletions, but also restores, revision deletions, ...
+            yield Change(rc["title"], deleted=rc.get("logaction") == "delete", timestamp=timestamp)
+        elif rc["type"] == "log" and rc.get("logtype") == "move":
+            # The old title is (usually) a redirect now, which we'll treat as a deletion
+            yield Change(rc["title"], timestamp=timestamp)
+
+            params = rc.get("logparams", {})
+            if params.get("target_title") and params.get("target_ns", namespace) == namespace:
+                yield Change(params["target_title"], timestamp=timestamp)
+
+
+def _change(data: dict) -> Change:
+    """The `Change` in `data` (ignoring any other keys, e.g., the rest of a recent change)"""
+    if not isinstance(data, dict) or not isinstance(data.get("title"), str):
+        raise ValueError("Expected an object with a \"title\"")
+
+    return Change(**{f.name: data[f.name] for f in fields(Change) if f.name in data})
+
+
+def read_changes(path: str | Path) -> Generator[Change, None, None]:
+    """Reads changes from a file with one title per line, or one `Change` per line as JSON."""
+    with open(path, encoding="utf-8") as f:
+        for n, line in enumerate(f, 1):
+            if not (line := line.strip()):
+                continue
+
+            if not line.startswith("{"):
+                yield Change(line)
+                continue
+
+            try:
+                yield _change(json.loads(line))
+            except ValueError as e:
+                raise ValueError(f"{path}, line {n}: Not a change ({e})") from e
+
+
+def _hash(entry: str) -> bytes:
+    return hashlib.blake2b(entry.encode("utf-8"), digest_size=16).digest()
+
+
+def entry_hashes(page: str, langs: Iterable[LanguageCode]) -> dict[LanguageCode, bytes]:
+    """A hash of each of `page`'s entries in `langs` (leaving out the ones it doesn't have)"""
+    index = index_entries(page)
+    hashes = {}
+
+    for lang in langs:
+        if (span := index.get(get_full_lang(lang))) is not None:
+            hashes[lang] = _hash(page[span[0]:span[1]])
+
+    return hashes
+
+
+class IncrementalState:
+    """What the previous export was made from, in a SQLite file."""
+
+    def __init__(self, path: str | Path):
+        self._db = sqlite3.connect(str(path))
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS pages (
+                title TEXT PRIMARY KEY,
+                revid INTEGER
+            );
+            CREATE TABLE IF NOT EXISTS entries (
+                title TEXT NOT NULL,
+                lang TEXT NOT NULL,
+                hash BLOB NOT NULL,
+                PRIMARY KEY (title, lang)
+            );
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            );
+            """
+        )
+
+    def revid(self, title: str) -> int | None:
+        row = self._db.execute("SELECT revid FROM pages WHERE title = ?", (title,)).fetchone()
+        return row[0] if row else None
+
+    def hashes(self, title: str) -> dict[LanguageCode, bytes]:
+        return dict(self._db.execute("SELECT lang, hash FROM entries WHERE title = ?", (title,)))
+
+    def update(self, title: str, revid: int | None, hashes: dict[LanguageCode, bytes]):
+        """Records a page's revision & entries (replacing whatever we had before)"""
+        self._db.execute("INSERT OR REPLACE INTO pages VALUES (?, ?)", (title, revid))
+        self._db.execute("DELETE FROM entries WHERE title = ?", (title,))
+        self._db.executemany(
+            "INSERT INTO entries VALUES (?, ?, ?)",
+            ((title, lang, h) for lang, h in hashes.items()),
+        )
+
+    def delete(self, title: str):
+        self._db.execute("DELETE FROM pages WHERE title = ?", (title,))
+        self._db.execute("DELETE FROM entries WHERE title = ?", (title,))
+
+    @property
+    def since(self) -> str | None:
+        """The timestamp the next refresh should pick up from"""
+        row = self._db.execute("SELECT value FROM meta WHERE key = 'since'").fetchone()
+        return row[0] if row else None
+
+    @since.setter
+    def since(self, timestamp: str):
+        self._db.execute("INSERT OR REPLACE INTO meta VALUES ('since', ?)", (timestamp,))
+
+    def commit(self):
+        self._db.commit()
+
+    def close(self):
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+
+def seed_state(
+    state: IncrementalState,
+    dump: str | IO[bytes],
+    langs: list[LanguageCode],
+    since: str | None = None,
+    progress: bool = True,
+) -> int:
+    """Records the revisions & entries of the dump the previous export was made from.
+
+    (This doesn't parse anything, so it's much faster than the export itself.)
+    Pass the dump's date as `since` to pick up recent changes from there.
+    Returns the number of pages recorded.
+    """
+    count = 0
+
+    for title, revid, page in tqdm(iter_dump_revisions(dump), unit="pages", disable=not progress):
+        if hashes := entry_hashes(page, langs):
+            state.update(title, revid, hashes)
+            count += 1
+
+    if since is not None:
+        state.since = since
+
+    state.commit()
+    return count
+
+
+def _write(out: IO[str], op: str, **data):
+    out.write(json.dumps({"op": op, **data}, ensure_ascii=False, default=json_default))
+    out.write("\n")
+
+
+def refresh(
+    client: WiktionaryClient,
+    state: IncrementalState,
+    changes: Iterable[Change],
+    langs: list[LanguageCode],
+    out: str | Path | IO[str],
+    parser=EnParser,
+) -> RefreshStats:
+    """Writes the delta for `changes` to `out` (as JSONL) and updates `state` to match."""
+    if isinstance(out, (str, Path)):
+        with open(out, "w", encoding="utf-8") as f:
+            return refresh(client, state, changes, langs, f, parser)
+
+    stats = RefreshStats()
+
+    # Only the latest change to a page matters
+    latest: dict[str, Change] = {}
+    for change in changes:
+        latest[change.title] = change
+
+    stats.changes = len(latest)
+    to_fetch = []
+
+    def delete(title: str, old: dict[LanguageCode, bytes]):
+        for lang in old:
+            _write(out, "delete", word=title, lang=lang)
+            stats.deletes += 1
+        state.delete(title)
+
+    for title, change in latest.items():
+        if change.deleted:
+            delete(title, state.hashes(title))
+        elif change.revid is not None and change.revid == state.revid(title):
+            stats.skipped += 1
+        else:
+            to_fetch.append(title)
+
+    for title, revision in client.fetch_many(to_fetch):
+        stats.fetched += 1
+        old = state.hashes(title)
+
+        if revision is None:
+            delete(title, old)
+            continue
+
+        page = revision.wikitext
+        index = index_entries(page)
+        new = {}
+
+        for lang in langs:
+            if (span := index.get(get_full_lang(lang))) is None:
+                if lang in old:
+                    _write(out, "delete", word=title, lang=lang)
+                    stats.deletes += 1
+                continue
+
+            entry = page[span[0]:span[1]]
+            new[lang] = _hash(entry)
+
+            if new[lang] == old.get(lang):
+                stats.unchanged += 1
+                continue
+
+            try:
+                parsed = ParsedPage(entry)
+                entries = parser.parse(title, parsed.entry_sections(lang), lang, page=parsed)
+            except Exception:  # pylint: disable=broad-except
+                # Keep the old hash, so this entry counts as changed the next time the page does
+                stats.errors += 1
+                if lang in old:
+                    new[lang] = old[lang]
+                else:
+                    del new[lang]
+                continue
+
+            _write(
+                out, "upsert",
+                word=title, lang=lang, revid=revision.revid,
+                entries=[e.to_dict() for e in entries],
+            )
+            stats.upserts += 1
+
+        state.update(title, revision.revid, new)
+
+    state.commit()
+    return stats
+
+
+def refresh_recent_changes(
+    client: WiktionaryClient,
+    state: IncrementalState,
+    langs: list[LanguageCode],
+    out: str | Path | IO[str],
+    since: str | None = None,
+    parser=EnParser,
+) -> RefreshStats:
+    """`refresh`, with every change since `since` (or since the last refresh) from the API.
+
+    Afterwards, `state.since` points at the last change we saw, for next time.
+    """
+    since = since or state.since
+
+    if since is None:
+        raise ValueError("Don't know where to start. Pass `since` (an ISO 8601 timestamp).")
+
+    changes = list(changes_from_recent_changes(client.fetch_recent_changes(since)))
+    stats = refresh(client, state, changes, langs, out, parser)
+
+    if timestamps := [c.timestamp for c in changes if c.timestamp]:
+        state.since = max(timestamps)
+        state.commit()
+
+    return stats
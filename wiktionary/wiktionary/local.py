@@ -0,0 +1,380 @@
+"""
+# Local dictionary
+
+`WiktionaryClient.fetch_entry` takes anywhere from 300ms to a few seconds (it has to
+download & parse the page). To serve lookups, build a local dictionary file once:
+
+```sh
+python -m wiktionary.cli dump enwiktionary-latest-pages-articles.xml.bz2 en --out out/
+python -m wiktionary.cli store out/ en.dictionary
+```
+
+and then look words up in well under a millisecond:
+
+```python
+dictionary = LocalDictionary("en.dictionary")
+dictionary.get("water", "en")  # Same as `WiktionaryClient().fetch_entry("water", "en")`
+```
+
+The file is read-only and memory-mapped, so any number of processes can open it, and
+they all share the OS's page cache (instead of each loading its own copy).
+
+## Format
+
+```
+header | records ... | compression dictionary | hash index
+```
+
+- Each record is one word's entries in one language (`[EnEntry.to_dict(), ...]`), serialized
+  with [msgpack](https://msgpack.org/), then compressed with zstd using a dictionary built
+  from a sample of the records. Entries are small and very alike, so a shared dictionary
+  makes a big difference. (To build one without `msgpack` or `zstandard`, pass
+  `serializer="json"` and/or `codec="zlib"`: bigger and slower, but only the standard library.)
+- The hash index is an open-addressing table of `(hash, offset, length)` slots, so a
+  lookup is a hash, (usually) one probe and one decompression. Records start with their
+  key, so hash collisions are caught.
+
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+import zlib
+from array import array
+from dataclasses import dataclass, is_dataclass
+from pathlib import Path
+from typing import Any, Iterable
+
+from wiktionary._types import LanguageCode
+from wiktionary.en.parser import AltForm, EnEntry
+from wiktionary.en.templates.records import json_default
+from wiktionary.utils import EntryNotFoundError, get_full_lang
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+MAGIC = b"ODLD"
+VERSION = 1
+
+#: magic, version, serializer, codec, # of records, # of slots, dictionary offset & size, index offset
+_HEADER = struct.Struct("<4sH8s8sQQQQQ")
+#: hash, record offset, record length
+_SLOT = struct.Struct("<QQI")
+#: key length
+_KEY = struct.Struct("<H")
+
+
+class LocalDictionaryError(ValueError):
+    """Not a (readable) local dictionary file."""
+
+
+def _key(word: str, lang: LanguageCode) -> bytes:
+    return f"{lang}\0{word}".encode("utf-8")
+
+
+def _hash(key: bytes) -> int:
+    # (`hash()` is randomized per process, and we need the same hash in every process)
+    h = int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little")
+    return h or 1  # 0 marks an empty slot
+
+
+#: How records can be serialized (`msgpack` needs `pip install msgpack`)
+SERIALIZERS = ["msgpack", "json"]
+#: How records can be compressed (`zstd` needs `pip install zstandard`)
+CODECS = ["zstd", "zlib"]
+
+
+def _require_msgpack():
+    if msgpack is None:
+        raise ImportError('msgpack records need `msgpack`: `pip install msgpack` (or use `serializer="json"`)')
+
+
+def _require_zstandard():
+    if zstandard is None:
+        raise ImportError('zstd records need `zstandard`: `pip install zstandard` (or use `codec="zlib"`)')
+
+
+def _serialize(serializer: str, entries: list[dict]) -> bytes:
+    if serializer == "msgpack":
+        return msgpack.packb(entries, use_bin_type=True, default=json_default)
+    return json.dumps(entries, ensure_ascii=False, separators=(",", ":"), default=json_default).encode("utf-8")
+
+
+def _deserialize(serializer: str, data: bytes) -> list[dict]:
+    if serializer == "msgpack":
+        return msgpack.unpackb(data, raw=False)
+    return json.loads(data)
+
+
+def _to_entry(data: dict) -> EnEntry:
+    return EnEntry(**{**data, "alt_forms": [AltForm(**a) for a in data.get("alt_forms") or []]})
+
+
+class _Codec:
+    """Compresses records with a shared dictionary"""
+
+    def __init__(self, codec: str, dictionary: bytes):
+        self.codec = codec
+        self.dictionary = dictionary
+
+        if codec == "zstd":
+            _require_zstandard()
+            zdict = zstandard.ZstdCompressionDict(dictionary) if dictionary else None
+            self._compressor = zstandard.ZstdCompressor(level=9, dict_data=zdict)
+            self._decompressor = zstandard.ZstdDecompressor(dict_data=zdict)
+        elif codec != "zlib":
+            raise LocalDictionaryError(f"Unknown codec: {codec}")
+
+    @classmethod
+    def train(cls, codec: str, samples: list[bytes], size: int = 64 * 1024) -> "_Codec":
+        if codec == "zstd":
+            _require_zstandard()
+            try:
+                dictionary = zstandard.train_dictionary(size, samples).as_bytes()
+            except zstandard.ZstdError:
+                # (Too few samples to train on)
+                dictionary = b""
+            return cls("zstd", dictionary)
+
+        # zlib can only look back 32KB, and prefers the end of its dictionary
+        return cls("zlib", b"".join(samples)[-32 * 1024:])
+
+    def compress(self, data: bytes) -> bytes:
+        if self.codec == "zstd":
+            return self._compressor.compress(data)
+
+        compressor = zlib.compressobj(9, zdict=self.dictionary) if self.dictionary else zlib.compressobj(9)
+        return compressor.compress(data) + compressor.flush()
+
+    def decompress(self, data) -> bytes:
+        if self.codec == "zstd":
+            return self._decompressor.decompress(data)
+
+        decompressor = zlib.decompressobj(zdict=self.dictionary) if self.dictionary else zlib.decompressobj()
+        return decompressor.decompress(data)
+
+
+@dataclass
+class BuildStats:
+    words: int = 0
+    entries: int = 0
+    #: Serialized (but not yet compressed) bytes
+    raw_bytes: int = 0
+    #: Bytes on disk
+    size: int = 0
+
+    @property
+    def ratio(self) -> float:
+        return self.raw_bytes / self.size if self.size else 0.
+
+
+def _group_words(entries: Iterable[Any]) -> Iterable[tuple[str, LanguageCode, list[dict]]]:
+    """Consecutive entries for the same word & language, together"""
+    current, group = None, []
+
+    for entry in entries:
+        if is_dataclass(entry):
+            entry = entry.to_dict()
+
+        key = entry["word"], entry["lang"]
+        if key != current and group:
+            yield *current, group
+            group = []
+
+        current = key
+        group.append(entry)
+
+    if group:
+        yield *current, group
+
+
+def build_local_dictionary(
+    entries: Iterable[Any],
+    path: str | Path,
+    samples: int = 2_000,
+    serializer: str = "msgpack",
+    codec: str = "zstd",
+) -> BuildStats:
+    """Writes `entries` (`EnEntry`s or their `to_dict()`s, e.g., from `pipeline.iter_shards`) to `path`.
+
+    A word's entries (i.e., etymologies) should come one after the other. The compression
+    dictionary is trained on the first `samples` words. See `SERIALIZERS` and `CODECS` for
+    the other arguments.
+    """
+    if serializer not in SERIALIZERS:
+        raise ValueError(f"Unknown serializer: {serializer} (expected one of {', '.join(SERIALIZERS)})")
+    if codec not in CODECS:
+        raise ValueError(f"Unknown codec: {codec} (expected one of {', '.join(CODECS)})")
+    if serializer == "msgpack":
+        _require_msgpack()
+    if codec == "zstd":
+        _require_zstandard()
+
+    words = _group_words(entries)
+    stats = BuildStats()
+
+    # Hold on to the first few records (to train the compression dictionary on)
+    buffered = []
+    for word in words:
+        buffered.append(word)
+        if len(buffered) >= samples:
+            break
+
+    compression = _Codec.train(codec, [_serialize(serializer, group) for *_, group in buffered])
+
+    # (Arrays, rather than lists of ints, since there can be millions of words)
+    hashes, offsets, lengths = array("Q"), array("Q"), array("L")
+    tmp = Path(f"{path}.tmp")
+
+    with open(tmp, "wb") as f:
+        f.write(b"\0" * _HEADER.size)
+
+        def write(word: str, lang: LanguageCode, group: list[dict]):
+            key = _key(word, lang)
+            data = _serialize(serializer, group)
+            record = _KEY.pack(len(key)) + key + compression.compress(data)
+
+            hashes.append(_hash(key))
+            offsets.append(f.tell())
+            lengths.append(len(record))
+            f.write(record)
+
+            stats.words += 1
+            stats.entries += len(group)
+            stats.raw_bytes += len(data)
+
+        for word in buffered:
+            write(*word)
+        del buffered
+
+        for word in words:
+            write(*word)
+
+        dictionary_offset = f.tell()
+        f.write(compression.dictionary)
+
+        # At most half full, so probes stay short
+        slots = 1 << max(4, (2 * len(hashes) - 1).bit_length())
+        index = bytearray(slots * _SLOT.size)
+
+        count = 0
+
+        for h, offset, length in zip(hashes, offsets, lengths):
+            i = h & (slots - 1)
+            while True:
+                existing = _SLOT.unpack_from(index, i * _SLOT.size)[0]
+                # (If a word shows up twice, the last one wins)
+                if existing in (0, h):
+                    count += existing == 0
+                    _SLOT.pack_into(index, i * _SLOT.size, h, offset, length)
+                    break
+                i = (i + 1) & (slots - 1)
+
+        index_offset = f.tell()
+        f.write(index)
+        stats.words = count
+
+        f.seek(0)
+        f.write(_HEADER.pack(
+            MAGIC, VERSION, serializer.encode(), codec.encode(), count, slots,
+            dictionary_offset, len(compression.dictionary), index_offset,
+        ))
+        stats.size = index_offset + len(index)
+
+    os.replace(tmp, path)
+    return stats
+
+
+class LocalDictionary:
+    """Looks up entries in a file written by `build_local_dictionary` (see the module docstring)."""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+
+        with open(self.path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if len(self._mmap) < _HEADER.size:
+            raise LocalDictionaryError(f"Not a local dictionary: {path}")
+
+        (
+            magic, version, serializer, codec, self._count, self._slots,
+            dictionary_offset, dictionary_size, self._index_offset,
+        ) = _HEADER.unpack_from(self._mmap)
+
+        if magic != MAGIC:
+            raise LocalDictionaryError(f"Not a local dictionary: {path}")
+        if version != VERSION:
+            raise LocalDictionaryError(f"Unsupported version {version} (expected {VERSION}): {path}")
+
+        self._serializer = serializer.rstrip(b"\0").decode()
+        if self._serializer not in SERIALIZERS:
+            raise LocalDictionaryError(f"Unknown serializer {self._serializer}: {path}")
+        if self._serializer == "msgpack":
+            _require_msgpack()
+
+        self._codec = _Codec(
+            codec.rstrip(b"\0").decode(),
+            self._mmap[dictionary_offset:dictionary_offset + dictionary_size],
+        )
+        self._view = memoryview(self._mmap)
+
+    def _find(self, word: str, lang: LanguageCode) -> memoryview | None:
+        """The (compressed) record for a word, as a view into the file"""
+        key = _key(word, lang)
+        h = _hash(key)
+        mask = self._slots - 1
+        i = h & mask
+
+        while True:
+            slot_hash, offset, length = _SLOT.unpack_from(self._mmap, self._index_offset + i * _SLOT.size)
+
+            if slot_hash == 0:
+                return None
+
+            if slot_hash == h:
+                (key_length,) = _KEY.unpack_from(self._mmap, offset)
+                start = offset + _KEY.size
+
+                if self._view[start:start + key_length] == key:
+                    return self._view[start + key_length:offset + length]
+
+            i = (i + 1) & mask
+
+    def get_dicts(self, word: str, lang: LanguageCode) -> list[dict]:
+        """Same as `get`, but as plain dicts (i.e., `EnEntry.to_dict()`), which is a bit faster"""
+        record = self._find(word, lang)
+
+        if record is None:
+            raise EntryNotFoundError(f"No {get_full_lang(lang)} entry found")
+
+        return _deserialize(self._serializer, self._codec.decompress(record))
+
+    def get(self, word: str, lang: LanguageCode) -> list[EnEntry]:
+        """`word`'s entries in `lang` (one per etymology), same as `WiktionaryClient.fetch_entry`"""
+        return [_to_entry(e) for e in self.get_dicts(word, lang)]
+
+    def __contains__(self, key: tuple[str, LanguageCode]) -> bool:
+        return self._find(*key) is not None
+
+    def __len__(self) -> int:
+        return self._count
+
+    def close(self):
+        self._view.release()
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
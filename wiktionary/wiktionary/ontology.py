@@ -0,0 +1,80 @@
+"""
+# Ontology
+
+The [Open Dictionary ontology](/ontology) defines the vocabulary (and JSON-LD `@context`)
+our triples use. It's loaded once per process (and frozen, so nobody can change it
+out from under everyone else), not once per entry.
+
+The package ships a copy of it as `wiktionary/data/` (package data, see `pyproject.toml`),
+so it's there wherever the package is installed. `/ontology` is the source of truth: copy
+the files over when it changes (`tests/test_ontology.py` checks they're in sync).
+"""
+
+import json
+from functools import lru_cache
+from importlib.resources import files
+from importlib.resources.abc import Traversable
+from types import MappingProxyType
+from typing import Any, Mapping
+
+ONTOLOGY_DIR = files("wiktionary") / "data"
+ONTOLOGY_PATH = ONTOLOGY_DIR / "wiktionary.json"
+LANGUAGE_ONTOLOGY_PATH = ONTOLOGY_DIR / "language.json"
+
+#: Where wikitext templates (i.e., `temp:` IRIs) live
+TEMPLATES_IRI = "http://www.wiktionary.org/wiki/Template:"
+
+
+def _freeze(value: Any) -> Any:
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def _load(path: Traversable) -> Mapping[str, Any]:
+    return _freeze(json.loads(path.read_text(encoding="utf-8")))
+
+
+@lru_cache(maxsize=None)
+def get_ontology() -> Mapping[str, Any]:
+    """The (read-only) ontology in `ontology/wiktionary.json`"""
+    return _load(ONTOLOGY_PATH)
+
+
+@lru_cache(maxsize=None)
+def get_language_ontology() -> Mapping[str, Any]:
+    """The (read-only) ontology of relationships between words in `ontology/language.json`"""
+    return _load(LANGUAGE_ONTOLOGY_PATH)
+
+
+@lru_cache(maxsize=None)
+def get_predicate(name: str) -> str:
+    """The full IRI of one of the terms in `ontology/language.json` (e.g., "synonymOf")"""
+    ontology = get_language_ontology()
+
+    if name not in ontology:
+        raise ValueError(f"Unknown term: {name}")
+
+    return ontology["@context"]["od"] + ontology[name]["@id"]
+
+
+@lru_cache(maxsize=None)
+def get_context() -> Mapping[str, str]:
+    """The (read-only) compact `@context` we attach to JSON-LD entries"""
+    context = get_ontology()["@context"]
+
+    return MappingProxyType({
+        "@base": context["@base"],
+        "wt": context["wt"],
+        "wt-en": context["wt-en"],
+        "od": context["od"],
+        "temp": TEMPLATES_IRI,
+    })
+
+
+@lru_cache(maxsize=None)
+def get_context_json() -> str:
+    """`get_context()`, already serialized (for writing many JSON-LD documents)"""
+    return json.dumps(dict(get_context()), ensure_ascii=False)
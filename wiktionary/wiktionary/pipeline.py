@@ -0,0 +1,223 @@
+"""
+# Parse pipeline
+
+`EnParser.parse` is pure CPU work on wikitext, so converting a whole dump on one core
+leaves most of the machine idle. This fans pages out to a pool of worker processes in
+chunks and writes the parsed entries as sharded JSONL.
+
+The main process only reads the dump (and throws away pages without an entry in the
+language we want). Workers parse and serialize, so all that crosses the process boundary
+is wikitext going in and JSON lines coming out.
+
+Output order is deterministic: chunks are written in the order they were read from the
+dump, no matter which worker finishes first. The number of chunks in flight is bounded
+(`max_pending`), so a slow writer (or a fast reader) can't balloon memory.
+
+```
+out/
+  part-00000.jsonl
+  part-00001.jsonl
+  ...
+```
+
+Reading the shards back in name order (`iter_shards`) gives the dump order.
+
+Workers are forked once the template registry is loaded and compiled, and the garbage
+collector leaves everything that exists by then alone (`gc.freeze`), so the workers share
+those pages with the main process (copy-on-write) instead of each ending up with a copy.
+
+"""
+
+import gc
+import json
+import os
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from itertools import islice
+from pathlib import Path
+from typing import IO, Generator, Iterable, Iterator
+
+from tqdm import tqdm
+
+from wiktionary._types import LanguageCode
+from wiktionary.dump import has_entry, iter_dump_pages
+from wiktionary.en.parser import EnParser
+from wiktionary.en.templates.parse import TEMPLATE_REGISTRY
+from wiktionary.en.templates.records import json_default
+from wiktionary.utils import ParsedPage, get_entry
+
+Page = tuple[str, str]
+
+
+@dataclass
+class PipelineOptions:
+    #: Number of worker processes
+    workers: int = field(default_factory=lambda: os.cpu_count() or 1)
+
+    #: Pages per task sent to a worker. Larger chunks amortize IPC overhead.
+    chunk_size: int = 256
+
+    #: Maximum number of chunks in flight (submitted but not yet written).
+    #: Defaults to `4 * workers`.
+    max_pending: int | None = None
+
+    #: Maximum number of entries (lines) per output shard
+    shard_size: int = 100_000
+
+
+@dataclass
+class PipelineStats:
+    pages: int = 0
+    entries: int = 0
+    errors: int = 0
+    shards: list[Path] = field(default_factory=list)
+
+
+def parse_page(title: str, page: str, lang: LanguageCode) -> list[str]:
+    """Parses one page into JSON lines (one per entry)."""
+    parsed = ParsedPage(get_entry(page, lang))
+    entries = EnParser.parse(title, parsed.entry_sections(lang), lang, page=parsed)
+    return [json.dumps(e.to_dict(), ensure_ascii=False, default=json_default) for e in entries]
+
+
+def _parse_chunk(chunk: list[Page], lang: LanguageCode) -> tuple[list[str], int]:
+    """Worker task. Returns the JSON lines for a chunk of pages (+ the number of pages that failed)."""
+    lines = []
+    errors = 0
+
+    for title, page in chunk:
+        try:
+            lines.extend(parse_page(title, page, lang))
+        except Exception:  # pylint: disable=broad-except
+            errors += 1
+
+    return lines, errors
+
+
+def _chunks(pages: Iterable[Page], size: int) -> Iterator[list[Page]]:
+    pages = iter(pages)
+    while chunk := list(islice(pages, size)):
+        yield chunk
+
+
+class ShardWriter:
+    """Writes lines to `out_dir/part-NNNNN.jsonl`, starting a new shard every `shard_size` lines."""
+
+    def __init__(self, out_dir: str | Path, shard_size: int):
+        self.out_dir = Path(out_dir)
+        self.shard_size = shard_size
+        self.shards: list[Path] = []
+        self._file: IO[str] | None = None
+        self._count = 0
+
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+
+    def _rotate(self):
+        self.close()
+        path = self.out_dir / f"part-{len(self.shards):05d}.jsonl"
+        self.shards.append(path)
+        self._file = open(path, "w", encoding="utf-8")
+        self._count = 0
+
+    def write(self, lines: list[str]):
+        for line in lines:
+            if self._file is None or self._count >= self.shard_size:
+                self._rotate()
+
+            self._file.write(line)
+            self._file.write("\n")
+            self._count += 1
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+
+@contextmanager
+def _shared_with_workers():
+    """Gets everything the workers need ready before they're forked (see the module docstring)"""
+    TEMPLATE_REGISTRY.compile()
+    gc.freeze()
+
+    try:
+        yield
+    finally:
+        gc.unfreeze()
+
+
+def run_pipeline(
+    pages: Iterable[Page],
+    lang: LanguageCode,
+    out_dir: str | Path,
+    opts: PipelineOptions | None = None,
+    progress: bool = True,
+) -> PipelineStats:
+    """Parses `pages` across `opts.workers` processes and writes sharded JSONL to `out_dir`."""
+    opts = opts or PipelineOptions()
+    max_pending = opts.max_pending or 4 * opts.workers
+    stats = PipelineStats()
+
+    relevant = (p for p in pages if has_entry(p[1], lang))
+
+    with (
+        _shared_with_workers(),
+        ProcessPoolExecutor(max_workers=opts.workers) as pool,
+        ShardWriter(out_dir, opts.shard_size) as writer,
+        tqdm(unit="pages", disable=not progress, smoothing=0.1) as bar,
+    ):
+        pending: deque[tuple[Future, int]] = deque()
+
+        def write_oldest():
+            future, n_pages = pending.popleft()
+            lines, errors = future.result()
+            writer.write(lines)
+
+            stats.pages += n_pages
+            stats.entries += len(lines)
+            stats.errors += errors
+
+            bar.update(n_pages)
+            if stats.errors:
+                bar.set_postfix(errors=stats.errors, refresh=False)
+
+        for chunk in _chunks(relevant, opts.chunk_size):
+            # Backpressure: don't read further ahead than `max_pending` chunks
+            while len(pending) >= max_pending:
+                write_oldest()
+
+            pending.append((pool.submit(_parse_chunk, chunk, lang), len(chunk)))
+
+        while pending:
+            write_oldest()
+
+        stats.shards = writer.shards
+
+    return stats
+
+
+def convert_dump(
+    dump: str,
+    lang: LanguageCode,
+    out_dir: str | Path,
+    opts: PipelineOptions | None = None,
+    progress: bool = True,
+) -> PipelineStats:
+    """Streams `dump` through `run_pipeline`."""
+    return run_pipeline(iter_dump_pages(dump), lang, out_dir, opts, progress)
+
+
+def iter_shards(out_dir: str | Path) -> Generator[dict, None, None]:
+    """Reads the shards in `out_dir` back in order."""
+    for path in sorted(Path(out_dir).glob("part-*.jsonl")):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                yield json.loads(line)
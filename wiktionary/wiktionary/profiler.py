@@ -0,0 +1,161 @@
+"""
+# Corpus profiler
+
+Which templates do we drop (because there's no mapping for them), and which sections
+end up in the default handler? And where does parsing time go? Run the parser over a
+sample (of a dump, or of the wikitext cache) with a `Profiler` active:
+
+```sh
+python -m wiktionary.cli profile enwiktionary-latest-pages-articles.xml.bz2 en --limit 10000
+```
+
+```python
+with profiling() as profiler:
+    for title, page in pages:
+        ...  # Parse as usual
+
+print(profiler.report())
+```
+
+Everything is plain counters (and `time.perf_counter()`), and is only recorded while
+a profiler is active, so it costs nothing the rest of the time.
+
+| Category | Counts | Seconds |
+| --- | --- | --- |
+| `templates` | Every template in the entries, mapped or not | |
+| `unmapped templates` | Templates without a mapping (i.e., that `parse_template` drops) | |
+| `template mappings` | Calls of each `TemplateMapping` | Spent in its `transform` |
+| `sections` | Every section title | |
+| `section handlers` | Calls of each section handler (see `parser.parse_section`) | Spent in it |
+| `unhandled sections` | Titles that fell through to the default handler | |
+| `unhandled definition sections` | Titles under a part of speech that we skip | |
+| `pages` | Pages with an entry | Spent parsing them |
+| `errors` | Pages the parser failed on | |
+"""
+
+import json
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Generator, Iterable
+
+from wiktionary._types import LanguageCode
+
+#: The profiler that's recording (if any)
+active: "Profiler | None" = None
+
+
+@dataclass
+class Profiler:
+    counts: defaultdict[str, Counter] = field(default_factory=lambda: defaultdict(Counter))
+    seconds: defaultdict[str, Counter] = field(default_factory=lambda: defaultdict(Counter))
+
+    def count(self, category: str, name: str, n: int = 1):
+        self.counts[category][name] += n
+
+    def add_time(self, category: str, name: str, seconds: float):
+        """Counts one call of `name`, which took `seconds`"""
+        self.counts[category][name] += 1
+        self.seconds[category][name] += seconds
+
+    def merge(self, other: "Profiler"):
+        """Adds up another profiler's counts (e.g., from another process)"""
+        for category, counts in other.counts.items():
+            self.counts[category].update(counts)
+        for category, seconds in other.seconds.items():
+            self.seconds[category].update(seconds)
+
+    def ranked(self, category: str, n: int | None = None) -> list[tuple[str, int, float]]:
+        """`(name, count, seconds)`, by time spent (for timed categories) or count"""
+        counts, seconds = self.counts[category], self.seconds.get(category)
+
+        if seconds:
+            names = [name for name, _ in seconds.most_common(n)]
+        else:
+            names = [name for name, _ in counts.most_common(n)]
+
+        return [(name, counts[name], seconds[name] if seconds else 0.) for name in names]
+
+    def report(self, n: int = 20) -> str:
+        """The top `n` of each category, as text"""
+        lines = []
+
+        for category in sorted(self.counts):
+            counts, seconds = self.counts[category], self.seconds.get(category)
+            total_count, total_seconds = sum(counts.values()), sum(seconds.values()) if seconds else 0.
+
+            lines.append(f"## {category} ({len(counts)} distinct, {total_count} total)")
+
+            for name, count, spent in self.ranked(category, n):
+                share = spent / total_seconds if seconds else count / total_count
+                if seconds:
+                    lines.append(
+                        f"{share:7.1%} {spent * 1e3:10.1f}ms {count:9d}x {spent / count * 1e6:9.1f}µs  {name}"
+                    )
+                else:
+                    lines.append(f"{share:7.1%} {count:9d}x  {name}")
+
+            lines.append("")
+
+        return "\n".join(lines)
+
+    def to_json(self) -> str:
+        return json.dumps({
+            "counts": self.counts,
+            "seconds": self.seconds,
+        }, ensure_ascii=False, indent=2)
+
+
+def count(category: str, name: str, n: int = 1):
+    """Counts `name` if a profiler is active"""
+    if active is not None:
+        active.count(category, name, n)
+
+
+@contextmanager
+def profiling(profiler: Profiler | None = None) -> Generator[Profiler, None, None]:
+    """Records into `profiler` (or a new one) for the duration"""
+    global active  # pylint: disable=global-statement
+
+    previous, active = active, profiler or Profiler()
+    try:
+        yield active
+    finally:
+        active = previous
+
+
+def profile_pages(
+    pages: Iterable[tuple[str, str]], lang: LanguageCode, profiler: Profiler | None = None
+) -> Profiler:
+    """Parses the `lang` entry of each `(title, wikitext)` (as the pipeline does), with a profiler active"""
+    # (Imported here, since the parser reports to this module)
+    from wiktionary.dump import has_entry
+    from wiktionary.en.parser import EnParser
+    from wiktionary.en.templates.parse import TEMPLATE_REGISTRY, normalize_template_name
+    from wiktionary.utils import ParsedPage, get_entry
+
+    with profiling(profiler) as profiler:
+        for title, page in pages:
+            if not has_entry(page, lang):
+                continue
+
+            start = time.perf_counter()
+            try:
+                parsed = ParsedPage(get_entry(page, lang))
+                EnParser.parse(title, parsed.entry_sections(lang), lang, page=parsed)
+            except Exception:  # pylint: disable=broad-except
+                profiler.count("errors", title)
+                continue
+            finally:
+                profiler.add_time("pages", "parse", time.perf_counter() - start)
+
+            # (Outside of the timing: this is extra work that normal parsing doesn't do)
+            for template in parsed.wikitext.templates:
+                name = normalize_template_name(template.name)
+                profiler.count("templates", name)
+
+                if name not in TEMPLATE_REGISTRY.mappings:
+                    profiler.count("unmapped templates", name)
+
+    return profiler
@@ -0,0 +1,311 @@
+"""
+# RDF export
+
+Streams the whole dictionary as [N-Triples](https://www.w3.org/TR/n-triples/) (or, with the
+Wiktionary page each triple came from as its graph, [N-Quads](https://www.w3.org/TR/n-quads/)),
+which any triplestore can bulk-load.
+
+We skip JSON-LD (and `pyld`) altogether: the templates on each page are turned straight into
+lines of text, using the relationships in the [ontology](/ontology/language.json):
+
+```
+{{syn|en|H2O|aqua}} on "water"  ->  <od:en/water> <od:synonymOf> <od:en/H2O> .
+                                    <od:en/water> <od:synonymOf> <od:en/aqua> .
+```
+
+Plain links (`{{l|en|lake}}`) get their relationship from the section they're in
+("Hyponyms", "Synonyms", ...), and are an `rdfs:seeAlso` otherwise.
+
+Pages are read, converted and written one at a time, so memory stays flat. Compression
+depends on the file name: `.gz` (gzip), `.zst` (zstd, if `zstandard` is installed), or none.
+
+```sh
+python -m wiktionary.cli rdf enwiktionary-latest-pages-articles.xml.bz2 en dictionary.nt.gz
+```
+
+"""
+
+import gzip
+import re
+from bisect import bisect_right
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import IO, Callable, Generator, Iterable
+from urllib.parse import quote
+
+import wikitextparser as wtp
+from tqdm import tqdm
+
+from wiktionary._types import LanguageCode
+from wiktionary.dump import has_entry, iter_dump_pages
+from wiktionary.en.templates.parse import parse_template
+from wiktionary.ontology import get_ontology, get_predicate
+from wiktionary.utils import get_entry, iter_headings
+
+RDF_TYPE = "<http://www.w3.org/1999/02/22-rdf-syntax-ns#type>"
+RDFS_LABEL = "<http://www.w3.org/2000/01/rdf-schema#label>"
+RDFS_SEE_ALSO = "<http://www.w3.org/2000/01/rdf-schema#seeAlso>"
+DC_SOURCE = "<http://purl.org/dc/terms/source>"
+TRUE = '"true"^^<http://www.w3.org/2001/XMLSchema#boolean>'
+
+#: Subject, predicate, object (each already an N-Triples term)
+Triple = tuple[str, str, str]
+
+
+def _term(name: str) -> str:
+    return f"<{get_predicate(name)}>"
+
+
+@dataclass(frozen=True)
+class Relation:
+    #: A term in `ontology/language.json`
+    predicate: str
+
+    #: If `True`, the triple is `<object> predicate <word>` (e.g., the "Hypernyms" of "water"
+    #: include "liquid", so "liquid" is a hypernym of "water")
+    inverse: bool = False
+
+
+#: Relationships implied by the section a link is in
+SECTION_RELATIONS = {
+    "Synonyms": Relation("synonymOf"),
+    "Antonyms": Relation("antonymOf"),
+    "Hypernyms": Relation("hypernymOf", inverse=True),
+    "Hyponyms": Relation("hyponymOf", inverse=True),
+    "Meronyms": Relation("meronymOf", inverse=True),
+    "Holonyms": Relation("holonymOf", inverse=True),
+    "Troponyms": Relation("troponymOf", inverse=True),
+    "Coordinate terms": Relation("coordinateTermOf"),
+    "Derived terms": Relation("derivativeOf", inverse=True),
+    "Collocations": Relation("collocation"),
+    "Translations": Relation("translationOf"),
+}
+
+
+def _src(template: dict) -> list[tuple[str, str]]:
+    return [(template.get("srcLang"), template.get("src"))]
+
+
+def _word(template: dict) -> list[tuple[str, str]]:
+    return [(template.get("lang"), template.get("word"))]
+
+
+def _values(list_key: str, value_key: str, lang_key: str = "lang"):
+    def get(template: dict) -> list[tuple[str, str]]:
+        lang = template.get(lang_key)
+        return [(lang, item.get(value_key)) for item in template.get(list_key, ())]
+
+    return get
+
+
+#: How to get the related words out of each type of (parsed) template
+TEMPLATE_RELATIONS: dict[str, tuple[Relation, Callable[[dict], list[tuple[str, str]]]]] = {
+    "derived": (Relation("derivativeOf"), _src),
+    "borrowed": (Relation("borrowingOf"), _src),
+    "learned_borrowing": (Relation("learnedBorrowingOf"), _src),
+    "orthographic_borrowing": (Relation("orthographicBorrowingOf"), _src),
+    "calque": (Relation("calqueOf"), _src),
+    "backFormation": (Relation("backFormationOf"), _word),
+    "shortFor": (Relation("shortFor"), _word),
+    "cognate": (Relation("cognateOf"), _word),
+    "noncognate": (Relation("nonCognateOf"), _word),
+    "doublet": (Relation("doubletOf"), _values("doublets", "value")),
+    "root": (Relation("hasRoot"), _values("values", "value", "srcLang")),
+    "compound": (Relation("compoundOf"), _values("morphemes", "value")),
+    "synonyms": (Relation("synonymOf"), _values("synonyms", "synonym")),
+    "antonyms": (Relation("antonymOf"), _values("synonyms", "synonym")),
+    "hypernyms": (Relation("hypernymOf", inverse=True), _values("synonyms", "synonym")),
+    "hyponyms": (Relation("hyponymOf", inverse=True), _values("synonyms", "synonym")),
+    "meronyms": (Relation("meronymOf", inverse=True), _values("synonyms", "synonym")),
+    "holonyms": (Relation("holonymOf", inverse=True), _values("synonyms", "synonym")),
+    "troponyms": (Relation("troponymOf", inverse=True), _values("synonyms", "synonym")),
+    "coordinate_terms": (Relation("coordinateTermOf"), _values("synonyms", "synonym")),
+    "translation": (Relation("translationOf"), lambda t: [(t.get("lang"), t.get("gloss"))]),
+}
+
+def _link(template: dict) -> list[tuple[str, str]]:
+    return [(template.get("lang"), template.get("src"))]
+
+
+def template_relations(
+    template: dict, section: str | None = None
+) -> list[tuple[Relation | None, str, str]]:
+    """The `(relation, lang, word)` of each word a parsed template points to.
+
+    A link's relation depends on the `section` (title) it's in, and is `None` if that
+    doesn't tell us anything (e.g., "Related terms").
+    """
+    kind = template["@id"]
+
+    if kind in TEMPLATE_RELATIONS:
+        relation, get_objects = TEMPLATE_RELATIONS[kind]
+    elif kind in LINK_TEMPLATES:
+        relation, get_objects = SECTION_RELATIONS.get(section), _link
+    else:
+        return []
+
+    return [(relation, lang, word) for lang, word in get_objects(template) if lang and word]
+
+
+#: Templates that say something about the word itself
+TEMPLATE_FLAGS = {
+    "onomatopoeic": "isOnomatopoeia",
+    "rfe": "hasRequestForEtymology",
+    "unknown": "hasUnknownEtymology",
+}
+
+#: Links (the relationship depends on the section they're in)
+LINK_TEMPLATES = {"link", "mention"}
+
+
+_LANGUAGE_TAG = re.compile(r"[a-zA-Z]{1,8}(-[a-zA-Z0-9]{1,8})*")
+_ESCAPES = str.maketrans({"\\": "\\\\", '"': '\\"', "\n": "\\n", "\r": "\\r"})
+
+
+def literal(value: str, lang: str | None = None) -> str:
+    escaped = f'"{value.translate(_ESCAPES)}"'
+
+    if lang and _LANGUAGE_TAG.fullmatch(lang):
+        return f"{escaped}@{lang}"
+    return escaped
+
+
+@lru_cache(maxsize=1 << 16)
+def word_iri(lang: str, word: str) -> str:
+    """`<https://opendictionary.org/{lang}/{word}>`"""
+    return f"<{get_ontology()['@context']['od']}{quote(lang, safe='')}/{quote(word, safe='')}>"
+
+
+def page_iri(title: str, wiki: LanguageCode = "en") -> str:
+    """The Wiktionary page `title` (`<https://en.wiktionary.org/wiki/{title}>`)"""
+    return f"<https://{wiki}.wiktionary.org/wiki/{quote(title.replace(' ', '_'), safe='')}>"
+
+
+def _section_titles(page: str) -> tuple[list[int], list[str]]:
+    """Where each section starts, and its title (so we can tell which section a template is in)"""
+    starts, titles = [], []
+
+    for _, title, start in iter_headings(page):
+        starts.append(start)
+        titles.append(title)
+
+    return starts, titles
+
+
+def entry_templates(entry: str) -> Generator[tuple[dict, str | None], None, None]:
+    """Each (parsed) template in an entry's wikitext, and the title of the section it's in
+
+    All we need are the templates (and the headings above them), so we don't bother with
+    sections or lists here.
+    """
+    starts, titles = _section_titles(entry)
+
+    for template in wtp.parse(entry).templates:
+        if (parsed := parse_template(template)) is None:
+            continue
+
+        i = bisect_right(starts, template.span[0]) - 1
+        yield parsed, titles[i] if i >= 0 else None
+
+
+def entry_triples(
+    word: str, lang: LanguageCode, entry: str, wiki: LanguageCode = "en"
+) -> Generator[Triple, None, None]:
+    """The triples for `word`'s entry in `lang` (`entry` is its wikitext, see `get_entry`)"""
+    subject = word_iri(lang, word)
+
+    yield subject, RDF_TYPE, _term("Word")
+    yield subject, RDFS_LABEL, literal(word, lang)
+    yield subject, DC_SOURCE, page_iri(word, wiki)
+
+    for parsed, section in entry_templates(entry):
+        if parsed["@id"] in TEMPLATE_FLAGS:
+            yield subject, _term(TEMPLATE_FLAGS[parsed["@id"]]), TRUE
+            continue
+
+        for relation, object_lang, object_word in template_relations(parsed, section):
+            predicate = _term(relation.predicate) if relation else RDFS_SEE_ALSO
+            obj = word_iri(object_lang, object_word)
+
+            if relation and relation.inverse:
+                yield obj, predicate, subject
+            else:
+                yield subject, predicate, obj
+
+
+def page_triples(
+    title: str, page: str, lang: LanguageCode, wiki: LanguageCode = "en"
+) -> list[Triple]:
+    """The triples for the `lang` entry on a page of wikitext (or `[]` if there isn't one)"""
+    if not has_entry(page, lang):
+        return []
+
+    return list(entry_triples(title, lang, get_entry(page, lang), wiki))
+
+
+def format_triples(triples: Iterable[Triple], graph: str | None = None) -> str:
+    """N-Triples (or, given a `graph`, N-Quads) lines"""
+    end = f" {graph} .\n" if graph else " .\n"
+    return "".join(f"{s} {p} {o}{end}" for s, p, o in triples)
+
+
+def open_output(path: str) -> IO[str]:
+    """Opens `path` for writing text, compressed according to its extension"""
+    if path.endswith(".gz"):
+        return gzip.open(path, "wt", encoding="utf-8", compresslevel=6)
+
+    if path.endswith(".zst"):
+        try:
+            import zstandard
+        except ImportError as e:
+            raise ImportError("Writing .zst needs `zstandard`: `pip install zstandard`") from e
+
+        return zstandard.open(path, "wt", encoding="utf-8")
+
+    return open(path, "w", encoding="utf-8")
+
+
+@dataclass
+class ExportStats:
+    pages: int = 0
+    triples: int = 0
+    errors: int = 0
+
+
+def export_triples(
+    pages: Iterable[tuple[str, str]],
+    lang: LanguageCode,
+    out: IO[str],
+    quads: bool = False,
+    wiki: LanguageCode = "en",
+) -> ExportStats:
+    """Writes the triples for the `lang` entry of each `(title, wikitext)` to `out`
+
+    With `quads`, the graph of each triple is the Wiktionary page it came from.
+    """
+    stats = ExportStats()
+
+    for title, page in pages:
+        try:
+            triples = page_triples(title, page, lang, wiki)
+        except Exception:  # pylint: disable=broad-except
+            stats.errors += 1
+            continue
+
+        if triples:
+            out.write(format_triples(triples, page_iri(title, wiki) if quads else None))
+            stats.pages += 1
+            stats.triples += len(triples)
+
+    return stats
+
+
+def export_dump(
+    dump: str, lang: LanguageCode, path: str, quads: bool = False, progress: bool = True
+) -> ExportStats:
+    """Streams `dump` into an N-Triples (or N-Quads) file at `path` (see `open_output`)."""
+    with (
+        open_output(path) as out,
+        tqdm(iter_dump_pages(dump), unit="pages", disable=not progress, smoothing=0.1) as pages,
+    ):
+        return export_triples(pages, lang, out, quads)
@@ -0,0 +1,356 @@
+"""
+# Headword search
+
+Autocomplete, typo-tolerant and wildcard search over the headwords of each language:
+
+```python
+index = build_headword_index((e["word"], e["lang"]) for e in iter_shards("out/"))
+index.save("headwords.index")
+
+index = HeadwordIndex.load("headwords.index")
+index.complete("wat", "en")  # ["water", "waterfall", ...]
+index.fuzzy("watr", "en")  # [("water", 1), ("wat", 1), ...]
+index.match("w?t*r", "en")  # ["water", "waiter", ...]
+```
+
+Searches ignore case and accents ("cafe" finds "Café").
+
+## How it works
+
+Each language's headwords are stored, sorted, as one blob of UTF-8 plus an array of offsets.
+That's about as compact as it gets without compression (tens of MB for millions of words),
+and it's an *implicit* trie: all words starting with some prefix are one contiguous run,
+which we find by binary search. So:
+
+- `complete` is a binary search and a slice.
+- `fuzzy` walks that trie depth-first, keeping a row of the Levenshtein table per node
+  (i.e., it simulates a Levenshtein automaton), and skips whole subtrees once every cell
+  in the row is over `max_distance`. Going down a level is another binary search.
+- `match` walks it the same way, with the pattern as the automaton. Literal characters
+  jump straight to their subtree, so the more a pattern starts with, the faster it is.
+
+Saved indexes are memory-mapped, so loading one is instant and processes share it.
+"""
+
+import json
+import mmap
+import unicodedata
+from array import array
+from bisect import bisect_left, bisect_right
+from pathlib import Path
+from typing import Iterable, Sequence
+
+from wiktionary._types import LanguageCode
+
+MAGIC = b"ODHW"
+
+#: Sorts after any UTF-8 (so `prefix + _END` is past every word starting with `prefix`)
+_END = b"\xff"
+
+
+def fold(word: str) -> str:
+    """What we actually compare: lowercase, without accents (`Café` -> `cafe`)"""
+    decomposed = unicodedata.normalize("NFKD", word.casefold())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def _char_length(lead: int) -> int:
+    """The length of a UTF-8 character, from its first byte"""
+    return 1 if lead < 0x80 else 2 if lead < 0xE0 else 3 if lead < 0xF0 else 4
+
+
+class PackedStrings(Sequence[bytes]):
+    """A sorted list of byte strings, packed into one blob (what `bisect` searches)
+
+    The blob can be part of a bigger buffer (i.e., the mmapped file), starting at `start`.
+    """
+
+    def __init__(self, blob: bytes | mmap.mmap, offsets: Sequence[int], start: int = 0):
+        self.blob = blob
+        self.offsets = offsets
+        self.start = start
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> bytes:
+        # (Slicing an mmap gives bytes, and is about twice as fast as going through a memoryview)
+        return self.blob[self.start + self.offsets[i]:self.start + self.offsets[i + 1]]
+
+    @property
+    def size(self) -> int:
+        return self.offsets[-1]
+
+    def prefix_range(self, prefix: bytes, lo: int = 0, hi: int | None = None) -> tuple[int, int]:
+        """The (contiguous) run of strings that start with `prefix`"""
+        hi = len(self) if hi is None else hi
+        start = bisect_left(self, prefix, lo, hi)
+        return start, bisect_left(self, prefix + _END, start, hi)
+
+    @classmethod
+    def pack(cls, strings: Iterable[bytes]) -> "PackedStrings":
+        offsets = array("I", [0])
+        blob = bytearray()
+
+        for s in strings:
+            blob += s
+            if len(blob) > 0xFFFFFFFF:
+                raise ValueError("Too many strings (offsets are 32-bit)")
+            offsets.append(len(blob))
+
+        return cls(bytes(blob), offsets)
+
+
+class _Headwords:
+    """One language's headwords: folded keys (sorted) & the titles they came from"""
+
+    #: The children of nodes this shallow (in bytes) are cached (every fuzzy search goes through them)
+    CACHED_DEPTH = 2
+
+    def __init__(self, keys: PackedStrings, titles: PackedStrings):
+        self.keys = keys
+        self.titles = titles
+        self._children: dict[bytes, list[tuple[str, bytes, int, int]]] = {}
+
+    def title(self, i: int) -> str:
+        return self.titles[i].decode("utf-8")
+
+    def prefix_range(self, prefix: bytes, lo: int = 0, hi: int | None = None) -> tuple[int, int]:
+        return self.keys.prefix_range(prefix, lo, hi)
+
+    def exact(self, prefix: bytes, lo: int, hi: int) -> range:
+        """The words in `keys[lo:hi]` that *are* `prefix` (they always come first)"""
+        return range(lo, bisect_right(self.keys, prefix, lo, hi))
+
+    def find(self, key: bytes, lo: int = 0, hi: int | None = None) -> range:
+        """The words in `keys[lo:hi]` that are `key`"""
+        hi = len(self.keys) if hi is None else hi
+        start = bisect_left(self.keys, key, lo, hi)
+        return range(start, bisect_right(self.keys, key, start, hi))
+
+    def children(self, prefix: bytes, lo: int, hi: int) -> Iterable[tuple[str, bytes, int, int]]:
+        """The trie node `prefix` (i.e., `keys[lo:hi]`)'s children: `(char, child prefix, lo, hi)`"""
+        if len(prefix) > self.CACHED_DEPTH:
+            return self._iter_children(prefix, lo, hi)
+
+        if prefix not in self._children:
+            self._children[prefix] = list(self._iter_children(prefix, lo, hi))
+        return self._children[prefix]
+
+    def _iter_children(self, prefix: bytes, lo: int, hi: int):
+        depth = len(prefix)
+        i = self.exact(prefix, lo, hi).stop
+
+        while i < hi:
+            key = self.keys[i]
+            child = key[:depth + _char_length(key[depth])]
+            j = bisect_left(self.keys, child + _END, i, hi)
+
+            yield child[depth:].decode("utf-8"), child, i, j
+            i = j
+
+
+class HeadwordIndex:
+    """See the module docstring. Build with `build_headword_index`, or `load` a saved one."""
+
+    def __init__(self, languages: dict[LanguageCode, _Headwords], mmapped: mmap.mmap | None = None):
+        self._languages = languages
+        self._mmap = mmapped
+
+    @property
+    def languages(self) -> list[LanguageCode]:
+        return list(self._languages)
+
+    def __len__(self) -> int:
+        return sum(len(h.keys) for h in self._languages.values())
+
+    def __contains__(self, key: tuple[str, LanguageCode]) -> bool:
+        word, lang = key
+        if lang not in self._languages:
+            return False
+
+        headwords = self._languages[lang]
+        lo, hi = headwords.prefix_range(fold(word).encode("utf-8"))
+        return any(headwords.title(i) == word for i in range(lo, hi))
+
+    def complete(self, prefix: str, lang: LanguageCode, k: int = 10) -> list[str]:
+        """The first `k` headwords (in alphabetical order) that start with `prefix`"""
+        # (A language without headwords just doesn't match anything)
+        if (headwords := self._languages.get(lang)) is None:
+            return []
+
+        lo, hi = headwords.prefix_range(fold(prefix).encode("utf-8"))
+        return [headwords.title(i) for i in range(lo, min(hi, lo + k))]
+
+    def fuzzy(
+        self, word: str, lang: LanguageCode, max_distance: int = 1, k: int = 10
+    ) -> list[tuple[str, int]]:
+        """The `k` closest headwords within `max_distance` edits of `word`, with their distance"""
+        if (headwords := self._languages.get(lang)) is None:
+            return []
+
+        query = fold(word)
+        n = len(query)
+        found: list[tuple[int, int]] = []
+
+        def visit(prefix: bytes, lo: int, hi: int, row: list[int]):
+            if row[n] <= max_distance:
+                found.extend((row[n], i) for i in headwords.exact(prefix, lo, hi))
+
+            if min(row) == max_distance:
+                # Out of edits: the rest of the word has to be exactly the rest of the query
+                for i in range(n):
+                    if row[i] == max_distance:
+                        key = prefix + query[i:].encode("utf-8")
+                        found.extend((max_distance, j) for j in headwords.find(key, lo, hi))
+                return
+
+            for char, child, child_lo, child_hi in headwords.children(prefix, lo, hi):
+                next_row = [row[0] + 1]
+                for i in range(1, n + 1):
+                    next_row.append(min(
+                        next_row[i - 1] + 1,
+                        row[i] + 1,
+                        row[i - 1] + (query[i - 1] != char),
+                    ))
+
+                if min(next_row) <= max_distance:
+                    visit(child, child_lo, child_hi, next_row)
+
+        if len(headwords.keys):
+            visit(b"", 0, len(headwords.keys), list(range(n + 1)))
+
+        found.sort()
+        return [(headwords.title(i), distance) for distance, i in found[:k]]
+
+    def match(self, pattern: str, lang: LanguageCode, k: int = 10) -> list[str]:
+        """The first `k` headwords matching `pattern`, where `?` is any one character and `*` is any run"""
+        if (headwords := self._languages.get(lang)) is None:
+            return []
+
+        tokens = [c if c in "?*" else fold(c) for c in pattern]
+        tokens = [t for t in tokens if t]
+        end = len(tokens)
+        found: list[int] = []
+
+        def closure(states: set[int]) -> set[int]:
+            # `*` can match nothing, so it might as well not be there
+            stack = list(states)
+            while stack:
+                p = stack.pop()
+                if p < end and tokens[p] == "*" and p + 1 not in states:
+                    states.add(p + 1)
+                    stack.append(p + 1)
+            return states
+
+        def step(states: set[int], char: str) -> set[int]:
+            next_states = set()
+            for p in states:
+                if p < end and tokens[p] in ("?", char):
+                    next_states.add(p + 1)
+                elif p < end and tokens[p] == "*":
+                    next_states.add(p)
+            return closure(next_states)
+
+        def visit(prefix: bytes, lo: int, hi: int, states: set[int]):
+            if len(found) >= k:
+                return
+            if end in states:
+                found.extend(headwords.exact(prefix, lo, hi)[:k - len(found)])
+
+            if all(tokens[p] not in "?*" for p in states if p < end):
+                # Only literals left to match: go straight to them
+                children = (
+                    (char, child, *headwords.prefix_range(child, lo, hi))
+                    for char in sorted({tokens[p] for p in states if p < end})
+                    for child in [prefix + char.encode("utf-8")]
+                )
+            else:
+                children = headwords.children(prefix, lo, hi)
+
+            for char, child, child_lo, child_hi in children:
+                if child_lo < child_hi and (next_states := step(states, char)):
+                    visit(child, child_lo, child_hi, next_states)
+
+        if len(headwords.keys):
+            visit(b"", 0, len(headwords.keys), closure({0}))
+
+        return [headwords.title(i) for i in found]
+
+    def save(self, path: str | Path):
+        """Writes the index to `path` (see `load`)"""
+        header, sections, offset = {}, [], 0
+
+        for lang, headwords in self._languages.items():
+            header[lang] = {}
+            for name in ("keys", "titles"):
+                strings = getattr(headwords, name)
+                offsets = array("I", strings.offsets).tobytes()
+
+                blob = strings.blob[strings.start:strings.start + strings.size]
+
+                header[lang][name] = [offset, offset + len(blob), len(offsets)]
+                sections += [blob, offsets]
+                offset += len(blob) + len(offsets)
+
+                # Keep the offsets arrays aligned
+                padding = -offset % 4
+                sections.append(b"\0" * padding)
+                offset += padding
+
+        encoded = json.dumps(header).encode("utf-8")
+        encoded += b" " * (-(len(MAGIC) + 4 + len(encoded)) % 4)
+
+        with open(path, "wb") as f:
+            f.write(MAGIC)
+            f.write(len(encoded).to_bytes(4, "little"))
+            f.write(encoded)
+            for section in sections:
+                f.write(section)
+
+    @classmethod
+    def load(cls, path: str | Path) -> "HeadwordIndex":
+        """Memory-maps an index written by `save`"""
+        with open(path, "rb") as f:
+            mmapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if mmapped[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"Not a headword index: {path}")
+
+        header_length = int.from_bytes(mmapped[len(MAGIC):len(MAGIC) + 4], "little")
+        start = len(MAGIC) + 4 + header_length
+        header = json.loads(mmapped[len(MAGIC) + 4:start])
+        view = memoryview(mmapped)
+
+        def strings(blob_offset: int, offsets_offset: int, offsets_length: int) -> PackedStrings:
+            return PackedStrings(
+                mmapped,
+                view[start + offsets_offset:start + offsets_offset + offsets_length].cast("I"),
+                start + blob_offset,
+            )
+
+        return cls(
+            {
+                lang: _Headwords(strings(*sections["keys"]), strings(*sections["titles"]))
+                for lang, sections in header.items()
+            },
+            mmapped,
+        )
+
+
+def build_headword_index(words: Iterable[tuple[str, LanguageCode]]) -> HeadwordIndex:
+    """Indexes `(word, lang)` pairs (e.g., from the entries in `pipeline.iter_shards`)"""
+    by_lang: dict[LanguageCode, set[str]] = {}
+
+    for word, lang in words:
+        by_lang.setdefault(lang, set()).add(word)
+
+    languages = {}
+
+    for lang, titles in by_lang.items():
+        pairs = sorted((fold(title).encode("utf-8"), title.encode("utf-8")) for title in titles)
+        languages[lang] = _Headwords(
+            PackedStrings.pack(key for key, _ in pairs), PackedStrings.pack(title for _, title in pairs)
+        )
+
+    return HeadwordIndex(languages)
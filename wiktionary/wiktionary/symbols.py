@@ -0,0 +1,113 @@
+"""
+# Symbols
+
+Language codes, template ids, section ids (including parts of speech), genders, ... are a
+few thousand distinct strings between them, repeated millions of times over a dump:
+`"lang": "en"` alone is in most templates. Each one we slice out of wikitext is a fresh
+copy, so instead we keep one copy of each (`intern`), and number them (`code`), for
+exports that store them as integers:
+
+```python
+LANGUAGES.intern("en")  # The same "en" object every time
+LANGUAGES.code("en")  # 0 (say): its position in `LANGUAGES.symbols`
+LANGUAGES[0]  # "en"
+```
+
+The tables below are shared by the whole process (and live as long as it does), so they're
+only for low-cardinality values, and each has a `limit`: once it's full (or for values longer
+than `max_length`, which are junk more often than not), `intern` hands values back as they
+are, so a long-running process (`batch`, `update`, a server) doesn't grow them forever. Codes are only meaningful within a process (they're in
+the order values were first seen), so an export that stores codes has to store the table
+along with them, or use a table of its own (e.g., `columnar`, for each row group).
+"""
+
+from typing import Iterable, Iterator
+
+
+class SymbolTable:
+    """Numbers strings in the order they're first seen (and keeps one copy of each)."""
+
+    __slots__ = ("symbols", "limit", "max_length", "_codes")
+
+    def __init__(self, symbols: Iterable[str] = (), limit: int | None = None, max_length: int | None = None):
+        #: The symbols, by code
+        self.symbols: list[str] = []
+        #: How many symbols `intern` adds, at most (`None`: no limit)
+        self.limit = limit
+        #: The longest symbol `intern` adds (`None`: no limit)
+        self.max_length = max_length
+        self._codes: dict[str, int] = {}
+
+        for symbol in symbols:
+            self.code(symbol)
+
+    def code(self, symbol: str) -> int:
+        """`symbol`'s code (giving it one if it doesn't have one yet)"""
+        if (code := self._codes.get(symbol)) is None:
+            code = self._codes[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+
+        return code
+
+    def intern(self, symbol: str) -> str:
+        """The table's copy of `symbol` (or `symbol` itself, if it's too long or the table is full)"""
+        # (Called for most template arguments, so without a second call when we've seen it before)
+        if (code := self._codes.get(symbol)) is None:
+            if not self.accepts(symbol):
+                return symbol
+            code = self.code(symbol)
+
+        return self.symbols[code]
+
+    def accepts(self, symbol: str) -> bool:
+        """Whether `intern` would add `symbol`"""
+        return (
+            (self.limit is None or len(self.symbols) < self.limit)
+            and (self.max_length is None or len(symbol) <= self.max_length)
+        )
+
+    def __getitem__(self, code: int) -> str:
+        return self.symbols[code]
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._codes
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.symbols)
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def __repr__(self) -> str:
+        return f"<SymbolTable: {len(self)} symbols>"
+
+
+#: Language codes (e.g., `en`, `gem-pro`), wherever they come from (Wiktionary has ~10,000)
+LANGUAGES = SymbolTable(limit=16_384, max_length=16)
+#: Script codes (e.g., `Latn`)
+SCRIPTS = SymbolTable(limit=1_024, max_length=16)
+#: Gender & number codes (e.g., `m`, `f-p`)
+GENDERS = SymbolTable(limit=1_024, max_length=16)
+#: The `@id`s of parsed templates (i.e., `TemplateMapping.name`)
+TEMPLATES = SymbolTable(limit=1_024, max_length=64)
+#: The `@id`s of parsed sections (e.g., `noun`, `synonyms`), which are whatever the headings say
+SECTIONS = SymbolTable(limit=4_096, max_length=64)
+
+#: Which table the values under each key of a parsed template belong in
+TEMPLATE_SYMBOLS: dict[str, SymbolTable] = {
+    "lang": LANGUAGES,
+    "srcLang": LANGUAGES,
+    "dstLang": LANGUAGES,
+    "script": SCRIPTS,
+    "g": GENDERS,
+    "gender": GENDERS,
+}
+
+#: Each of the shared tables (by name)
+SYMBOL_TABLES: dict[str, SymbolTable] = {
+    "languages": LANGUAGES,
+    "scripts": SCRIPTS,
+    "genders": GENDERS,
+    "templates": TEMPLATES,
+    "sections": SECTIONS,
+}
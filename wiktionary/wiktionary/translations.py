@@ -0,0 +1,238 @@
+"""
+# Reverse translations
+
+Translations live on the page of the word they translate *from*: "house" has
+`{{t+|de|Haus|n}}` in its "Translations" section, and "Haus" has no idea. So, to answer
+"which English words translate to German *Haus*?", this inverts them, once, from the
+shards written by the bulk parse:
+
+```sh
+python -m wiktionary.cli translations out/ translations.index
+```
+
+```python
+index = TranslationIndex("translations.index")
+index.lookup("Haus", "de")
+# [TranslationSource(word="house", lang="en", part_of_speech="NOUN", etymology=0, target="Haus"), ...]
+```
+
+Targets are matched ignoring case & accents (see `search.fold`), since translations are
+often written with stress marks or macrons that the page titles don't have (`вода́`).
+
+## Format
+
+```
+header | records | offsets
+```
+
+One record per translation, `{target lang}\\0{folded target}\\0{target}\\0{word}\\0{lang}\\0{part of speech}\\0{etymology}`,
+sorted (see `search.PackedStrings`), so a lookup is a binary search over the memory-mapped file.
+
+## Updates
+
+`update_translation_index` applies the deltas from `incremental.refresh` (a word's
+upsert replaces all of its translations, a delete drops them) by merging them into the
+(already sorted) records, in one pass, without re-reading the shards.
+
+"""
+
+import heapq
+import json
+import mmap
+import os
+import struct
+from array import array
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Generator, Iterable
+
+from wiktionary._types import LanguageCode
+from wiktionary.columnar import EntryFlattener
+from wiktionary.search import PackedStrings, fold
+
+MAGIC = b"ODTR"
+VERSION = 1
+
+#: magic, version, # of records
+_HEADER = struct.Struct("<4sHQ")
+
+
+class TranslationIndexError(ValueError):
+    """Not a (readable) translation index."""
+
+
+@dataclass(frozen=True)
+class TranslationSource:
+    """A sense of a word that translates to some other word"""
+    word: str
+    lang: LanguageCode
+    #: As in the schema's `PartOfSpeech` (`None` if the translations aren't under one)
+    part_of_speech: str | None
+    #: Which of the word's etymologies (i.e., `EnEntry`s) it's in
+    etymology: int
+    #: The translation, as written
+    target: str
+
+
+def _key(target: str, target_lang: LanguageCode) -> bytes:
+    return f"{target_lang}\0{fold(target)}\0".encode("utf-8")
+
+
+def _record(target_lang: LanguageCode, source: TranslationSource) -> bytes:
+    return _key(source.target, target_lang) + "\0".join([
+        source.target, source.word, source.lang, source.part_of_speech or "", str(source.etymology)
+    ]).encode("utf-8")
+
+
+def _source(record: bytes) -> TranslationSource:
+    *_, target, word, lang, pos, etymology = record.decode("utf-8").split("\0")
+    return TranslationSource(word, lang, pos or None, int(etymology), target)
+
+
+def _source_word(record: bytes) -> tuple[str, LanguageCode]:
+    *_, word, lang, _, _ = record.decode("utf-8").split("\0")
+    return word, lang
+
+
+def entry_translations(
+    entries: Iterable[Any], flattener: EntryFlattener | None = None
+) -> Generator[tuple[LanguageCode, TranslationSource], None, None]:
+    """`(target lang, source)` for each translation in `entries` (`EnEntry`s or their `to_dict()`s)"""
+    flattener = flattener or EntryFlattener()
+
+    for entry in entries:
+        for table, row in flattener.rows(entry):
+            if table != "definition_triples" or row["template"] != "translation":
+                continue
+
+            yield row["objectLanguage"], TranslationSource(
+                row["word"], row["language"], row.get("partOfSpeech"), row["etymology"], row["objectWord"],
+            )
+
+
+def _write(path: str | Path, records: Iterable[bytes]) -> int:
+    """Writes (sorted, unique) `records` to `path`, and returns how many there were"""
+    offsets = array("I", [0])
+    tmp = Path(f"{path}.tmp")
+
+    with open(tmp, "wb") as f:
+        f.write(b"\0" * _HEADER.size)
+
+        for record in records:
+            f.write(record)
+            if offsets[-1] + len(record) > 0xFFFFFFFF:
+                raise ValueError("Too many translations (offsets are 32-bit)")
+            offsets.append(offsets[-1] + len(record))
+
+        # Keep the offsets aligned
+        f.write(b"\0" * (-f.tell() % 4))
+        f.write(offsets.tobytes())
+
+        f.seek(0)
+        f.write(_HEADER.pack(MAGIC, VERSION, len(offsets) - 1))
+
+    os.replace(tmp, path)
+    return len(offsets) - 1
+
+
+def build_translation_index(entries: Iterable[Any], path: str | Path) -> int:
+    """Indexes the translations in `entries` (e.g., from `pipeline.iter_shards`) at `path`.
+
+    Returns the number of translations.
+    """
+    records = {_record(lang, source) for lang, source in entry_translations(entries)}
+    return _write(path, sorted(records))
+
+
+class TranslationIndex:
+    """Looks up the words that translate to a word (see the module docstring)."""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+
+        with open(self.path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if len(self._mmap) < _HEADER.size:
+            raise TranslationIndexError(f"Not a translation index: {path}")
+
+        magic, version, count = _HEADER.unpack_from(self._mmap)
+
+        if magic != MAGIC:
+            raise TranslationIndexError(f"Not a translation index: {path}")
+        if version != VERSION:
+            raise TranslationIndexError(f"Unsupported version {version} (expected {VERSION}): {path}")
+
+        offsets_start = len(self._mmap) - 4 * (count + 1)
+        self._view = memoryview(self._mmap)
+        self._offsets = self._view[offsets_start:].cast("I")
+        self._records = PackedStrings(self._mmap, self._offsets, _HEADER.size)
+
+    def lookup(
+        self, target: str, target_lang: LanguageCode, lang: LanguageCode | None = None
+    ) -> list[TranslationSource]:
+        """The senses that translate to `target` (in `target_lang`), optionally only those in `lang`"""
+        lo, hi = self._records.prefix_range(_key(target, target_lang))
+        sources = [_source(self._records[i]) for i in range(lo, hi)]
+
+        return [s for s in sources if lang is None or s.lang == lang]
+
+    def __iter__(self) -> Generator[bytes, None, None]:
+        """The raw records, in order"""
+        for i in range(len(self._records)):
+            yield self._records[i]
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def close(self):
+        self._offsets.release()
+        self._view.release()
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+
+def read_deltas(path: str | Path) -> Generator[dict, None, None]:
+    """The ops in a delta file written by `incremental.refresh`"""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def update_translation_index(path: str | Path, deltas: Iterable[dict]) -> int:
+    """Applies `deltas` (see `read_deltas`) to the index at `path`, in place.
+
+    Returns the number of translations afterwards.
+    """
+    # (If a word changes more than once, the last change wins)
+    changed: dict[tuple[str, LanguageCode], list] = {}
+
+    for delta in deltas:
+        entries = delta.get("entries") if delta["op"] == "upsert" else None
+        changed[delta["word"], delta["lang"]] = entries or []
+
+    added = sorted({
+        _record(lang, source)
+        for entries in changed.values()
+        for lang, source in entry_translations(entries)
+    })
+
+    with TranslationIndex(path) as index:
+        kept = (record for record in index if _source_word(record) not in changed)
+        # (`_write` goes to a temporary file first, so we can read the old one while writing)
+        return _write(path, _unique(heapq.merge(kept, added)))
+
+
+def _unique(records: Iterable[bytes]) -> Generator[bytes, None, None]:
+    previous = None
+
+    for record in records:
+        if record != previous:
+            yield record
+        previous = record
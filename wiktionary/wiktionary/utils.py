@@ -1,17 +1,243 @@
-import re
-from typing import TypedDict
+from __future__ import annotations
 
-import wikitextparser as wtp
+import re
+from bisect import bisect_left
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Generator, TypedDict
 
 from wiktionary._types import Language, LanguageCode
 from wiktionary.constants import LANGUAGES_TO_NAMES
 
+if TYPE_CHECKING:
+    # (Imported when we first parse something: it takes a while, and finding an entry doesn't need it)
+    import wikitextparser as wtp
+
 
 def get_full_lang(lang: LanguageCode) -> Language:
     """Returns a capitalized, English version of the language corresponding to `lang`"""
     return LANGUAGES_TO_NAMES[lang].capitalize() # type: ignore
 
 
+class EntryNotFoundError(ValueError):
+    """The page has no entry (i.e., `==Language==` section) for the language we asked for."""
+
+
+#: `{language: (start, end)}` offsets of each entry on a page
+EntryIndex = dict[str, tuple[int, int]]
+
+#: A section heading, as wikitextparser sees it (`===Y==` is a `h2` titled "=Y")
+_HEADING = re.compile(r"^(={1,6})([^\r\n]+?)\1(?:[ \t]|<!--.*?-->)*\r?$", re.MULTILINE)
+
+
+def index_entries(page: str) -> EntryIndex:
+    """
+    Finds where each entry starts and ends without parsing the page.
+
+    Pages like "a" have entries in 100+ languages, and we usually want just one of them.
+    """
+    headings = [
+        (title if level == 2 else None, start)
+        for level, title, start in iter_headings(page)
+        # Only `h1` and `h2` headings end an entry
+        if level <= 2
+    ]
+    return _index_headings(headings, len(page))
+
+
+def iter_headings(page: str) -> Generator[tuple[int, str, int], None, None]:
+    """The `(level, title, start)` of each section heading on `page` (titles are stripped)"""
+    for m in _HEADING.finditer(page):
+        yield len(m.group(1)), m.group(2).strip(), m.start()
+
+
+def index_entries_from_api(page: str, sections: list[dict]) -> EntryIndex:
+    """
+    Same as `index_entries`, but from the `sections` the API already gives us (`prop=sections`).
+
+    NOTE: The API's `byteoffset`s count bytes of UTF-8, not characters. Sections that
+    come from transcluded templates don't have one (and aren't entries anyway).
+    """
+    encoded = page.encode("utf-8")
+    headings = []
+    byteoffset, offset = 0, 0
+
+    for section in sections:
+        if int(section.get("level", 0)) > 2 or section.get("byteoffset") is None:
+            continue
+
+        # Convert to character offsets as we go, so we only decode each byte once
+        offset += len(encoded[byteoffset:section["byteoffset"]].decode("utf-8"))
+        byteoffset = section["byteoffset"]
+        headings.append((section["line"].strip() if int(section["level"]) == 2 else None, offset))
+
+    return _index_headings(headings, len(page))
+
+
+def _index_headings(headings: list[tuple[str | None, int]], length: int) -> EntryIndex:
+    """Each entry runs from its heading to the next (or the end of the page)"""
+    ends = [start for _, start in headings[1:]] + [length]
+    index = {}
+
+    for (language, start), end in zip(headings, ends):
+        # If a language shows up twice, the first one wins (same as `ParsedPage.entry_sections`)
+        if language is not None:
+            index.setdefault(language, (start, end))
+
+    return index
+
+
+def get_entry(page: str, lang: LanguageCode, index: EntryIndex | None = None) -> str:
+    """The wikitext of `page`'s entry for `lang` (from its `h2` heading up to the next one)."""
+    index = index_entries(page) if index is None else index
+    language = get_full_lang(lang)
+
+    if language not in index:
+        raise EntryNotFoundError(f"No {language} entry found")
+
+    start, end = index[language]
+    return page[start:end]
+
+
+def get_entry_sections(page: str, lang: LanguageCode, index: EntryIndex | None = None) -> list[wtp.Section]:
+    """
+    Each entry starts with a `h2` tag. We read all the sections following
+    a tag until the next `h2` tag, which marks the start of the next entry.
+
+    Only the entry itself goes through wikitextparser.
+    """
+    return ParsedPage(get_entry(page, lang, index)).entry_sections(lang)
+
+
+class ParsedPage:
+    """
+    A page, parsed exactly once.
+
+    wikitextparser works things out from scratch whenever you ask a node for its sections
+    or lists (and `wtp.parse`-ing a substring of course starts over too). So we ask the page,
+    once, and find a section's subsections and list items by their spans.
+    """
+
+    def __init__(self, page: str):
+        import wikitextparser as wtp  # pylint: disable=import-outside-toplevel,redefined-outer-name
+
+        self.wikitext = wtp.parse(page)
+        self.sections = self.wikitext.sections
+        self._lists: list[wtp.WikiList] | None = None
+        self._list_starts: list[int] = []
+
+    def entry_sections(self, lang: LanguageCode) -> list[wtp.Section]:
+        """See `get_entry_sections`"""
+        language = get_full_lang(lang)
+        sections = iter(self.sections)
+
+        def get_sections() -> Generator[wtp.Section, None, None]:
+            # Skip any sections preceding the entry we want
+            for section in sections:
+                if section.title and section.title.strip() == language:
+                    break
+            else:
+                raise EntryNotFoundError(f"No {language} entry found")
+
+            # Take sections until we encounter the next entry (i.e., new language)
+            for section in sections:
+                if section.level == 2:
+                    break
+                yield section
+
+        # h3 sections are contained under h3 sections
+        return [s for s in get_sections() if s.level == 3]
+
+    def subsections(self, section: wtp.Section) -> list[wtp.Section]:
+        """`section` followed by all of its (nested) subsections. Same as `section.sections[1:]`"""
+        start, end = section.span
+        return [
+            s for s in self.sections
+            if s.level and start <= s.span[0] and s.span[1] <= end
+        ]
+
+    def lists(self, wikitext: wtp.WikiText) -> list[wtp.WikiList]:
+        """The (top-level) lists within `wikitext`. Same as `wikitext.get_lists()`"""
+        if self._lists is None:
+            self._lists = self.wikitext.get_lists()
+            self._list_starts = [ul.span[0] for ul in self._lists]
+
+        start, end = wikitext.span
+        i = bisect_left(self._list_starts, start)
+        lists = []
+
+        while i < len(self._lists) and self._list_starts[i] < end:
+            if self._lists[i].span[1] <= end:
+                lists.append(self._lists[i])
+            i += 1
+
+        return lists
+
+
+@dataclass
+class ListItem:
+    """A list item as a view into an already-parsed page (rather than a string to parse again)."""
+    #: The item's text (without its `#`/`*`/... prefix or sub-items), same as `wtp.WikiList.items`
+    string: str
+    #: Absolute `(start, end)` in the page
+    span: tuple[int, int]
+    #: The templates within `span`
+    templates: list[wtp.Template]
+
+    def __str__(self) -> str:
+        return self.string
+
+
+def _templates_within(
+    templates: list[wtp.Template], starts: list[int], span: tuple[int, int]
+) -> list[wtp.Template]:
+    start, end = span
+    i = bisect_left(starts, start)
+    selected = []
+
+    while i < len(starts) and starts[i] < end:
+        if templates[i].span[1] <= end:
+            selected.append(templates[i])
+        i += 1
+
+    return selected
+
+
+def get_list_items(wikitext: wtp.WikiText, page: ParsedPage | None = None) -> list[ListItem | str]:
+    """All the items of all the (top-level) lists in `wikitext` (which is part of `page`, if given).
+
+    Items come back as `ListItem` views into the existing parse tree. The odd item we can't
+    locate unambiguously (e.g., `;term:definition` lists with two items per line) comes back
+    as a plain string (as in `wtp.WikiList.items`), to be parsed on its own.
+    """
+    items = []
+    lists = wikitext.get_lists() if page is None else page.lists(wikitext)
+
+    for ul in lists:
+        lis, fullitems = ul.items, ul.fullitems
+
+        if len(lis) != len(fullitems) or "".join(fullitems) != ul.string:
+            items.extend(lis)
+            continue
+
+        templates = sorted(ul.templates, key=lambda t: t.span[0])
+        starts = [t.span[0] for t in templates]
+
+        # Full items tile the list, and each starts with the list pattern (e.g. `#`), then the item
+        offset = ul.span[0]
+        level = ul.level
+
+        for li, fullitem in zip(lis, fullitems):
+            if fullitem[level:level + len(li)] == li:
+                span = (offset + level, offset + level + len(li))
+                items.append(ListItem(li, span, _templates_within(templates, starts, span)))
+            else:
+                items.append(li)
+
+            offset += len(fullitem)
+
+    return items
+
+
 def to_snake_case(word):
     """Converts a sentence to snake_case"""
     return word.lower().replace(" ", "_")